@@ -1,51 +1,221 @@
 import logging
 import asyncio
-from backend.ai.strategy import make_trade_decision, calculate_stop_loss_and_take_profit
+import os
+import time
+from collections import defaultdict
+from backend.ai import batch, strategy
+from backend.ai.scheduler import DEFAULT_STRATEGY, StrategyScheduler, parse_strategy
+from backend.ai.strategy import calculate_stop_loss_and_take_profit
+from backend.ai.streaming import decide_from_store, make_streaming_trade_decision
+from backend.utils import feed, lazy, price_store
+from backend.utils.fanout import bounded_gather, run_blocking
 
-# Configure logging
-logging.basicConfig(
-    filename="trading.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+np = lazy.LazyModule("numpy")
+
+# Windows the streaming engines are built with; other windows go through the batch pass.
+DEFAULT_RSI_WINDOW = 14
+DEFAULT_BOLLINGER_WINDOW = 20
+
+# Trade log file; written once configure_logging() runs (at API startup), never on import.
+TRADING_LOG = os.getenv("HODLBOT_TRADING_LOG", "trading.log")
+
+def configure_logging(filename: str = TRADING_LOG):
+    """Send the automation's trade log to ``filename``. Called from the API's startup, not at import."""
+    logging.basicConfig(
+        filename=filename,
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
 
 # Define a global trading_states dictionary to track trading status per cryptocurrency
 trading_states = {}
 
-async def start_automated_trading(crypto):
-    """Start automated trading for a specific cryptocurrency."""
-    if trading_states.get(crypto):
-        logging.warning(f"Automated trading for {crypto} is already running.")
-        return
+# -------------------------------
+# Central automation engine
+# -------------------------------
+class AutomationEngine:
+    """
+    Runs every automated coin from one loop instead of one loop per coin.
 
-    trading_states[crypto] = True
-    logging.info(f"Automated trading started for {crypto}.")
+    Each coin's strategy sits in a heap scheduler and fires at its own
+    ``tradeFrequency``; strategies falling due together form one tick. A tick
+    syncs those coins' price histories concurrently on the fan-out pool, then
+    makes every decision in a single worker-pool call, so the event loop only
+    schedules work and never blocks on HTTP or indicator math.
+    """
 
-    while trading_states[crypto]:
-        try:
-            # Fetch trade decision
-            decision = make_trade_decision(crypto)
-            if "error" in decision:
-                logging.error(f"Error for {crypto}: {decision['error']}")
+    def __init__(self, interval: float = 60, days: int = 14, states: dict = None):
+        self.interval = interval
+        self.days = days
+        self.states = trading_states if states is None else states
+        self.scheduler = StrategyScheduler()
+        self.last_decisions = {}
+        self.stats = {"ticks": 0, "last_tick_seconds": 0.0, "last_tick_coins": 0, "errors": 0}
+        self._task = None
+        self._wake = None
+
+    def active(self):
+        return [coin for coin, running in self.states.items() if running]
+
+    def start(self, coin: str, strategy: dict = None):
+        """Put a coin under automation; returns False if it already was."""
+        if self.states.get(coin):
+            logging.warning(f"Automated trading for {coin} is already running.")
+            return False
+        self.apply(coin, strategy)
+        logging.info(f"Automated trading started for {coin}.")
+        return True
+
+    def apply(self, coin: str, strategy: dict = None):
+        """
+        Register (or replace) a coin's strategy and automate it; it fires right away.
+        Without a strategy the scheduler's DEFAULT_STRATEGY is used, every ``interval`` seconds.
+        """
+        params = strategy if strategy is not None else {**DEFAULT_STRATEGY, "tradeFrequency": self.interval / 60}
+        parsed = parse_strategy(params)
+        self.states[coin] = True
+        self.scheduler.register(coin, parsed)
+        self._ensure_running()
+        return parsed
+
+    def stop(self, coin: str):
+        """Take a coin out of automation; returns False if it was not running."""
+        if not self.states.get(coin):
+            logging.warning(f"Automated trading for {coin} is not running.")
+            return False
+        self.states[coin] = False
+        self.scheduler.unregister(coin)
+        logging.info(f"Automated trading stopped for {coin}.")
+        return True
+
+    def status(self):
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "coins": {coin: self.last_decisions.get(coin) for coin in self.active()},
+            "scheduler": self.scheduler.metrics(),
+            **self.stats,
+        }
+
+    async def tick(self, coins=None):
+        """Decide for ``coins`` (default: every active coin) and act on the results."""
+        coins = list(coins if coins is not None else self.active())
+        if not coins:
+            return {}
+        started = time.perf_counter()
+        strategies = {coin: self.scheduler.get(coin) or parse_strategy() for coin in coins}
+        if strategy.IS_SIMULATION_MODE:
+            results = await bounded_gather(make_streaming_trade_decision, coins, bulk=True)
+            decisions = dict(zip(coins, results))
+        else:
+            synced = await bounded_gather(
+                lambda coin: strategy.sync_price_history(coin, days=self.days), coins, bulk=True
+            )
+            decisions = {}
+            ready = []
+            for coin, result in zip(coins, synced):
+                if isinstance(result, Exception):
+                    decisions[coin] = {"error": f"No price data available ({result})"}
+                else:
+                    ready.append(coin)
+            if ready:
+                decisions.update(await run_blocking(self._decide, ready, strategies))
+
+        for coin, decision in decisions.items():
+            if self.states.get(coin):
+                self._act(coin, decision)
+        self.stats["ticks"] += 1
+        self.stats["last_tick_coins"] = len(coins)
+        self.stats["last_tick_seconds"] = round(time.perf_counter() - started, 3)
+        return decisions
+
+    def _decide(self, coins, strategies):
+        """
+        Worker-pool side of a tick. Coins on the default indicator windows use their warm
+        streaming engines; the rest are grouped by windows and decided in one batch pass per group.
+        """
+        decisions = {}
+        groups = defaultdict(list)
+        for coin in coins:
+            s = strategies[coin]
+            if (s.rsi_window, s.bollinger_window) == (DEFAULT_RSI_WINDOW, DEFAULT_BOLLINGER_WINDOW):
+                decisions[coin] = decide_from_store(coin, self.days, s.max_loss, s.profit_threshold, s.adx_threshold)
             else:
-                logging.info(f"Trade Decision for {crypto}: {decision}")
-                if decision["decision"] == "BUY":
-                    logging.info(f"✅ Buying {crypto} at ${decision['price']} - {decision.get('reason', '')}")
-                elif decision["decision"] == "SELL":
-                    logging.info(f"✅ Selling {crypto} at ${decision['price']} - {decision.get('reason', '')}")
+                groups[(s.rsi_window, s.bollinger_window)].append(coin)
+
+        since_ms = int(time.time() * 1000) - self.days * 86_400_000
+        for (rsi_window, bollinger_window), members in groups.items():
+            series = {}
+            for coin in members:
+                _, prices = price_store.store.read(coin, since_ms=since_ms)
+                if len(prices):
+                    series[coin] = prices
                 else:
-                    logging.info(f"🤝 Holding {crypto}")
-        except Exception as e:
-            logging.error(f"Trading error for {crypto}: {e}")
+                    decisions[coin] = {"error": "No price data available"}
+            if not series:
+                continue
+            results = batch.trade_decisions(
+                batch.stack_prices(list(series.values())),
+                stop_loss_percent=np.array([strategies[c].max_loss for c in series]),
+                take_profit_percent=np.array([strategies[c].profit_threshold for c in series]),
+                adx_threshold=np.array([strategies[c].adx_threshold for c in series]),
+                rsi_window=rsi_window,
+                bollinger_window=bollinger_window,
+            )
+            decisions.update(zip(series, results))
+        return decisions
+
+    def _act(self, coin, decision):
+        if isinstance(decision, Exception):
+            decision = {"error": str(decision)}
+        self.last_decisions[coin] = decision
+        feed.hub.publish(coin, "decision", decision)
+        if "error" in decision:
+            self.stats["errors"] += 1
+            logging.error(f"Error for {coin}: {decision['error']}")
+            return
+        logging.info(f"Trade Decision for {coin}: {decision}")
+        if decision["decision"] == "BUY":
+            logging.info(f"✅ Buying {coin} at ${decision['price']} - {decision.get('reason', '')}")
+        elif decision["decision"] == "SELL":
+            logging.info(f"✅ Selling {coin} at ${decision['price']} - {decision.get('reason', '')}")
+        else:
+            logging.info(f"🤝 Holding {coin}")
+
+    def _ensure_running(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet; the coin is picked up once one starts the engine
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        self._wake.set()
+
+    async def _run(self):
+        while len(self.scheduler):
+            self._wake.clear()
+            due = self.scheduler.pop_due()
+            if due:
+                try:
+                    await self.tick([coin for coin, _ in due])
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logging.error(f"Automation tick failed: {e}")
+                continue
+            next_due = self.scheduler.next_due()
+            if next_due is None:
+                break
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, next_due - time.monotonic()))
+            except asyncio.TimeoutError:
+                pass
+
+engine = AutomationEngine()
 
-        # Wait for 60 seconds before the next decision
-        await asyncio.sleep(60)
+async def start_automated_trading(crypto):
+    """Start automated trading for a specific cryptocurrency."""
+    engine.start(crypto)
 
 def stop_automated_trading(crypto):
     """Stop automated trading for a specific cryptocurrency."""
-    if not trading_states.get(crypto):
-        logging.warning(f"Automated trading for {crypto} is not running.")
-        return
-
-    trading_states[crypto] = False
-    logging.info(f"Automated trading stopped for {crypto}.")
+    engine.stop(crypto)
@@ -0,0 +1,133 @@
+import sys
+from backend.ai import batch
+from backend.ai.strategy import calculate_stop_loss_and_take_profit, get_historical_prices
+from backend.utils import lazy
+
+np = lazy.LazyModule("numpy")
+
+# -------------------------------
+# Vectorized backtester for the live rules
+# -------------------------------
+# Signals come from the same rule cascade ``make_trade_decision`` applies,
+# evaluated at every bar on causal indicators in one vectorized pass. The
+# strategy is long-only: a BUY signal opens a position on the next bar, and it
+# closes on the next bar after a SELL signal, or as soon as price reaches the
+# stop-loss / take-profit levels ``calculate_stop_loss_and_take_profit`` gives
+# for the entry price. Only the trade loop is in Python, and each trade's exit
+# is found with one array search, so the cost is linear in bars.
+
+def _next_true(mask):
+    """For each index, the first index at or after it where ``mask`` is True (len(mask) if none)."""
+    n = len(mask)
+    positions = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(positions[::-1])[::-1]
+
+def backtest(prices, stop_loss_percent=5, take_profit_percent=10, fee_percent=0.0, initial_capital=1000.0,
+             rsi_window=14, bollinger_window=20, adx_threshold=25):
+    """
+    Replay a price series through the trading rules.
+    :param prices: 1-D array of prices, oldest first.
+    :param stop_loss_percent: Stop-loss distance below the entry price.
+    :param take_profit_percent: Take-profit distance above the entry price.
+    :param fee_percent: Fee charged on each fill, as a percentage of notional.
+    :param initial_capital: Starting equity.
+    :param rsi_window: RSI lookback used by the rules.
+    :param bollinger_window: Bollinger Bands lookback used by the rules.
+    :param adx_threshold: Minimum ADX for the RSI/MACD rules to fire.
+    :return: Dict with ``trades`` (list of dicts), ``equity`` (array per bar) and ``stats``.
+    """
+    prices = np.asarray(prices, dtype=float)
+    indicators = batch.compute_indicators(
+        prices[None, :], sma_windows=(), rsi_window=rsi_window, bollinger_window=bollinger_window
+    )
+    values = {name: column[0] for name, column in indicators.items()}
+    decisions, _ = batch.rule_cascade(values, stop_loss_percent, take_profit_percent, adx_threshold)
+    return simulate(prices, decisions, stop_loss_percent, take_profit_percent, fee_percent, initial_capital)
+
+def simulate(prices, decisions, stop_loss_percent=5, take_profit_percent=10, fee_percent=0.0, initial_capital=1000.0):
+    """
+    Trade a price series on precomputed per-bar decisions.
+    :param prices: 1-D array of prices, oldest first.
+    :param decisions: Per-bar "BUY" / "SELL" / "HOLD" array aligned with ``prices``.
+    :return: Same result dict as ``backtest``.
+    """
+    n = len(prices)
+    next_buy = _next_true(decisions == "BUY")
+    next_sell = _next_true(decisions == "SELL")
+
+    trades = []
+    signal = next_buy[0] if n else 0
+    while signal < n - 1:
+        entry = signal + 1
+        entry_price = float(prices[entry])
+        stop_loss, take_profit = calculate_stop_loss_and_take_profit(entry_price, stop_loss_percent, take_profit_percent)
+
+        sell = next_sell[entry]
+        exit_bar = min(sell + 1, n - 1)
+        window = prices[entry + 1:exit_bar + 1]
+        hits = np.flatnonzero((window <= stop_loss) | (window >= take_profit))
+        if hits.size:
+            exit_bar = entry + 1 + int(hits[0])
+            reason = "Stop-loss triggered" if prices[exit_bar] <= stop_loss else "Take-profit triggered"
+        else:
+            # A SELL on the last bar has no next bar to fill on; it still closes at that bar's price.
+            reason = "Signal" if sell < n else "End of data"
+
+        exit_price = float(prices[exit_bar])
+        trades.append({
+            "entry_bar": int(entry),
+            "exit_bar": int(exit_bar),
+            "entry_price": round(entry_price, 6),
+            "exit_price": round(exit_price, 6),
+            "return_pct": round((exit_price / entry_price - 1) * 100, 6),
+            "reason": reason,
+        })
+        if exit_bar >= n - 1:
+            break
+        signal = next_buy[exit_bar]
+
+    # Equity: hold the bar-to-bar return while long, pay fees on each fill.
+    position = np.zeros(n + 1)
+    fills = np.zeros(n)
+    for trade in trades:
+        position[trade["entry_bar"] + 1] += 1
+        position[trade["exit_bar"] + 1] -= 1
+        fills[trade["entry_bar"]] += 1
+        fills[trade["exit_bar"]] += 1
+    position = np.cumsum(position)[:n]
+    bar_returns = np.zeros(n)
+    if n > 1:
+        bar_returns[1:] = prices[1:] / prices[:-1] - 1
+    growth = (1 + position * bar_returns) * (1 - fills * fee_percent / 100)
+    equity = initial_capital * np.cumprod(growth)
+    # Each fill trades the whole position, i.e. the bar's equity before that fill's fee.
+    traded = fills * equity / (1 - fills * fee_percent / 100)
+
+    returns = np.array([t["return_pct"] for t in trades])
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if n else np.zeros(0)
+    final_equity = float(equity[-1]) if n else initial_capital
+    stats = {
+        "bars": n,
+        "trades": len(trades),
+        "pnl": round(final_equity - initial_capital, 6),
+        "return_pct": round((final_equity / initial_capital - 1) * 100, 6),
+        "max_drawdown_pct": round(float(drawdown.min()) * 100, 6) if n else 0.0,
+        "win_rate": round(float((returns > 0).mean()), 6) if len(trades) else 0.0,
+        "exposure": round(float(position.mean()), 6) if n else 0.0,
+        # Traded notional (both legs) relative to average equity.
+        "turnover": round(float(traded.sum() / equity.mean()), 6) if n else 0.0,
+    }
+    return {"trades": trades, "equity": equity, "stats": stats}
+
+def backtest_coin(coin_id: str, days: int = 90, **kwargs):
+    """Backtest the rules on a coin's stored history."""
+    series = get_historical_prices(coin_id, days=days)
+    if series is None or series.empty:
+        return {"error": "No price data available"}
+    return backtest(series.prices, **kwargs)
+
+if __name__ == "__main__":
+    coin = sys.argv[1] if len(sys.argv) > 1 else "bitcoin"
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+    result = backtest_coin(coin, days=days)
+    print(result.get("stats", result))
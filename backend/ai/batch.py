@@ -0,0 +1,239 @@
+from backend.utils import lazy, metrics
+
+np = lazy.LazyModule("numpy")
+pd = lazy.LazyModule("pandas")
+
+# -------------------------------
+# Cross-coin batch indicators
+# -------------------------------
+# Every function takes a (coins x time) price matrix. Rows may be left-padded
+# with NaN when coins have different history lengths; each row produces the
+# same values the per-coin ``calculate_*`` functions give on its own series.
+# Recursive indicators walk the time axis once with every coin updated per
+# step, so the cost grows with history length, not with the number of coins.
+
+def stack_prices(series_list):
+    """Right-align price series of different lengths into a NaN-padded (coins x time) matrix."""
+    length = max((len(s) for s in series_list), default=0)
+    matrix = np.full((len(series_list), length), np.nan)
+    for row, series in enumerate(series_list):
+        if len(series):
+            matrix[row, length - len(series):] = series
+    return matrix
+
+def _recursive_mean(values, alpha, seed=1, min_periods=1):
+    """
+    Row-wise ``ewm(alpha, adjust=False)`` that starts at each row's first valid value.
+    With ``seed > 1`` the recursion starts from the mean of the first ``seed`` values
+    (Wilder smoothing as ta computes it for ADX).
+    """
+    rows, length = values.shape
+    # Long histories for a few coins (e.g. a backtest) are cheaper in pandas'
+    # compiled per-column ewm; wide matrices are cheaper walked one time step at a time.
+    if length > rows * 32:
+        return _recursive_mean_columns(values, alpha, seed, min_periods)
+    return _recursive_mean_walk(values, alpha, seed, min_periods)
+
+def _recursive_mean_walk(values, alpha, seed, min_periods):
+    """``_recursive_mean`` as one pass over time updating every coin per step."""
+    rows, length = values.shape
+    # Walk a time-major copy so each step touches one contiguous slice.
+    columns = np.ascontiguousarray(values.T)
+    out = np.full((length, rows), np.nan)
+    state = np.full(rows, np.nan)
+    total = np.zeros(rows)
+    count = np.zeros(rows, dtype=np.int64)
+    ready = max(seed, min_periods)
+    for t in range(length):
+        column = columns[t]
+        valid = column == column
+        count += valid
+        if seed > 1:
+            np.add(total, column, out=total, where=valid & (count <= seed))
+            starting = valid & (count == seed)
+            start_value = total / seed
+        else:
+            starting = valid & (count == 1)
+            start_value = column
+        stepped = state + alpha * (column - state)
+        np.copyto(state, stepped, where=valid & (count > seed))
+        np.copyto(state, start_value, where=starting)
+        np.copyto(out[t], state, where=count >= ready)
+    return out.T
+
+def _recursive_mean_columns(values, alpha, seed, min_periods):
+    """Same result as ``_recursive_mean`` using pandas' ewm on each coin's column."""
+    if seed > 1:
+        # Blank everything before each row's seed point and put the seed mean there;
+        # ewm then starts its recursion from that value.
+        values = values.copy()
+        for row in values:
+            valid = np.flatnonzero(~np.isnan(row))
+            if len(valid) < seed:
+                row[:] = np.nan
+                continue
+            start = valid[seed - 1]
+            row[start] = row[valid[:seed]].mean()
+            row[:start] = np.nan
+        min_periods = max(1, min_periods - seed + 1)
+    frame = pd.DataFrame(values.T)
+    return frame.ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean().to_numpy().T
+
+def _window_sum(values, window):
+    """Trailing-window sums built from ``window`` shifted slices (no cumulative drift)."""
+    total = values[:, :values.shape[1] - window + 1].copy()
+    for k in range(1, window):
+        total += values[:, k:values.shape[1] - window + 1 + k]
+    return total
+
+def _rolling_mean(values, window):
+    """Trailing mean; NaN until the window is full of valid values."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        out[:, window - 1:] = _window_sum(values, window) / window
+    return out
+
+def _rolling_std(values, window, mean):
+    """Trailing population standard deviation around a precomputed rolling mean."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        centre = mean[:, window - 1:]
+        squares = np.zeros(centre.shape)
+        for k in range(window):
+            deviation = values[:, k:values.shape[1] - window + 1 + k] - centre
+            squares += deviation * deviation
+        out[:, window - 1:] = np.sqrt(squares / window)
+    return out
+
+def _diff(values):
+    out = np.full(values.shape, np.nan)
+    out[:, 1:] = values[:, 1:] - values[:, :-1]
+    return out
+
+def sma(prices, window=5):
+    return _rolling_mean(prices, window)
+
+def rsi(prices, window=14):
+    diff = _diff(prices)
+    # ta treats the first bar's missing move as 0; the padding stays NaN.
+    padding = np.isnan(prices)
+    up = np.where(padding, np.nan, np.where(diff > 0, diff, 0.0))
+    down = np.where(padding, np.nan, np.where(diff < 0, -diff, 0.0))
+    ema_up = _recursive_mean(up, 1 / window, min_periods=window)
+    ema_down = _recursive_mean(down, 1 / window, min_periods=window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100 - 100 / (1 + ema_up / ema_down)
+    return np.where(ema_down == 0, 100.0, values)
+
+def macd(prices, fast=12, slow=26, signal=9):
+    ema_fast = _recursive_mean(prices, 2 / (fast + 1), min_periods=fast)
+    ema_slow = _recursive_mean(prices, 2 / (slow + 1), min_periods=slow)
+    line = ema_fast - ema_slow
+    return line, _recursive_mean(line, 2 / (signal + 1), min_periods=signal)
+
+def bollinger_bands(prices, window=20, window_dev=2):
+    mean = _rolling_mean(prices, window)
+    std = _rolling_std(prices, window, mean)
+    return mean + window_dev * std, mean - window_dev * std
+
+def adx(prices, window=14):
+    diff = _diff(prices)
+    with np.errstate(invalid="ignore"):
+        pos = np.where(diff > 0, diff, np.where(np.isnan(diff), np.nan, 0.0))
+        neg = np.where(diff < 0, -diff, np.where(np.isnan(diff), np.nan, 0.0))
+    tr, pos, neg = (_recursive_mean(v, 1 / window, seed=window) for v in (np.abs(diff), pos, neg))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        di_pos = np.where(tr == 0, 0.0, 100 * pos / tr)
+        di_neg = np.where(tr == 0, 0.0, 100 * neg / tr)
+        total = di_pos + di_neg
+        dx = np.where(total == 0, 0.0, 100 * np.abs(di_pos - di_neg) / total)
+    smoothed = _recursive_mean(dx, 1 / window, seed=window)
+    # ta reports 0 (not NaN) until the first full DX window is available.
+    return np.where(np.isnan(prices), np.nan, np.nan_to_num(smoothed, nan=0.0))
+
+def compute_indicators(prices, tail: int = None, sma_windows=(5, 10), rsi_window=14, bollinger_window=20):
+    """
+    Compute every indicator the strategy uses for all coins at once.
+    :param prices: (coins x time) array of prices, NaN-padded on the left.
+    :param tail: Only return the last ``tail`` time steps (windowed indicators then skip older data).
+    :param sma_windows: SMA windows to compute; each becomes an ``SMA_<window>`` entry.
+    :param rsi_window: RSI lookback.
+    :param bollinger_window: Bollinger Bands lookback.
+    :return: Dict of (coins x time) arrays keyed like the DataFrame columns.
+    """
+    prices = np.asarray(prices, dtype=float)
+
+    def windowed(window):
+        return prices if tail is None else prices[:, -(tail + window - 1):]
+
+    columns = {"price": prices}
+    with metrics.stage("indicator_sma"):
+        for window in sma_windows:
+            columns[f"SMA_{window}"] = sma(windowed(window), window)
+    with metrics.stage("indicator_rsi"):
+        columns["RSI"] = rsi(prices, rsi_window)
+    with metrics.stage("indicator_macd"):
+        columns["MACD"], columns["MACD_Signal"] = macd(prices)
+    with metrics.stage("indicator_bollinger"):
+        columns["BB_High"], columns["BB_Low"] = bollinger_bands(windowed(bollinger_window), bollinger_window)
+    with metrics.stage("indicator_adx"):
+        columns["ADX"] = adx(prices)
+    if tail is not None:
+        columns = {name: values[:, -tail:] for name, values in columns.items()}
+    return {name: np.round(values, 6) for name, values in columns.items()}
+
+# -------------------------------
+# Cross-coin decision cascade
+# -------------------------------
+def rule_cascade(values, stop_loss_percent=5, take_profit_percent=10, adx_threshold=25):
+    """
+    Evaluate the ``decide`` rule cascade element-wise on indicator arrays of any shape.
+    :return: ``(decisions, reasons)`` string arrays shaped like the inputs.
+    """
+    price = values["price"]
+    stop_loss = np.round(price * (1 - stop_loss_percent / 100), 6)
+    take_profit = np.round(price * (1 + take_profit_percent / 100), 6)
+
+    trending = values["ADX"] > adx_threshold
+    conditions = [
+        (values["RSI"] < 30) & (values["MACD"] > values["MACD_Signal"]) & trending,
+        (values["RSI"] > 70) & (values["MACD"] < values["MACD_Signal"]) & trending,
+        price < values["BB_Low"],
+        price > values["BB_High"],
+        price <= stop_loss,
+        price >= take_profit,
+    ]
+    decisions = np.select(conditions, ["BUY", "SELL", "BUY", "SELL", "SELL", "SELL"], "HOLD")
+    reasons = np.select(conditions, ["", "", "", "", "Stop-loss triggered", "Take-profit triggered"], "")
+    return decisions, reasons
+
+def make_trade_decisions(prices, stop_loss_percent=5, take_profit_percent=10, adx_threshold=25,
+                         rsi_window=14, bollinger_window=20):
+    """
+    Run the ``make_trade_decision`` rule cascade for every coin in one pass.
+    The thresholds may be scalars or per-coin arrays.
+    :return: ``(decisions, reasons, latest)`` where decisions/reasons are per-coin
+             string arrays and latest maps indicator names to per-coin values.
+    """
+    indicators = compute_indicators(prices, tail=1, rsi_window=rsi_window, bollinger_window=bollinger_window)
+    latest = {name: values[:, -1] for name, values in indicators.items()}
+    with metrics.stage("decision"):
+        decisions, reasons = rule_cascade(
+            latest, np.asarray(stop_loss_percent), np.asarray(take_profit_percent), np.asarray(adx_threshold)
+        )
+    return decisions, reasons, latest
+
+def trade_decisions(prices, **params):
+    """Per-coin decision dicts in the same shape ``make_trade_decision`` returns."""
+    decisions, reasons, latest = make_trade_decisions(prices, **params)
+    results = []
+    for i, decision in enumerate(decisions):
+        result = {"decision": str(decision), "price": float(latest["price"][i]), "RSI": float(latest["RSI"][i])}
+        if reasons[i]:
+            result["reason"] = str(reasons[i])
+        results.append(result)
+    return results
+
+def decide_series(series_list):
+    """Decision dicts for a list of per-coin price arrays of any lengths."""
+    return trade_decisions(stack_prices(series_list))
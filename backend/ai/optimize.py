@@ -0,0 +1,197 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from backend.ai import batch
+from backend.ai.backtest import simulate
+from backend.ai.scheduler import DEFAULT_STRATEGY
+from backend.utils import lazy
+
+np = lazy.LazyModule("numpy")
+
+# -------------------------------
+# Strategy parameter sweep
+# -------------------------------
+# Parameters use the same names ``/api/trading/applyStrategy`` accepts.
+# smaWindow is accepted for symmetry, but SMA is not part of the rule cascade,
+# so it never changes the trades. Defaults are the scheduler's (tradeFrequency does not apply to a backtest).
+DEFAULT_PARAMS = {name: value for name, value in DEFAULT_STRATEGY.items() if name != "tradeFrequency"}
+# Largest sweep one request may ask for; bigger grids or samples are rejected.
+MAX_COMBINATIONS = int(os.getenv("HODLBOT_MAX_SWEEP_COMBINATIONS", "20000"))
+# Bounds on the histories one sweep request loads.
+MAX_COINS = int(os.getenv("HODLBOT_MAX_SWEEP_COINS", "50"))
+MAX_DAYS = 365
+
+# Parameters that change the indicator arrays; combos sharing them share one indicator pass.
+INDICATOR_PARAMS = ("rsiWindow", "bollingerWindow")
+
+def expand_grid(grid: dict):
+    """Cartesian product of ``{param: [values]}``; unspecified params keep their defaults."""
+    unknown = set(grid) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+    names = list(grid)
+    total = 1
+    for name in names:
+        total *= len(grid[name])
+    if total > MAX_COMBINATIONS:
+        raise ValueError(f"Grid has {total} combinations; the limit is {MAX_COMBINATIONS}.")
+    return [
+        {**DEFAULT_PARAMS, **dict(zip(names, values))}
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+def sample_random(space: dict, samples: int, seed: int = None):
+    """
+    Draw ``samples`` combos from ``{param: [low, high]}`` ranges.
+    Integer bounds give integer draws; float bounds give uniform floats.
+    """
+    unknown = set(space) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+    if samples > MAX_COMBINATIONS:
+        raise ValueError(f"{samples} samples requested; the limit is {MAX_COMBINATIONS}.")
+    rng = random.Random(seed)
+    combos = []
+    for _ in range(samples):
+        combo = dict(DEFAULT_PARAMS)
+        for name, (low, high) in space.items():
+            if isinstance(low, int) and isinstance(high, int):
+                combo[name] = rng.randint(low, high)
+            else:
+                combo[name] = round(rng.uniform(low, high), 4)
+        combos.append(combo)
+    return combos
+
+# -------------------------------
+# Worker side
+# -------------------------------
+_worker = {}
+
+def _attach(name: str, shape, dtype: str):
+    """Pool initializer: map the shared price matrix instead of receiving a pickled copy."""
+    # Workers share the parent's resource tracker; only the parent unlinks the segment.
+    shm = shared_memory.SharedMemory(name=name)
+    _worker["shm"] = shm
+    _worker["prices"] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+def _valid_rows(prices):
+    """Slice of each row that holds real prices (rows are left-padded with NaN)."""
+    starts = np.argmax(~np.isnan(prices), axis=1)
+    return [int(start) for start in starts]
+
+def evaluate(prices, combos):
+    """
+    Backtest every combo on every coin row of ``prices``.
+    All combos must share the same indicator parameters.
+    :return: One summary dict per combo.
+    """
+    first = combos[0]
+    indicators = batch.compute_indicators(
+        prices, sma_windows=(), rsi_window=int(first["rsiWindow"]), bollinger_window=int(first["bollingerWindow"])
+    )
+    starts = _valid_rows(prices)
+    results = []
+    for combo in combos:
+        decisions, _ = batch.rule_cascade(indicators, combo["maxLoss"], combo["profitThreshold"], combo["adxThreshold"])
+        stats = [
+            simulate(prices[row, start:], decisions[row, start:], combo["maxLoss"], combo["profitThreshold"])["stats"]
+            for row, start in enumerate(starts)
+        ]
+        trades = sum(s["trades"] for s in stats)
+        results.append({
+            "params": combo,
+            "mean_return_pct": round(float(np.mean([s["return_pct"] for s in stats])), 6),
+            "worst_drawdown_pct": round(float(min(s["max_drawdown_pct"] for s in stats)), 6),
+            "win_rate": round(sum(s["win_rate"] * s["trades"] for s in stats) / trades, 6) if trades else 0.0,
+            "trades": trades,
+        })
+    return results
+
+def _evaluate_shared(combos):
+    return evaluate(_worker["prices"], combos)
+
+# -------------------------------
+# Driver
+# -------------------------------
+def _tasks(combos, workers: int):
+    """Group combos by indicator parameters, then split groups so every worker has work."""
+    groups = defaultdict(list)
+    for combo in combos:
+        groups[tuple(combo[name] for name in INDICATOR_PARAMS)].append(combo)
+    target = max(1, len(combos) // (workers * 4))
+    for group in groups.values():
+        for i in range(0, len(group), target):
+            yield group[i:i + target]
+
+def run_sweep(prices, combos, workers: int = None, rank_by: str = "mean_return_pct", top: int = None):
+    """
+    Evaluate parameter combos over a (coins x time) price matrix on a process pool.
+    The matrix is placed in shared memory once; workers map it read-only.
+    :return: Result dicts sorted best-first by ``rank_by``, each with a ``rank``.
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    # Never more processes than cores, whatever the caller asks for.
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(int(workers or cpus), cpus))
+    results = []
+    if workers == 1:
+        for task in _tasks(combos, 1):
+            results.extend(evaluate(prices, task))
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(prices.nbytes, 1))
+        try:
+            np.ndarray(prices.shape, dtype=prices.dtype, buffer=shm.buf)[:] = prices
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_attach, initargs=(shm.name, prices.shape, prices.dtype.str)
+            ) as pool:
+                for chunk in pool.map(_evaluate_shared, _tasks(combos, workers)):
+                    results.extend(chunk)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    results.sort(key=lambda r: r[rank_by], reverse=True)
+    for rank, result in enumerate(results, start=1):
+        result["rank"] = rank
+    return results[:top] if top else results
+
+def _parse_grid(items):
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        grid[name] = [float(v) if "." in v else int(v) for v in values.split(",")]
+    return grid
+
+if __name__ == "__main__":
+    from backend.ai.strategy import get_historical_prices
+
+    parser = argparse.ArgumentParser(description="Rank strategy parameters by backtesting them on stored histories.")
+    parser.add_argument("coins", nargs="+")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--grid", nargs="*", default=[], help="param=v1,v2,... (e.g. rsiWindow=7,14,21)")
+    parser.add_argument("--random", nargs="*", default=[], help="param=low,high for random search")
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    histories = [get_historical_prices(coin, days=args.days) for coin in args.coins]
+    series = [h.prices for h in histories if h is not None and not h.empty]
+    if args.random:
+        combos = sample_random({k: tuple(v) for k, v in _parse_grid(args.random).items()}, args.samples, args.seed)
+    else:
+        combos = expand_grid(_parse_grid(args.grid))
+
+    start = time.perf_counter()
+    ranked = run_sweep(batch.stack_prices(series), combos, workers=args.workers, top=args.top)
+    print(f"{len(combos)} combinations x {len(series)} coins in {time.perf_counter() - start:.2f}s")
+    for result in ranked:
+        print(f"#{result['rank']:>3} return {result['mean_return_pct']:>9.3f}%  "
+              f"drawdown {result['worst_drawdown_pct']:>8.3f}%  win {result['win_rate']:.2f}  "
+              f"trades {result['trades']:>5}  {result['params']}")
@@ -0,0 +1,153 @@
+import heapq
+import time
+from collections import namedtuple
+
+# -------------------------------
+# Per-coin strategy scheduler
+# -------------------------------
+# Strategies are stored once per coin as a small tuple and scheduled on a single
+# min-heap of (due, version, coin) entries, so 10,000+ registrations cost one
+# heap entry each and no sleeping task. Re-registering or removing a coin bumps
+# its version; stale heap entries are skipped when they surface and the heap is
+# compacted once they outnumber the live ones.
+
+Strategy = namedtuple(
+    "Strategy",
+    "profit_threshold max_loss trade_frequency sma_window rsi_window bollinger_window adx_threshold",
+)
+
+# Strategy defaults; applyStrategy, the automation engine and the optimizer all use these.
+DEFAULT_STRATEGY = {
+    "profitThreshold": 5,
+    "maxLoss": 10,
+    "tradeFrequency": 15,  # minutes
+    "smaWindow": 5,
+    "rsiWindow": 14,
+    "bollingerWindow": 20,
+    "adxThreshold": 25,
+}
+
+def parse_strategy(params: dict = None):
+    """Build a Strategy from applyStrategy-style camelCase params, filling in defaults."""
+    merged = {**DEFAULT_STRATEGY, **(params or {})}
+    strategy = Strategy(
+        profit_threshold=float(merged["profitThreshold"]),
+        max_loss=float(merged["maxLoss"]),
+        trade_frequency=float(merged["tradeFrequency"]),
+        sma_window=int(merged["smaWindow"]),
+        rsi_window=int(merged["rsiWindow"]),
+        bollinger_window=int(merged["bollingerWindow"]),
+        adx_threshold=float(merged["adxThreshold"]),
+    )
+    if strategy.trade_frequency <= 0:
+        raise ValueError("tradeFrequency must be positive.")
+    if strategy.rsi_window < 2 or strategy.bollinger_window < 2:
+        raise ValueError("Indicator windows must be at least 2.")
+    return strategy
+
+class StrategyScheduler:
+    """
+    Fires each registered strategy every ``trade_frequency`` minutes.
+
+    ``pop_due`` returns every strategy due now, plus those falling due within
+    ``batch_window`` seconds, so near-simultaneous strategies are evaluated in
+    one batch. Schedules are fixed-rate: a strategy fired late keeps its
+    original cadence, and whole periods that passed unfired are counted as
+    missed deadlines instead of being replayed.
+    """
+
+    def __init__(self, batch_window: float = 1.0, clock=time.monotonic):
+        self.batch_window = batch_window
+        self.clock = clock
+        self._strategies = {}  # coin -> (Strategy, version)
+        self._heap = []
+        self._version = 0
+        self.stats = {
+            "fired": 0,
+            "batches": 0,
+            "missed_deadlines": 0,
+            "last_lag_seconds": 0.0,
+            "max_lag_seconds": 0.0,
+            "total_lag_seconds": 0.0,
+        }
+
+    def __len__(self):
+        return len(self._strategies)
+
+    def __contains__(self, coin):
+        return coin in self._strategies
+
+    def get(self, coin: str):
+        entry = self._strategies.get(coin)
+        return entry[0] if entry else None
+
+    def register(self, coin: str, strategy: Strategy, first_due: float = None):
+        """Add or replace a coin's strategy; it first fires at ``first_due`` (default: now)."""
+        self._version += 1
+        self._strategies[coin] = (strategy, self._version)
+        heapq.heappush(self._heap, (self.clock() if first_due is None else first_due, self._version, coin))
+        self._compact()
+
+    def unregister(self, coin: str):
+        if self._strategies.pop(coin, None) is not None:
+            self._compact()
+
+    def next_due(self):
+        """When the earliest live strategy falls due, or None if nothing is registered."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float = None):
+        """Take every strategy due by ``now`` (plus the batch window) and schedule its next run."""
+        now = self.clock() if now is None else now
+        due = []
+        rescheduled = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now + self.batch_window:
+            when, version, coin = heapq.heappop(self._heap)
+            strategy, live_version = self._strategies.get(coin, (None, None))
+            if version != live_version:
+                continue
+            due.append((coin, strategy))
+            self._record_lag(max(0.0, now - when))
+
+            period = strategy.trade_frequency * 60
+            missed = int((now - when) // period) if now > when else 0
+            self.stats["missed_deadlines"] += missed
+            rescheduled.append((when + (missed + 1) * period, version, coin))
+            self._drop_stale()
+        # Pushed after the loop so a very short period cannot fire twice in one batch.
+        for entry in rescheduled:
+            heapq.heappush(self._heap, entry)
+        if due:
+            self.stats["fired"] += len(due)
+            self.stats["batches"] += 1
+        return due
+
+    def metrics(self):
+        fired = self.stats["fired"]
+        return {
+            "registered": len(self._strategies),
+            "heap_entries": len(self._heap),
+            **{k: round(v, 6) if isinstance(v, float) else v for k, v in self.stats.items()},
+            "mean_lag_seconds": round(self.stats["total_lag_seconds"] / fired, 6) if fired else 0.0,
+            "mean_batch_size": round(fired / self.stats["batches"], 3) if self.stats["batches"] else 0.0,
+        }
+
+    def _record_lag(self, lag):
+        self.stats["last_lag_seconds"] = lag
+        self.stats["max_lag_seconds"] = max(self.stats["max_lag_seconds"], lag)
+        self.stats["total_lag_seconds"] += lag
+
+    def _drop_stale(self):
+        while self._heap:
+            _, version, coin = self._heap[0]
+            entry = self._strategies.get(coin)
+            if entry is not None and entry[1] == version:
+                return
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._strategies) + 64:
+            self._heap = [e for e in self._heap if self._strategies.get(e[2], (None, None))[1] == e[1]]
+            heapq.heapify(self._heap)
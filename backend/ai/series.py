@@ -0,0 +1,82 @@
+from backend.ai import batch
+from backend.utils import lazy
+
+np = lazy.LazyModule("numpy")
+pd = lazy.LazyModule("pandas")
+
+# -------------------------------
+# Compact price history
+# -------------------------------
+# A coin's history used to be a DataFrame that make_trade_decision widened with
+# ten indicator columns before reading only its last row. PriceSeries keeps
+# just two typed arrays (16 bytes per point) and computes indicators on demand
+# for the tail that is asked for, so long histories for thousands of coins fit
+# in one worker's decision cache.
+
+class PriceSeries:
+    """
+    Read-only price history for one coin. The inputs are copied, so the series never
+    aliases a caller's array (such as a view over the price store's memory map).
+    :param timestamps: Epoch milliseconds, ascending (int64).
+    :param prices: One price per timestamp (float64 unless a float array is given).
+    """
+
+    __slots__ = ("timestamps", "prices")
+
+    def __init__(self, timestamps, prices):
+        timestamps = np.array(timestamps, dtype=np.int64)
+        prices = np.array(prices)
+        if prices.dtype.kind != "f":
+            prices = prices.astype(np.float64)
+        if timestamps.shape != prices.shape or timestamps.ndim != 1:
+            raise ValueError("timestamps and prices must be 1-D arrays of the same length.")
+        # The series owns these copies and is shared through the decision cache, so freeze them.
+        timestamps.flags.writeable = False
+        prices.flags.writeable = False
+        self.timestamps = timestamps
+        self.prices = prices
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a DataFrame with a price column and an optional datetime ``timestamp`` column."""
+        if "timestamp" in df:
+            timestamps = df["timestamp"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        else:
+            timestamps = np.arange(len(df), dtype=np.int64)
+        return cls(timestamps, df["price"].to_numpy())
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __repr__(self):
+        return f"PriceSeries({len(self)} points, {self.nbytes} bytes)"
+
+    @property
+    def empty(self):
+        return len(self.prices) == 0
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.prices.nbytes
+
+    def tail(self, n: int):
+        """The last ``n`` points."""
+        start = max(0, len(self) - n)
+        return PriceSeries(self.timestamps[start:], self.prices[start:])
+
+    def indicators(self, tail: int = 1, **params):
+        """
+        Strategy indicators for the last ``tail`` points (see batch.compute_indicators).
+        Recursive indicators still walk the whole history; only the tail is kept.
+        :return: Dict of 1-D arrays keyed like the old DataFrame columns.
+        """
+        columns = batch.compute_indicators(self.prices[np.newaxis, :], tail=tail, **params)
+        return {name: values[0] for name, values in columns.items()}
+
+    def latest(self, **params):
+        """Indicator values at the most recent point, as plain floats (the input ``strategy.decide`` takes)."""
+        return {name: float(values[-1]) for name, values in self.indicators(tail=1, **params).items()}
+
+    def to_frame(self):
+        """A ``timestamp``/``price`` DataFrame, for code that still wants pandas."""
+        return pd.DataFrame({"timestamp": pd.to_datetime(self.timestamps, unit="ms"), "price": self.prices})
@@ -0,0 +1,153 @@
+import functools
+import os
+import time
+import zlib
+from backend.utils import lazy
+
+np = lazy.LazyModule("numpy")
+
+# -------------------------------
+# Synthetic market (simulation mode, load tests, benchmarks)
+# -------------------------------
+# Prices follow geometric Brownian motion with volatility regimes (each coin
+# switches between calm and turbulent periods) and rare jumps. Every random
+# component has its own stream, drawn in fixed-size chunks of bars, so a path
+# is a pure function of (seed, coin, bar): a longer path starts with exactly
+# the shorter one, and a coin's history never changes between calls. Regime
+# switches and jumps are drawn sparsely (only the bars where they happen),
+# so their cost does not grow with the size of the price matrix.
+
+SIM_SEED = int(os.getenv("HODLBOT_SIM_SEED", "42"))
+# Simulated histories start here (2025-01-01T00:00:00Z), one bar per ``bar_seconds``.
+SIM_EPOCH = 1_735_689_600
+SECONDS_PER_YEAR = 365 * 86_400
+
+class MarketSimulator:
+    """
+    Seeded GBM price generator.
+    :param volatility: Annualized volatility of the calm regime.
+    :param drift: Annualized drift of the log price (0 keeps the median price flat).
+    :param regimes: Volatility multipliers the regimes cycle through; ``(1.0,)`` disables switching.
+    :param regime_days: Mean length of a regime in days.
+    :param jump_intensity: Expected jumps per year; 0 disables jumps.
+    :param jump_mean: Mean log-size of a jump.
+    :param jump_std: Standard deviation of a jump's log-size.
+    :param bar_seconds: Bar length (3600 = hourly, like CoinGecko's 2-90 day charts).
+    :param chunk_bars: Bars generated per step; bounds temporary memory. Paths depend on it, so keep it fixed.
+    """
+
+    def __init__(self, seed: int = SIM_SEED, volatility: float = 0.45, drift: float = 0.0, regimes=(1.0, 1.8),
+                 regime_days: float = 7.0, jump_intensity: float = 12.0, jump_mean: float = -0.01,
+                 jump_std: float = 0.05, bar_seconds: int = 3600, chunk_bars: int = 8192):
+        self.seed = seed
+        self.volatility = volatility
+        self.drift = drift
+        self.regimes = tuple(regimes)
+        self.regime_switch_prob = min(1.0, bar_seconds / (regime_days * 86_400))
+        self.jump_prob = min(1.0, jump_intensity * bar_seconds / SECONDS_PER_YEAR)
+        self.jump_mean = jump_mean
+        self.jump_std = jump_std
+        self.bar_seconds = bar_seconds
+        self.chunk_bars = chunk_bars
+        self._cached_path = functools.lru_cache(maxsize=256)(self._coin_path)
+
+    def paths(self, start_prices, bars: int, dtype=None, seed: int = None):
+        """
+        Price paths for many coins at once.
+        :param start_prices: One starting price per coin.
+        :param bars: Bars per coin.
+        :param dtype: Output dtype (default float64; float32 halves the memory of very large runs).
+        :return: Array of shape ``(bars, coins)``.
+        """
+        sequence = np.random.SeedSequence(self.seed if seed is None else seed)
+        return self._generate(sequence, start_prices, bars, dtype)
+
+    def coin_path(self, coin_id: str, start_price: float, bars: int):
+        """One coin's path from ``SIM_EPOCH``; the same coin always gets the same path."""
+        return self._generate(self._coin_sequence(coin_id), [start_price], bars, None)[:, 0]
+
+    def bar_index(self, when: float = None):
+        """Index of the last bar that closed at or before ``when`` (default now)."""
+        return int(((time.time() if when is None else when) - SIM_EPOCH) // self.bar_seconds)
+
+    def history(self, coin_id: str, start_price: float, bars: int, end: float = None):
+        """
+        The last ``bars`` closes up to ``end`` (default now).
+        :return: ``(timestamps_ms, prices)`` arrays; shorter if the epoch is less than ``bars`` ago.
+        """
+        last = self.bar_index(end)
+        path = self._path(coin_id, start_price, last + 1)
+        first = max(0, last + 1 - bars)
+        timestamps = (SIM_EPOCH + np.arange(first, last + 1, dtype=np.int64) * self.bar_seconds) * 1000
+        return timestamps, path[first:last + 1]
+
+    def price(self, coin_id: str, start_price: float, when: float = None):
+        """Price at ``when`` (default now), interpolated between the surrounding bar closes."""
+        position = ((time.time() if when is None else when) - SIM_EPOCH) / self.bar_seconds
+        index = max(0, int(position))
+        path = self._path(coin_id, start_price, index + 2)
+        fraction = min(max(position - index, 0.0), 1.0)
+        return float(path[index] * (path[index + 1] / path[index]) ** fraction)
+
+    def _path(self, coin_id, start_price, bars):
+        # Round up so nearby calls share one cached path; prefixes are identical anyway.
+        return self._cached_path(coin_id, float(start_price), -(-bars // 1024) * 1024)
+
+    def _coin_path(self, coin_id, start_price, bars):
+        path = self.coin_path(coin_id, start_price, bars)
+        path.flags.writeable = False
+        return path
+
+    def _coin_sequence(self, coin_id):
+        return np.random.SeedSequence([self.seed, zlib.crc32(coin_id.encode())])
+
+    def _generate(self, sequence, start_prices, bars, dtype):
+        start_prices = np.asarray(start_prices, dtype=np.float64).reshape(-1)
+        if bars < 0:
+            raise ValueError("bars must be non-negative.")
+        if np.any(start_prices <= 0):
+            raise ValueError("Start prices must be positive.")
+        coins = len(start_prices)
+        shocks, switches, jumps = (np.random.default_rng(s) for s in sequence.spawn(3))
+        out = np.empty((bars, coins), dtype=dtype or np.float64)
+        dt = self.bar_seconds / SECONDS_PER_YEAR
+        vols = self.volatility * np.sqrt(dt) * np.asarray(self.regimes, dtype=np.float64)
+        log_price = np.log(start_prices)
+        segment = np.zeros(coins, dtype=np.int32)
+
+        for start in range(0, bars, self.chunk_bars):
+            n = min(self.chunk_bars, bars - start)
+            returns = shocks.standard_normal((n, coins))
+            if len(vols) > 1:
+                positions, keep = self._events(switches, self.regime_switch_prob, coins, n)
+                regime = np.zeros((n, coins), dtype=np.int32)
+                np.add.at(regime.reshape(-1), positions[keep], 1)
+                np.cumsum(regime, axis=0, out=regime)
+                regime += segment
+                segment = regime[-1].copy()
+                returns *= vols[regime % len(vols)]
+            else:
+                returns *= vols[0]
+            returns += self.drift * dt
+            if self.jump_prob > 0:
+                positions, keep = self._events(jumps, self.jump_prob, coins, n)
+                sizes = jumps.normal(self.jump_mean, self.jump_std, len(positions))
+                np.add.at(returns.reshape(-1), positions[keep], sizes[keep])
+            np.cumsum(returns, axis=0, out=returns)
+            returns += log_price
+            log_price = returns[-1].copy()
+            np.exp(returns, out=returns)
+            out[start:start + n] = returns
+        return out
+
+    def _events(self, rng, probability, coins, n):
+        """
+        Flat (bar, coin) positions of rare events in one chunk, and a mask of those in its first ``n`` bars.
+        Drawn for the whole chunk whatever ``n`` is, so a shorter path sees the same events.
+        """
+        size = self.chunk_bars * coins
+        positions = rng.integers(0, size, rng.binomial(size, probability))
+        return positions, positions < n * coins
+
+# Process-wide simulator used by simulation mode.
+simulator = MarketSimulator()
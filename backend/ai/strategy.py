@@ -1,18 +1,17 @@
-import random
-import pandas as pd
-import requests
+import logging
+import os
+import time
+from backend.ai.series import PriceSeries
+from backend.ai.simulator import simulator
+from backend.utils import http_client, lazy, memo, metrics, price_store, shared
+from backend.utils.coingecko import COINGECKO_BASE_URL
 
-# Validate 'ta' package before running
-try:
-    import ta
-    print("✅ 'ta' library imported successfully!")
-except ImportError:
-    raise ImportError("❌ ERROR: 'ta' package not found. Install with: pip install ta")
+# numpy, pandas, the 'ta' indicators and requests are imported on first use (see backend.utils.lazy).
+np = lazy.LazyModule("numpy")
+ta = lazy.LazyModule("ta", hint="❌ ERROR: 'ta' package not found. Install with: pip install ta")
+requests = lazy.LazyModule("requests")
 
-from fastapi import FastAPI, HTTPException, Body
-from fastapi.middleware.cors import CORSMiddleware
-
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
 # -------------------------------
 # Global Simulation Mode Flag
@@ -32,60 +31,109 @@ COIN_RANGES = {
 }
 
 # -------------------------------
-# Endpoints to toggle simulation mode
+# Simulation mode toggle
 # -------------------------------
-@app.post("/api/mode")
-async def set_mode(mode: str = Body(...)):
+def set_mode(mode: str):
     """Set the mode for live data or simulation."""
     global IS_SIMULATION_MODE
     if mode not in ["live", "simulation"]:
-        raise HTTPException(status_code=400, detail="Invalid mode. Use 'live' or 'simulation'.")
+        raise ValueError("Invalid mode. Use 'live' or 'simulation'.")
     IS_SIMULATION_MODE = (mode == "simulation")
+    # Also discards the decisions this worker published to the shared store.
+    decision_cache.invalidate()
     return {"mode": mode}
 
 # -------------------------------
 # Simulated historical prices generator
 # -------------------------------
 def generate_simulated_historical_prices(coin_id: str, days: int = 14):
-    """Generate a DataFrame with simulated historical price data for a given coin."""
+    """Simulated hourly history for a coin, from the seeded market simulator (same coin, same prices)."""
     coin = coin_id.lower()
     if coin not in COIN_RANGES:
         print(f"⚠️ Simulation: Invalid coin '{coin_id}'")
         return None
     low, high = COIN_RANGES[coin]
-    # Generate 'days' number of data points (daily data)
-    dates = pd.date_range(end=pd.Timestamp.now(), periods=days)
-    prices = [round(random.uniform(low, high), 6) for _ in range(days)]
-    df = pd.DataFrame({"timestamp": dates, "price": prices})
-    return df
+    timestamps, prices = simulator.history(coin, (low + high) / 2, bars=days * 86_400 // simulator.bar_seconds)
+    return PriceSeries(timestamps, np.round(prices, 6))
 
 # -------------------------------
-# Live historical prices fetcher (CoinGecko)
+# Live historical prices fetcher (CoinGecko + local store)
 # -------------------------------
-COINGECKO_API = "https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
+COINGECKO_API = COINGECKO_BASE_URL + "/coins/{coin_id}/market_chart"
+COINGECKO_API_RANGE = COINGECKO_BASE_URL + "/coins/{coin_id}/market_chart/range"
+
+# Stored history younger than this is served from disk without calling upstream.
+PRICE_REFRESH_MS = int(os.getenv("HODLBOT_PRICE_REFRESH", "300")) * 1000
+
+# Histories and decisions only change when new prices land, so they live as long as the stored data stays fresh.
+# Decisions are also published to the cross-worker store when one is configured.
+decision_cache = memo.MemoCache(ttl=PRICE_REFRESH_MS / 1000, name="decisions", shared=shared.store)
+
+def fetch_market_chart(coin_id: str, days: int = None, start_ms: int = None):
+    """
+    Fetch raw ``[timestamp_ms, price]`` points from CoinGecko.
+    Pass ``days`` for a full window or ``start_ms`` for only the points after a timestamp.
+    """
+    if start_ms is None:
+        url = COINGECKO_API.format(coin_id=coin_id)
+        params = {"vs_currency": "usd", "days": days}
+    else:
+        url = COINGECKO_API_RANGE.format(coin_id=coin_id)
+        params = {"vs_currency": "usd", "from": start_ms // 1000, "to": int(time.time()) + 1}
+    response = http_client.get(url, params=params, timeout=10, priority=http_client.BULK)
+    response.raise_for_status()
+    data = response.json()
+    if "prices" not in data:
+        raise ValueError(f"⚠️ ERROR: No valid price data for '{coin_id}'.")
+    return data["prices"]
+
+def sync_price_history(coin_id: str, days: int = 14):
+    """Bring the local store up to date for a coin, fetching only what it is missing."""
+    now_ms = int(time.time() * 1000)
+    since_ms = now_ms - days * 86_400_000
+    with price_store.store.lock(coin_id):
+        if not price_store.store.covers(coin_id, since_ms):
+            points = fetch_market_chart(coin_id, days=days)
+            if not points:
+                raise ValueError(f"⚠️ ERROR: No valid price data for '{coin_id}'.")
+            price_store.store.merge(coin_id, points, covered_from=since_ms)
+            return
+        last_ts = price_store.store.last_timestamp(coin_id)
+        if last_ts is None or now_ms - last_ts >= PRICE_REFRESH_MS:
+            price_store.store.append(coin_id, fetch_market_chart(coin_id, start_ms=last_ts or since_ms))
 
 def get_historical_prices(coin_id: str, days: int = 14):
-    """Fetch historical price data from CoinGecko (if live) or generate simulated data."""
+    """
+    Fetch historical prices from the local store (if live) or generate simulated data.
+    :return: A read-only PriceSeries (shared with other callers through the cache), or None.
+    """
+    return decision_cache.get_or_compute(
+        ("history", IS_SIMULATION_MODE, coin_id, days),
+        lambda: _load_historical_prices(coin_id, days),
+        cacheable=lambda series: series is not None and not series.empty,
+    )
+
+def _load_historical_prices(coin_id: str, days: int = 14):
     if IS_SIMULATION_MODE:
-        df = generate_simulated_historical_prices(coin_id, days=days)
-        if df is None or df.empty:
+        with metrics.stage("history_build"):
+            series = generate_simulated_historical_prices(coin_id, days=days)
+        if series is None or series.empty:
             print(f"⚠️ Simulation: No simulated price data for '{coin_id}'")
-        return df
+        return series
     else:
-        url = COINGECKO_API.format(coin_id=coin_id)
-        params = {"vs_currency": "usd", "days": days}
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            if "prices" not in data or not data["prices"]:
-                raise ValueError(f"⚠️ ERROR: No valid price data for '{coin_id}'.")
-            df = pd.DataFrame(data["prices"], columns=["timestamp", "price"])
-            df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-            df["price"] = df["price"].round(6)
-            if df.empty or df["price"].isnull().all():
+            with metrics.stage("history_sync"):
+                sync_price_history(coin_id, days=days)
+            with metrics.stage("history_build"):
+                timestamps, prices = price_store.store.read(
+                    coin_id, since_ms=int(time.time() * 1000) - days * 86_400_000
+                )
+                # PriceSeries copies out of the memory map: the cached series outlives this read,
+                # and append() may truncate or rewrite the tail of the mapped files.
+                series = PriceSeries(timestamps, np.round(prices, 6))
+            if series.empty or np.isnan(series.prices).all():
                 raise ValueError("⚠️ ERROR: Received empty or invalid data.")
-            return df
+            return series
         except requests.exceptions.RequestException as e:
             print(f"🚨 API ERROR: {e}")
             return None
@@ -114,10 +162,9 @@ def calculate_rsi(df, window=14):
 
 def calculate_macd(df):
     """Calculate MACD and Signal Line."""
-    macd = ta.trend.MACD(df["price"]).macd()
-    signal = ta.trend.MACD(df["price"]).macd_signal()
-    df["MACD"] = macd.round(6)
-    df["MACD_Signal"] = signal.round(6)
+    indicator = ta.trend.MACD(df["price"])
+    df["MACD"] = indicator.macd().round(6)
+    df["MACD_Signal"] = indicator.macd_signal().round(6)
     return df
 
 def calculate_bollinger_bands(df):
@@ -149,35 +196,49 @@ def calculate_stop_loss_and_take_profit(price, stop_loss_percent=5, take_profit_
 # -------------------------------
 # Decision Logic
 # -------------------------------
-def make_trade_decision(coin_id: str):
+def make_trade_decision(coin_id: str, days: int = 14, stop_loss_percent=5, take_profit_percent=10, adx_threshold=25):
     """AI trading decision based on SMA, RSI, MACD, Bollinger Bands, and Stop-Loss/Take-Profit."""
-    df = get_historical_prices(coin_id)
-    if df is None or df.empty:
+    decision = decision_cache.get_or_compute(
+        ("decision", IS_SIMULATION_MODE, coin_id, days, stop_loss_percent, take_profit_percent, adx_threshold),
+        lambda: _compute_trade_decision(coin_id, days, stop_loss_percent, take_profit_percent, adx_threshold),
+        cacheable=lambda decision: "error" not in decision,
+        shared=True,
+    )
+    return dict(decision)
+
+def _compute_trade_decision(coin_id, days, stop_loss_percent, take_profit_percent, adx_threshold):
+    series = get_historical_prices(coin_id, days=days)
+    if series is None or series.empty:
         print("⚠️ ERROR: No price data fetched!")
         return {"error": "No price data available"}
 
-    # Compute indicators
-    df = calculate_sma(df, window=5)
-    df = calculate_sma(df, window=10)
-    df = calculate_rsi(df)
-    df = calculate_macd(df)
-    df = calculate_bollinger_bands(df)
-    df = calculate_adx(df)
-
-    latest = df.iloc[-1]  # Most recent data
-    stop_loss_price, take_profit_price = calculate_stop_loss_and_take_profit(latest["price"])
-
-    # Debug: Show latest indicators
-    print(
-        f"🔍 Latest Price: {latest['price']:.6f}, RSI: {latest['RSI']:.2f}, "
-        f"MACD: {latest['MACD']:.6f}, Signal: {latest['MACD_Signal']:.6f}, "
-        f"BB High: {latest['BB_High']:.6f}, BB Low: {latest['BB_Low']:.6f}, ADX: {latest['ADX']:.2f}"
+    # Indicators are only kept for the most recent point.
+    latest = series.latest()
+
+    # Per-stage timings go to /metrics; the indicator dump is only formatted when debug logging is on.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "%s: price %.6f, RSI %.2f, MACD %.6f, signal %.6f, BB high %.6f, BB low %.6f, ADX %.2f", coin_id,
+            latest["price"], latest["RSI"], latest["MACD"], latest["MACD_Signal"],
+            latest["BB_High"], latest["BB_Low"], latest["ADX"],
+        )
+
+    with metrics.stage("decision"):
+        return decide(latest, stop_loss_percent, take_profit_percent, adx_threshold)
+
+def decide(latest, stop_loss_percent=5, take_profit_percent=10, adx_threshold=25):
+    """
+    Apply the trading rule cascade to the most recent indicator values.
+    :param latest: Mapping with price, RSI, MACD, MACD_Signal, BB_High, BB_Low and ADX.
+    :return: Decision dict as returned by make_trade_decision.
+    """
+    stop_loss_price, take_profit_price = calculate_stop_loss_and_take_profit(
+        latest["price"], stop_loss_percent, take_profit_percent
     )
 
-    # Decision logic
-    if latest["RSI"] < 30 and latest["MACD"] > latest["MACD_Signal"] and latest["ADX"] > 25:
+    if latest["RSI"] < 30 and latest["MACD"] > latest["MACD_Signal"] and latest["ADX"] > adx_threshold:
         return {"decision": "BUY", "price": round(latest["price"], 6), "RSI": round(latest["RSI"], 6)}
-    elif latest["RSI"] > 70 and latest["MACD"] < latest["MACD_Signal"] and latest["ADX"] > 25:
+    elif latest["RSI"] > 70 and latest["MACD"] < latest["MACD_Signal"] and latest["ADX"] > adx_threshold:
         return {"decision": "SELL", "price": round(latest["price"], 6), "RSI": round(latest["RSI"], 6)}
     elif latest["price"] < latest["BB_Low"]:
         return {"decision": "BUY", "price": round(latest["price"], 6), "RSI": round(latest["RSI"], 6)}
@@ -190,14 +251,6 @@ def make_trade_decision(coin_id: str):
     else:
         return {"decision": "HOLD", "price": round(latest["price"], 6), "RSI": round(latest["RSI"], 6)}
 
-# -------------------------------
-# Endpoint for Trade Decision
-# -------------------------------
-@app.get("/api/trading/decision/{coin_id}")
-async def get_decision(coin_id: str):
-    """Get the trade decision based on the current mode (live or simulation)."""
-    return make_trade_decision(coin_id)
-
 # -------------------------------
 # For testing via command line
 # -------------------------------
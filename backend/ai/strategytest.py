@@ -1,10 +1,10 @@
-import random
 import pandas as pd
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
 
 # Use an absolute import for the live strategy logic.
 # Adjust the import path as per your project structure.
+from backend.ai.simulator import simulator
 from backend.ai.strategy import make_trade_decision
 
 app = FastAPI()
@@ -49,9 +49,8 @@ def generate_historical_prices(coin_id, num_points=50):
     if coin_id not in COIN_RANGES:
         raise ValueError(f"Invalid coin: {coin_id}")
     min_price, max_price = COIN_RANGES[coin_id]
-    prices = [round(random.uniform(min_price, max_price), 2) for _ in range(num_points)]
-    timestamps = pd.date_range(end=pd.Timestamp.now(), periods=num_points)
-    return pd.DataFrame({"timestamp": timestamps, "price": prices})
+    timestamps, prices = simulator.history(coin_id, (min_price + max_price) / 2, bars=num_points)
+    return pd.DataFrame({"timestamp": pd.to_datetime(timestamps, unit="ms"), "price": prices.round(2)})
 
 # Trading indicator calculations
 def calculate_sma(df, window=5):
@@ -0,0 +1,316 @@
+import logging
+import math
+import threading
+import time
+from collections import deque
+from backend.ai import strategy
+from backend.utils import lazy, price_store
+
+requests = lazy.LazyModule("requests")
+
+logger = logging.getLogger(__name__)
+
+NAN = float("nan")
+
+# -------------------------------
+# Rolling window with exact running sums
+# -------------------------------
+class RollingWindow:
+    """
+    Fixed-size window with running mean and population variance.
+
+    Sums are kept relative to an anchor price to avoid cancellation on large
+    prices, and are rebuilt from the window once per full rotation so
+    floating-point drift never accumulates (amortised O(1) per update).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.anchor = None
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.since_rebuild = 0
+
+    def push(self, value: float):
+        if self.anchor is None:
+            self.anchor = value
+        if len(self.values) == self.size:
+            old = self.values[0] - self.anchor
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        shifted = value - self.anchor
+        self.total += shifted
+        self.total_sq += shifted * shifted
+        self.since_rebuild += 1
+        if self.since_rebuild >= self.size:
+            self._rebuild()
+
+    def _rebuild(self):
+        self.anchor = self.values[-1]
+        shifted = [v - self.anchor for v in self.values]
+        self.total = math.fsum(shifted)
+        self.total_sq = math.fsum(s * s for s in shifted)
+        self.since_rebuild = 0
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def mean(self):
+        return self.anchor + self.total / self.size if self.full else NAN
+
+    def std(self):
+        if not self.full:
+            return NAN
+        mean_shifted = self.total / self.size
+        return math.sqrt(max(self.total_sq / self.size - mean_shifted * mean_shifted, 0.0))
+
+    def snapshot(self):
+        return {"size": self.size, "values": list(self.values)}
+
+    @classmethod
+    def restore(cls, state):
+        window = cls(state["size"])
+        for value in state["values"]:
+            window.push(value)
+        return window
+
+# -------------------------------
+# Per-coin incremental indicator engine
+# -------------------------------
+class IndicatorEngine:
+    """
+    Incremental version of the ``calculate_*`` functions in ``strategy``.
+
+    Feeding a price series through ``update`` one point at a time yields the
+    same latest SMA, RSI (Wilder), MACD/signal (EMA), Bollinger Bands and ADX
+    values as the batch ``ta`` functions over that same series, in constant
+    time per point.
+    """
+
+    def __init__(self, sma_windows=(5, 10), rsi_window=14, macd_fast=12, macd_slow=26,
+                 macd_signal=9, bb_window=20, bb_dev=2, adx_window=14):
+        self.params = {
+            "sma_windows": list(sma_windows), "rsi_window": rsi_window,
+            "macd_fast": macd_fast, "macd_slow": macd_slow, "macd_signal": macd_signal,
+            "bb_window": bb_window, "bb_dev": bb_dev, "adx_window": adx_window,
+        }
+        self.count = 0
+        self.price = NAN
+        self.sma = {w: RollingWindow(w) for w in sma_windows}
+        self.bb = RollingWindow(bb_window)
+        # RSI: Wilder smoothing of up/down moves (``ta`` seeds both with 0 at the first bar)
+        self.rsi_up = 0.0
+        self.rsi_down = 0.0
+        # MACD: two price EMAs plus an EMA of their difference
+        self.ema_fast = NAN
+        self.ema_slow = NAN
+        self.ema_signal = NAN
+        self.signal_count = 0
+        # ADX: Wilder sums of true range and directional movement, then DX smoothing
+        self.tr_sum = 0.0
+        self.dm_pos = 0.0
+        self.dm_neg = 0.0
+        self.dx_count = 0
+        self.dx_total = 0.0
+        self.adx = 0.0
+
+    def update(self, price: float):
+        """Consume one new price."""
+        price = float(price)
+        previous = self.price
+        self.count += 1
+        self.price = price
+
+        for window in self.sma.values():
+            window.push(price)
+        self.bb.push(price)
+
+        p = self.params
+        fast_alpha = 2 / (p["macd_fast"] + 1)
+        slow_alpha = 2 / (p["macd_slow"] + 1)
+        if self.count == 1:
+            self.ema_fast = self.ema_slow = price
+        else:
+            self.ema_fast += fast_alpha * (price - self.ema_fast)
+            self.ema_slow += slow_alpha * (price - self.ema_slow)
+        if self.count >= p["macd_slow"]:
+            macd = self.ema_fast - self.ema_slow
+            self.signal_count += 1
+            if self.signal_count == 1:
+                self.ema_signal = macd
+            else:
+                self.ema_signal += 2 / (p["macd_signal"] + 1) * (macd - self.ema_signal)
+
+        if self.count == 1:
+            return
+        diff = price - previous
+        up, down = max(diff, 0.0), max(-diff, 0.0)
+        moves = self.count - 1
+
+        rsi_alpha = 1 / p["rsi_window"]
+        self.rsi_up += rsi_alpha * (up - self.rsi_up)
+        self.rsi_down += rsi_alpha * (down - self.rsi_down)
+
+        window = p["adx_window"]
+        if moves <= window:
+            self.tr_sum += abs(diff)
+            self.dm_pos += up
+            self.dm_neg += down
+        else:
+            self.tr_sum += abs(diff) - self.tr_sum / window
+            self.dm_pos += up - self.dm_pos / window
+            self.dm_neg += down - self.dm_neg / window
+        if moves >= window:
+            dx = self._dx()
+            self.dx_count += 1
+            if self.dx_count < window:
+                self.dx_total += dx
+            elif self.dx_count == window:
+                self.adx = (self.dx_total + dx) / window
+            else:
+                self.adx = (self.adx * (window - 1) + dx) / window
+
+    def _dx(self):
+        if self.tr_sum == 0:
+            return 0.0
+        di_pos = 100 * self.dm_pos / self.tr_sum
+        di_neg = 100 * self.dm_neg / self.tr_sum
+        if di_pos + di_neg == 0:
+            return 0.0
+        return 100 * abs((di_pos - di_neg) / (di_pos + di_neg))
+
+    def values(self):
+        """Latest indicator values, rounded like the batch columns."""
+        p = self.params
+        if self.count >= p["rsi_window"]:
+            rsi = 100.0 if self.rsi_down == 0 else 100 - 100 / (1 + self.rsi_up / self.rsi_down)
+        else:
+            rsi = NAN
+        macd = self.ema_fast - self.ema_slow if self.count >= p["macd_slow"] else NAN
+        signal = self.ema_signal if self.signal_count >= p["macd_signal"] else NAN
+        mean, std = self.bb.mean(), self.bb.std()
+        latest = {"price": self.price}
+        for w, window in self.sma.items():
+            latest[f"SMA_{w}"] = window.mean()
+        latest.update({
+            "RSI": rsi,
+            "MACD": macd,
+            "MACD_Signal": signal,
+            "BB_High": mean + p["bb_dev"] * std,
+            "BB_Low": mean - p["bb_dev"] * std,
+            "ADX": self.adx,
+        })
+        return {key: round(value, 6) for key, value in latest.items()}
+
+    def snapshot(self):
+        """Plain-dict state that ``restore`` turns back into an identical engine."""
+        state = {key: value for key, value in self.__dict__.items() if key not in ("sma", "bb", "params")}
+        state["params"] = dict(self.params)
+        state["sma"] = {str(w): window.snapshot() for w, window in self.sma.items()}
+        state["bb"] = self.bb.snapshot()
+        return state
+
+    @classmethod
+    def restore(cls, state):
+        engine = cls(**state["params"])
+        for key, value in state.items():
+            if key not in ("sma", "bb", "params"):
+                setattr(engine, key, value)
+        engine.sma = {int(w): RollingWindow.restore(s) for w, s in state["sma"].items()}
+        engine.bb = RollingWindow.restore(state["bb"])
+        return engine
+
+# -------------------------------
+# Engines kept warm per coin
+# -------------------------------
+class EngineRegistry:
+    """
+    One engine per coin, fed only the stored points it has not seen yet.
+
+    A new engine is seeded from the same ``days`` window the batch path uses,
+    so its first decision matches ``make_trade_decision``; afterwards it keeps
+    its state instead of restarting the window on every call.
+
+    The store keeps one point per ``resolution_ms`` bucket and overwrites the
+    last one when a newer price lands in the same bucket. The registry keeps
+    the engine state from before the last bar, so such a point replaces that
+    bar instead of being counted as a new one.
+    """
+
+    def __init__(self, resolution_ms: int = price_store.RESOLUTION_MS):
+        self.resolution_ms = resolution_ms
+        self._engines = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, coin_id: str):
+        with self._lock:
+            return self._engines.setdefault(
+                coin_id, {"engine": IndicatorEngine(), "before": None, "last_ts": None, "lock": threading.Lock()}
+            )
+
+    def feed(self, coin_id: str, timestamps, prices):
+        """Push points newer than the last one seen; returns the engine."""
+        entry = self._entry(coin_id)
+        with entry["lock"]:
+            buckets = [int(ts) // self.resolution_ms for ts in timestamps]
+            for i, (ts, price) in enumerate(zip(timestamps, prices)):
+                ts = int(ts)
+                last_ts = entry["last_ts"]
+                if last_ts is not None and ts <= last_ts:
+                    continue
+                if last_ts is not None and buckets[i] == last_ts // self.resolution_ms:
+                    entry["engine"] = IndicatorEngine.restore(entry["before"])  # the stored tail was replaced
+                elif i + 1 == len(buckets) or buckets[i + 1] == buckets[i]:
+                    # Only the state before a bar that may still be replaced is worth keeping.
+                    entry["before"] = entry["engine"].snapshot()
+                entry["engine"].update(round(float(price), 6))
+                entry["last_ts"] = ts
+            return entry["engine"]
+
+    def reset(self, coin_id: str = None):
+        with self._lock:
+            if coin_id is None:
+                self._engines.clear()
+            else:
+                self._engines.pop(coin_id, None)
+
+    def snapshot(self):
+        with self._lock:
+            entries = dict(self._engines)
+        return {
+            coin: {"engine": e["engine"].snapshot(), "before": e["before"], "last_ts": e["last_ts"]}
+            for coin, e in entries.items()
+        }
+
+    def restore(self, state):
+        with self._lock:
+            self._engines = {
+                coin: {"engine": IndicatorEngine.restore(s["engine"]), "before": s["before"],
+                       "last_ts": s["last_ts"], "lock": threading.Lock()}
+                for coin, s in state.items()
+            }
+
+registry = EngineRegistry()
+
+def make_streaming_trade_decision(coin_id: str, days: int = 14):
+    """Same contract as ``strategy.make_trade_decision``, backed by the coin's warm engine."""
+    if strategy.IS_SIMULATION_MODE:
+        return strategy.make_trade_decision(coin_id)
+    try:
+        strategy.sync_price_history(coin_id, days=days)
+    except (requests.exceptions.RequestException, ValueError):
+        logger.exception("price history sync failed for %s", coin_id)
+        return {"error": "No price data available"}
+    return decide_from_store(coin_id, days)
+
+def decide_from_store(coin_id: str, days: int = 14, stop_loss_percent=5, take_profit_percent=10, adx_threshold=25):
+    """Decide from whatever the local store already holds for a coin (no upstream call)."""
+    since_ms = int(time.time() * 1000) - days * 86_400_000
+    timestamps, prices = price_store.store.read(coin_id, since_ms=since_ms)
+    if not len(prices):
+        return {"error": "No price data available"}
+    engine = registry.feed(coin_id, timestamps, prices)
+    return strategy.decide(engine.values(), stop_loss_percent, take_profit_percent, adx_threshold)
@@ -1,13 +1,36 @@
 import time
-import random
-import requests
-import pandas as pd
-from fastapi import FastAPI, APIRouter, HTTPException, Body, Request
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from backend.ai.strategy import make_trade_decision  # Live strategy logic
 
-app = FastAPI()
+_import_started = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, APIRouter, HTTPException, Body, Request, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from backend.ai.strategy import make_trade_decision, get_historical_prices, decision_cache  # Live strategy logic
+from backend.ai import automation, batch, optimize
+from backend.ai.scheduler import DEFAULT_STRATEGY
+from backend.ai.simulator import simulator
+from backend.utils import feed, http_client, lazy, metrics, shared
+from backend.utils.cache import SWRCache
+from backend.utils.coingecko import COINGECKO_BASE_URL, price_batcher
+from backend.utils.fanout import attach_batch_trade_indicators, bounded_gather, run_blocking
+
+# Only imported when a request fails; pandas and ta load with the strategy code (see backend.utils.lazy).
+requests = lazy.LazyModule("requests")
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app):
+    automation.configure_logging()
+    # Load the heavy libraries in the background so /health answers right away.
+    if lazy.WARMUP:
+        lazy.warm_up()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,7 +43,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Snapshot-Version"],
 )
+# Latency per route template for /metrics (see backend.utils.metrics for HODLBOT_METRICS modes).
+app.add_middleware(metrics.MetricsMiddleware)
 
 router = APIRouter()
 
@@ -43,84 +69,102 @@ COIN_RANGES = {
 #############################################
 # Simulation Helper Functions
 #############################################
+# Simulated paths start in the middle of each coin's range (see backend.ai.simulator).
+def simulated_price(coin: str):
+    low, high = COIN_RANGES[coin]
+    return round(simulator.price(coin, (low + high) / 2), 6)
+
 def simulate_strategy(coin_id: str):
     coin = coin_id.lower()
     if coin not in COIN_RANGES:
         return {"error": f"Invalid coin: '{coin_id}'"}
     low, high = COIN_RANGES[coin]
-    simulated_price = round(random.uniform(low, high), 2)
-    mid = (low + high) / 2
-    decision = "BUY" if simulated_price < mid else "SELL"
-    return {"decision": decision, "price": simulated_price, "coin": coin}
+    price = simulated_price(coin)
+    # Buy below the trailing 24-hour average, sell above it.
+    _, closes = simulator.history(coin, (low + high) / 2, bars=24)
+    decision = "BUY" if price < closes.mean() else "SELL"
+    return {"decision": decision, "price": price, "coin": coin}
 
 def simulate_price(coin_id: str):
     coin = coin_id.lower()
     if coin not in COIN_RANGES:
         raise HTTPException(status_code=400, detail=f"Invalid coin: '{coin_id}'")
-    low, high = COIN_RANGES[coin]
-    simulated_price = round(random.uniform(low, high), 2)
-    return {coin: {"usd": simulated_price}}
+    return {coin: {"usd": simulated_price(coin)}}
 
 #############################################
 # Live Data Cache Setup
 #############################################
-cache = {"data": None, "timestamp": 0, "ttl": 300}  # TTL = 300 seconds
-COINGECKO_API_MARKETS = "https://api.coingecko.com/api/v3/coins/markets"
+COINGECKO_API_MARKETS = f"{COINGECKO_BASE_URL}/coins/markets"
+
+async def load_live_coins():
+    """Fetch the top 100 markets and attach a trade indicator to each."""
+    response = await run_blocking(
+        lambda: http_client.get(
+            COINGECKO_API_MARKETS,
+            params={"vs_currency": "usd", "order": "market_cap_desc", "per_page": 100},
+            timeout=10,
+        )
+    )
+    response.raise_for_status()
+    coins = response.json()
+
+    # Fetch histories concurrently, then decide for every coin in one vectorized pass.
+    await attach_batch_trade_indicators(coins, get_historical_prices, batch.decide_series)
+    return coins
+
+# Serves the last good listing immediately and refreshes it in the background (TTL = 300 seconds).
+# Refreshes that move a coin's price or indicator are recorded for ?since= delta requests.
+# With HODLBOT_SHARED_DIR set, one worker refreshes the listing and the others read its bytes.
+coins_cache = SWRCache(load_live_coins, ttl=300, name="coins", key="id", diff_fields=("current_price", "trade_indicator"),
+                       shared=shared.store)
 
 #############################################
 # /coins Endpoint (Simulation-Aware with Fallback)
 #############################################
 @router.get("/coins", tags=["Coins"])
-def get_cached_coins():
-    # Log the current mode for debugging.
-    print("Current mode:", current_mode["mode"])
+async def get_cached_coins(request: Request, since: int = None):
+    logger.debug("Current mode: %s", current_mode["mode"])
 
     # If in simulation mode, always return simulated data.
     if current_mode["mode"] == "simulation":
         simulated_data = []
-        for coin, (low, high) in COIN_RANGES.items():
-            simulated_price = round(random.uniform(low, high), 2)
+        for coin in COIN_RANGES:
             simulated_data.append({
                 "id": coin,
                 "name": coin.capitalize(),
-                "current_price": simulated_price,
+                "current_price": simulated_price(coin),
                 "trade_indicator": simulate_strategy(coin)
             })
         return simulated_data
 
-    # Otherwise (live mode), try to return live data using caching.
-    current_time = time.time()
-    if cache["data"] and (current_time - cache["timestamp"] < cache["ttl"]):
-        return cache["data"]
-
+    # Otherwise (live mode), serve from the stale-while-revalidate cache.
     try:
-        response = requests.get(
-            COINGECKO_API_MARKETS,
-            params={"vs_currency": "usd", "order": "market_cap_desc", "per_page": 100},
-            timeout=10,
+        # Served as the bytes encoded when the cache was refreshed (gzipped if the client accepts it).
+        # If-None-Match with the current ETag gets a 304; ?since=<X-Snapshot-Version> gets only the changed coins.
+        return await coins_cache.response(
+            request.headers.get("accept-encoding", ""), request.headers.get("if-none-match"), since
         )
-        response.raise_for_status()
-        coins = response.json()
-
-        # For each coin, add a trade indicator using the live strategy.
-        for coin in coins:
-            coin_id = coin["id"]
-            try:
-                trade_decision = make_trade_decision(coin_id)
-                coin["trade_indicator"] = trade_decision
-            except Exception as e:
-                coin["trade_indicator"] = {"decision": "ERROR", "error": str(e)}
-
-        cache["data"] = coins
-        cache["timestamp"] = current_time
-
-        return coins
-
     except requests.exceptions.RequestException as e:
         print("Error fetching live data:", e)
         # In live mode, do not fallback to simulation; instead, raise an error.
         raise HTTPException(status_code=500, detail=f"Error fetching live data: {e}")
 
+@router.get("/coins/cache", tags=["Coins"])
+def get_coins_cache_metrics():
+    return coins_cache.metrics()
+
+@router.get("/trading/cache", tags=["Trading"])
+def get_decision_cache_metrics():
+    return decision_cache.metrics()
+
+@router.get("/upstream/metrics", tags=["Upstream"])
+def get_upstream_metrics():
+    return {
+        "http": http_client.metrics(),
+        "prices": price_batcher.stats,
+        "shared": shared.store.metrics() if shared.store is not None else None,
+    }
+
 #############################################
 # Other Endpoints (unchanged)
 #############################################
@@ -130,10 +174,7 @@ def get_price(coin_id: str):
         return simulate_price(coin_id)
     else:
         try:
-            url = "https://api.coingecko.com/api/v3/simple/price"
-            resp = requests.get(url, params={"ids": coin_id, "vs_currencies": "usd"}, timeout=10)
-            resp.raise_for_status()
-            return resp.json()
+            return price_batcher.get_prices([coin_id])
         except requests.exceptions.RequestException as e:
             raise HTTPException(status_code=500, detail=f"Error fetching price: {e}")
 
@@ -161,13 +202,13 @@ def get_mode():
 
 @router.post("/mode", tags=["Mode"])
 async def set_mode_endpoint(request: Request):
-    global current_mode, cache
+    global current_mode
     new_mode = await request.json()
     if "mode" in new_mode and new_mode["mode"] in ["simulation", "live"]:
         current_mode["mode"] = new_mode["mode"]
         # Clear cache when switching modes to avoid stale data.
-        cache["data"] = None
-        cache["timestamp"] = 0
+        coins_cache.invalidate()
+        decision_cache.invalidate()
         return current_mode
     raise HTTPException(status_code=400, detail="Invalid mode")
 
@@ -176,14 +217,20 @@ async def start_auto_trading(data: dict = Body(...)):
     coin = data.get("coin")
     if not coin:
         raise HTTPException(status_code=400, detail="No coin provided.")
-    return {"status": "started", "coin": coin}
+    started = automation.engine.start(coin)
+    return {"status": "started" if started else "already running", "coin": coin}
 
 @router.post("/trading/stop", tags=["Trading"])
 async def stop_auto_trading(data: dict = Body(...)):
     coin = data.get("coin")
     if not coin:
         raise HTTPException(status_code=400, detail="No coin provided.")
-    return {"status": "stopped", "coin": coin}
+    stopped = automation.engine.stop(coin)
+    return {"status": "stopped" if stopped else "not running", "coin": coin}
+
+@router.get("/trading/status", tags=["Trading"])
+def automation_status():
+    return automation.engine.status()
 
 #############################################
 # Apply Trading Strategy
@@ -201,14 +248,15 @@ async def apply_strategy(request: Request):
     if not coin:
         raise HTTPException(status_code=400, detail="Coin is required.")
 
-    # Extract strategy parameters with defaults
-    profit_threshold = strategy.get("profitThreshold", 5)  # Default 5%
-    max_loss = strategy.get("maxLoss", 10)  # Default 10%
-    trade_frequency = strategy.get("tradeFrequency", 15)  # Default 15 minutes
-    sma_window = strategy.get("smaWindow", 5)  # Default SMA-5
-    rsi_window = strategy.get("rsiWindow", 14)  # Default RSI-14
-    bollinger_window = strategy.get("bollingerWindow", 20)  # Default Bollinger Bands
-    adx_threshold = strategy.get("adxThreshold", 25)  # Default ADX-25
+    # Extract strategy parameters with defaults (shared with the scheduler and the optimizer)
+    params = {**DEFAULT_STRATEGY, **strategy}
+    profit_threshold = params["profitThreshold"]
+    max_loss = params["maxLoss"]
+    trade_frequency = params["tradeFrequency"]
+    sma_window = params["smaWindow"]
+    rsi_window = params["rsiWindow"]
+    bollinger_window = params["bollingerWindow"]
+    adx_threshold = params["adxThreshold"]
 
     # Log strategy for debugging
     print(f"Applying strategy for {coin}:")
@@ -220,11 +268,159 @@ async def apply_strategy(request: Request):
     print(f"  Bollinger Bands Window: {bollinger_window}")
     print(f"  ADX Threshold: {adx_threshold}")
 
-    # Example: Save the strategy to a database or memory (if needed)
-    # strategies[coin] = strategy
+    # Register with the automation scheduler; the coin is evaluated every trade_frequency minutes.
+    try:
+        automation.engine.apply(coin, strategy)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid strategy: {e}")
 
     return {"status": "success", "strategy": strategy}
 
+#############################################
+# Strategy Parameter Sweep
+#############################################
+
+@router.post("/trading/optimize", tags=["Trading"])
+async def optimize_strategy(request: Request):
+    """
+    Backtest a grid or random sample of strategy parameters across coins and rank them.
+    Body: {"coins": [...], "days": 90, "grid": {"rsiWindow": [7, 14]}} or
+          {"coins": [...], "random": {"adxThreshold": [15, 35]}, "samples": 500, "seed": 1}
+    """
+    data = await request.json()
+    coins = data.get("coins")
+    if not coins or not isinstance(coins, list):
+        raise HTTPException(status_code=400, detail="At least one coin is required.")
+    if len(coins) > optimize.MAX_COINS:
+        raise HTTPException(status_code=400, detail=f"At most {optimize.MAX_COINS} coins per sweep.")
+    try:
+        if "random" in data:
+            combos = optimize.sample_random(data["random"], int(data.get("samples", 100)), data.get("seed"))
+        else:
+            combos = optimize.expand_grid(data.get("grid", {}))
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        workers = int(data["workers"]) if data.get("workers") is not None else None
+        top = int(data.get("top", 50))
+        days = int(data.get("days", 90))
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if top < 1 or (workers is not None and workers < 1):
+        raise HTTPException(status_code=400, detail="workers and top must be positive.")
+    if not 1 <= days <= optimize.MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {optimize.MAX_DAYS}.")
+
+    histories = await bounded_gather(lambda coin: get_historical_prices(coin, days=days), coins, bulk=True)
+    series = [h.prices for h in histories if not isinstance(h, Exception) and h is not None and not h.empty]
+    if not series:
+        raise HTTPException(status_code=400, detail="No price data available for the requested coins.")
+
+    start = time.time()
+    results = await run_blocking(
+        lambda: optimize.run_sweep(batch.stack_prices(series), combos, workers=workers, top=top)
+    )
+    return {
+        "combinations": len(combos),
+        "coins": len(series),
+        "elapsed": round(time.time() - start, 3),
+        "results": results,
+    }
+
+#############################################
+# Push Feed (WebSocket / Server-Sent Events)
+#############################################
+
+async def poll_feed(coins):
+    """Single producer for the push feed: one batched price lookup and one decision per subscribed coin."""
+    if current_mode["mode"] == "simulation":
+        known = [coin for coin in coins if coin.lower() in COIN_RANGES]
+        return {
+            "price": {coin: simulate_price(coin)[coin.lower()] for coin in known},
+            "decision": {coin: simulate_strategy(coin) for coin in known},
+        }
+    prices = await run_blocking(price_batcher.get_prices, coins)
+    decisions = await bounded_gather(make_trade_decision, coins, bulk=True)
+    return {
+        "price": {coin: quote for coin, quote in prices.items() if quote},
+        "decision": {
+            coin: decision for coin, decision in zip(coins, decisions) if not isinstance(decision, Exception)
+        },
+    }
+
+async def known_feed_coins():
+    """Coins the feed may be subscribed to: the simulated set, or the ids in the cached /coins listing."""
+    if current_mode["mode"] == "simulation":
+        return set(COIN_RANGES)
+    return {coin["id"] for coin in await coins_cache.get()}
+
+feed.hub.producer = poll_feed
+feed.hub.known_coins = known_feed_coins
+# Any batched price fetch (portfolio, /price, trades) also reaches subscribers.
+price_batcher.subscribe(lambda quotes: [feed.hub.publish_threadsafe(c, "price", q) for c, q in quotes.items()])
+
+def _coin_list(value):
+    return [coin.strip() for coin in (value or "").split(",") if coin.strip()]
+
+@app.websocket("/api/feed")
+async def feed_socket(websocket: WebSocket):
+    """
+    Send {"subscribe": [...]} or {"unsubscribe": [...]} (or connect with ?coins=a,b);
+    receive {"type": "price" | "decision", "coin": ..., "data": ...} whenever a value changes.
+    """
+    await websocket.accept()
+    subscriber = feed.hub.connect()
+    await feed.hub.subscribe_known(subscriber, _coin_list(websocket.query_params.get("coins")))
+
+    async def receive():
+        while True:
+            message = await websocket.receive_json()
+            await feed.hub.subscribe_known(subscriber, message.get("subscribe", []))
+            feed.hub.unsubscribe(subscriber, message.get("unsubscribe", []))
+
+    async def send():
+        while True:
+            for message in await subscriber.next_batch():
+                await websocket.send_text(message)
+
+    tasks = [asyncio.ensure_future(receive()), asyncio.ensure_future(send())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        feed.hub.disconnect(subscriber)
+        for task in tasks:
+            task.cancel()
+        # Retrieve every outcome: a client leaving is normal, anything else is worth a log line.
+        for result in await asyncio.gather(*tasks, return_exceptions=True):
+            if isinstance(result, Exception) and not isinstance(result, WebSocketDisconnect):
+                logger.warning("feed socket closed on error: %r", result)
+
+@router.get("/feed/sse", tags=["Feed"])
+async def feed_events(coins: str):
+    """Server-Sent Events version of the feed for the coins in ``?coins=a,b``."""
+    subscriber = feed.hub.connect()
+    await feed.hub.subscribe_known(subscriber, _coin_list(coins))
+
+    async def events():
+        try:
+            while True:
+                try:
+                    messages = await asyncio.wait_for(subscriber.next_batch(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                for message in messages:
+                    yield f"data: {message}\n\n"
+        finally:
+            feed.hub.disconnect(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.get("/feed/metrics", tags=["Feed"])
+def feed_metrics():
+    return feed.hub.metrics()
+
 #############################################
 # Include the Router with Prefix "/api"
 #############################################
@@ -241,6 +437,30 @@ def home():
 def health_check():
     return {"status": "Server is healthy!"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Endpoint and stage latency histograms plus cache, upstream and feed counters, for a Prometheus scrape."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/health/startup")
+def startup_report():
+    """How long importing the API took, and which deferred libraries have loaded since (with their import time)."""
+    return {
+        "import_seconds": IMPORT_SECONDS,
+        "deferred_imports": {name: lazy.import_seconds.get(name) for name in lazy.HEAVY_MODULES},
+    }
+
+# Counters the caches, the upstream client and the feed already keep, exported on each scrape.
+metrics.register_collector("coins", coins_cache.metrics)
+metrics.register_collector("decisions", decision_cache.metrics)
+metrics.register_collector("upstream", http_client.metrics)
+metrics.register_collector("prices", lambda: price_batcher.stats)
+metrics.register_collector("feed", feed.hub.metrics)
+if shared.store is not None:
+    metrics.register_collector("shared", shared.store.metrics)
+
+IMPORT_SECONDS = round(time.perf_counter() - _import_started, 6)
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
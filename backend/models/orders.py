@@ -0,0 +1,111 @@
+import asyncio
+import time
+from backend.models.portfolio import Portfolio
+from backend.models.transactions import Transaction, TransactionHistory
+from backend.utils.coingecko import price_batcher
+from backend.utils.fanout import run_blocking
+
+# Upper bound on orders committed together.
+MAX_BATCH = 256
+
+class OrderRejected(Exception):
+    """The order is invalid or cannot be filled (unknown coin, insufficient holdings)."""
+
+class Order:
+    __slots__ = ("coin_id", "action", "amount", "future")
+
+    def __init__(self, coin_id: str, action: str, amount: float, future):
+        self.coin_id = coin_id
+        self.action = action
+        self.amount = amount
+        self.future = future
+
+class OrderQueue:
+    """
+    Orders are queued and executed by a single writer task.
+
+    The writer drains whatever is waiting (up to ``max_batch``), prices the
+    whole batch with one snapshot from the shared price cache, validates the
+    orders in arrival order against holdings that include earlier orders of
+    the same batch, writes the accepted ones to the ledger in one database
+    transaction and only then applies them to the portfolio. Since nothing
+    else writes holdings, concurrent sells can no longer overdraw.
+    """
+
+    def __init__(self, max_batch: int = MAX_BATCH):
+        self.max_batch = max_batch
+        self._queue = None
+        self._task = None
+        self.stats = {"orders": 0, "filled": 0, "rejected": 0, "batches": 0, "largest_batch": 0, "last_batch_seconds": 0.0}
+
+    async def submit(self, coin_id: str, action: str, amount: float):
+        """Queue an order and wait for its fill. :return: The recorded Transaction."""
+        if action not in ("buy", "sell"):
+            raise OrderRejected("Action must be 'buy' or 'sell'.")
+        if not amount or amount <= 0:
+            raise OrderRejected("Amount must be positive.")
+        loop = asyncio.get_running_loop()
+        self._ensure_writer(loop)
+        order = Order(coin_id, action, amount, loop.create_future())
+        self.stats["orders"] += 1
+        await self._queue.put(order)
+        return await order.future
+
+    def _ensure_writer(self, loop):
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._writer())
+
+    async def _writer(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._execute(batch)
+            except Exception as e:
+                for order in batch:
+                    self._fail(order, e)
+
+    async def _execute(self, batch):
+        started = time.perf_counter()
+        await run_blocking(Portfolio.ensure_loaded)
+        quotes = await run_blocking(price_batcher.get_prices, sorted({order.coin_id for order in batch}))
+
+        holdings = Portfolio.engine.holdings()
+        accepted = []
+        for order in batch:
+            price = (quotes.get(order.coin_id) or {}).get("usd")
+            if not price:
+                self._fail(order, OrderRejected(f"Invalid coin ID: {order.coin_id}"))
+                continue
+            quantity = order.amount / price
+            if order.action == "sell":
+                if holdings.get(order.coin_id, 0) < quantity:
+                    self._fail(order, OrderRejected(f"Not enough {order.coin_id} to sell."))
+                    continue
+                holdings[order.coin_id] -= quantity
+            else:
+                holdings[order.coin_id] = holdings.get(order.coin_id, 0) + quantity
+            accepted.append((order, Transaction(order.coin_id, order.action, order.amount, price), quantity))
+
+        if accepted:
+            # Ledger first, in one transaction; the portfolio only changes once it is durable.
+            await run_blocking(TransactionHistory.add_transactions, [tx for _, tx, _ in accepted])
+            for order, tx, quantity in accepted:
+                Portfolio.record_trade(tx.coin_id, tx.action, quantity, tx.price)
+                if not order.future.done():
+                    order.future.set_result(tx)
+            self.stats["filled"] += len(accepted)
+
+        self.stats["batches"] += 1
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(batch))
+        self.stats["last_batch_seconds"] = round(time.perf_counter() - started, 6)
+
+    def _fail(self, order, error):
+        if isinstance(error, OrderRejected):
+            self.stats["rejected"] += 1
+        if not order.future.done():
+            order.future.set_exception(error)
+
+order_queue = OrderQueue()
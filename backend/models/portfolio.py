@@ -1,5 +1,167 @@
+import threading
+from collections import deque
+from backend.models.transactions import TransactionHistory
+
+# Quantities below this are treated as zero (float dust left by partial sells).
+DUST = 1e-12
+
+class Position:
+    """One coin's FIFO lots with running cost basis and PnL."""
+    __slots__ = ("coin_id", "lots", "quantity", "cost_basis", "realized_pnl", "price", "row")
+
+    def __init__(self, coin_id: str):
+        self.coin_id = coin_id
+        self.lots = deque()  # [quantity, unit cost], oldest first
+        self.quantity = 0.0
+        self.cost_basis = 0.0
+        self.realized_pnl = 0.0
+        self.price = None
+        self.row = None
+
+    @property
+    def value(self):
+        return self.quantity * self.price if self.price is not None else 0.0
+
+    @property
+    def unrealized_pnl(self):
+        return self.value - self.cost_basis if self.price is not None else 0.0
+
+class PortfolioEngine:
+    """
+    Portfolio valuation maintained incrementally.
+
+    Each trade touches one coin's lots (O(lots consumed)) and each price tick
+    one position (O(1)); portfolio totals are adjusted by the change instead
+    of being summed again. ``snapshot`` returns a prebuilt summary that is
+    only reassembled after something changed, so dashboard polling between
+    trades and ticks costs nothing.
+    """
+
+    def __init__(self):
+        self.positions = {}
+        self.totals = {"total_value": 0.0, "total_cost_basis": 0.0, "realized_pnl": 0.0, "unrealized_pnl": 0.0}
+        self._snapshot = None
+        self._lock = threading.RLock()
+
+    def buy(self, coin_id: str, quantity: float, price: float):
+        with self._lock:
+            position = self._position(coin_id)
+            before = self._contribution(position)
+            position.lots.append([quantity, price])
+            position.quantity += quantity
+            position.cost_basis += quantity * price
+            position.price = price
+            self._changed(position, before)
+
+    def sell(self, coin_id: str, quantity: float, price: float):
+        """Close ``quantity`` against the oldest lots first. :return: PnL realized by this sale."""
+        with self._lock:
+            position = self._position(coin_id)
+            before = self._contribution(position)
+            remaining = min(quantity, position.quantity)
+            realized = 0.0
+            while remaining > DUST and position.lots:
+                lot = position.lots[0]
+                used = min(lot[0], remaining)
+                realized += used * (price - lot[1])
+                position.cost_basis -= used * lot[1]
+                lot[0] -= used
+                remaining -= used
+                if lot[0] <= DUST:
+                    position.lots.popleft()
+            position.quantity = sum(lot[0] for lot in position.lots) if position.lots else 0.0
+            if not position.lots:
+                position.cost_basis = 0.0
+            position.realized_pnl += realized
+            position.price = price
+            self._changed(position, before)
+            return realized
+
+    def record_trade(self, coin_id: str, action: str, quantity: float, price: float):
+        if action == "buy":
+            self.buy(coin_id, quantity, price)
+        elif action == "sell":
+            self.sell(coin_id, quantity, price)
+        else:
+            raise ValueError("Action must be 'buy' or 'sell'.")
+
+    def on_prices(self, quotes: dict, currency: str = "usd"):
+        """Mark positions to market from a ``{coin_id: {"usd": price}}`` payload; unknown coins are ignored."""
+        with self._lock:
+            for coin_id, quote in quotes.items():
+                position = self.positions.get(coin_id)
+                price = (quote or {}).get(currency)
+                if position is None or price is None or price == position.price:
+                    continue
+                before = self._contribution(position)
+                position.price = price
+                self._changed(position, before)
+
+    def load(self, rows):
+        """Rebuild positions by replaying ledger rows (oldest first) of USD amount and price."""
+        for row in rows:
+            if row["price"]:
+                self.record_trade(row["coin_id"], row["action"], row["amount"] / row["price"], row["price"])
+
+    def holdings(self):
+        with self._lock:
+            return {coin: p.quantity for coin, p in self.positions.items() if p.quantity > DUST}
+
+    def snapshot(self):
+        """Current summary; rebuilt only after a trade or price change."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = {
+                        "portfolio": [p.row for p in self.positions.values() if p.quantity > DUST],
+                        **{k: round(v, 6) for k, v in self.totals.items()},
+                    }
+                snapshot = self._snapshot
+        return snapshot
+
+    def _position(self, coin_id):
+        position = self.positions.get(coin_id)
+        if position is None:
+            position = self.positions[coin_id] = Position(coin_id)
+        return position
+
+    @staticmethod
+    def _contribution(position):
+        return position.value, position.cost_basis, position.realized_pnl, position.unrealized_pnl
+
+    def _changed(self, position, before):
+        after = self._contribution(position)
+        for name, old, new in zip(("total_value", "total_cost_basis", "realized_pnl", "unrealized_pnl"), before, after):
+            self.totals[name] += new - old
+        position.row = {
+            "coin": position.coin_id,
+            "quantity": position.quantity,
+            "price": position.price if position.price is not None else 0,
+            "value": round(position.value, 6),
+            "cost_basis": round(position.cost_basis, 6),
+            "avg_cost": round(position.cost_basis / position.quantity, 6) if position.quantity > DUST else 0.0,
+            "realized_pnl": round(position.realized_pnl, 6),
+            "unrealized_pnl": round(position.unrealized_pnl, 6),
+        }
+        self._snapshot = None
+
 class Portfolio:
     holdings = {}
+    engine = PortfolioEngine()
+    _loaded = False
+    _load_lock = threading.Lock()
+
+    @classmethod
+    def ensure_loaded(cls):
+        """Replay the persistent ledger into the lot engine once per process."""
+        if cls._loaded:
+            return
+        with cls._load_lock:
+            if not cls._loaded:
+                cls.engine.load(TransactionHistory.iter_rows())
+                cls.holdings.update(cls.engine.holdings())
+                cls._loaded = True
 
     @classmethod
     def update_holding(cls, coin_id: str, quantity: float):
@@ -7,6 +169,13 @@ class Portfolio:
         if cls.holdings[coin_id] < 0:
             cls.holdings[coin_id] = 0
 
+    @classmethod
+    def record_trade(cls, coin_id: str, action: str, quantity: float, price: float):
+        """Apply a trade to the lot engine and keep ``holdings`` in step with it."""
+        cls.ensure_loaded()
+        cls.engine.record_trade(coin_id, action, quantity, price)
+        cls.holdings[coin_id] = cls.engine.positions[coin_id].quantity
+
     @classmethod
     def get_holdings(cls):
         return cls.holdings
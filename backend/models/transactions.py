@@ -1,21 +1,201 @@
+import logging
+import os
+import threading
 from typing import List
-from datetime import datetime
+from datetime import datetime, timezone
+from peewee import AutoField, CharField, DateTimeField, FloatField, Model, SqliteDatabase
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Persistent ledger (SQLite via peewee)
+# -------------------------------
+LEDGER_DB = os.getenv("HODLBOT_LEDGER_DB", os.path.join(os.path.expanduser("~"), ".hodlbot", "ledger.db"))
+# Buffered trades are written in one transaction once this many are waiting, or after FLUSH_INTERVAL seconds.
+FLUSH_SIZE = int(os.getenv("HODLBOT_LEDGER_FLUSH_SIZE", "100"))
+FLUSH_INTERVAL = float(os.getenv("HODLBOT_LEDGER_FLUSH_INTERVAL", "0.5"))
+# SQLite's default variable limit allows 999 bound values; 5 columns per row.
+INSERT_CHUNK = 150
+
+# Opened lazily by init_ledger so importing the models never touches the disk.
+db = SqliteDatabase(None)
+
+class LedgerEntry(Model):
+    id = AutoField()
+    coin_id = CharField(index=True)
+    action = CharField()
+    amount = FloatField()
+    price = FloatField()
+    timestamp = DateTimeField(index=True)
+
+    class Meta:
+        database = db
+        table_name = "transactions"
+        indexes = ((("coin_id", "timestamp"), False),)
+
+def init_ledger(path: str = None):
+    """Open (or switch) the ledger database and create the table if needed."""
+    path = path or LEDGER_DB
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if not db.is_closed():
+        db.close()
+    db.init(path, pragmas={"journal_mode": "wal", "synchronous": "normal", "cache_size": -16_000}, check_same_thread=False)
+    db.connect(reuse_if_open=True)
+    db.create_tables([LedgerEntry])
+
+def _ensure_ledger():
+    if db.deferred:
+        init_ledger()
+
+def _naive_utc(value: datetime):
+    """Timestamps are stored as naive UTC; convert aware filter values to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 class Transaction:
-    def __init__(self, coin_id: str, action: str, amount: float, price: float):
+    def __init__(self, coin_id: str, action: str, amount: float, price: float, timestamp: datetime = None):
         self.coin_id = coin_id
         self.action = action
         self.amount = amount
         self.price = price
-        self.timestamp = datetime.utcnow()
+        self.timestamp = timestamp or datetime.utcnow()
+
+def _row(entry):
+    """JSON-ready dict for a ledger row (tuple from ``.tuples()``)."""
+    id_, coin_id, action, amount, price, timestamp = entry
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return {"id": id_, "coin_id": coin_id, "action": action, "amount": amount, "price": price,
+            "timestamp": timestamp.isoformat()}
 
 class TransactionHistory:
-    transactions: List[Transaction] = []
+    """
+    Trade ledger backed by SQLite.
+
+    Writes are buffered and inserted in batches (one transaction per flush),
+    so bursts of trades cost one fsync instead of one each; every read
+    flushes first, so readers always see their own writes.
+
+    ``add_transaction`` is fire-and-forget: a row is only durable once a flush
+    that includes it returns. A failed flush raises (or, from the timer, is
+    logged) and its rows are dropped, not retried by later flushes. Callers
+    that must know whether their rows were written call ``flush`` themselves
+    or use ``add_transactions``.
+    """
+    _buffer: List[Transaction] = []
+    _lock = threading.RLock()
+    _timer = None
 
     @classmethod
     def add_transaction(cls, transaction: Transaction):
-        cls.transactions.append(transaction)
+        with cls._lock:
+            cls._buffer.append(transaction)
+            if len(cls._buffer) >= FLUSH_SIZE:
+                cls.flush()
+            elif cls._timer is None:
+                cls._timer = threading.Timer(FLUSH_INTERVAL, cls._timed_flush)
+                cls._timer.daemon = True
+                cls._timer.start()
+
+    @classmethod
+    def add_transactions(cls, transactions):
+        """
+        Write ``transactions`` now, in one database transaction, after anything already buffered.
+        Raises if the write fails, in which case none of them are in the ledger (or left in the buffer).
+        """
+        with cls._lock:
+            cls.flush()
+            return cls._insert(transactions)
+
+    @classmethod
+    def flush(cls):
+        """
+        Write every buffered transaction in one database transaction.
+        The buffer is emptied before writing, so if the insert raises, none of its rows reach the ledger later.
+        """
+        with cls._lock:
+            if cls._timer is not None:
+                cls._timer.cancel()
+                cls._timer = None
+            pending, cls._buffer = cls._buffer, []
+            if not pending:
+                return 0
+            return cls._insert(pending)
+
+    @classmethod
+    def _timed_flush(cls):
+        try:
+            cls.flush()
+        except Exception:
+            logger.exception("ledger flush failed; the buffered transactions were not written")
+
+    @staticmethod
+    def _insert(transactions):
+        """Insert ``transactions`` in one database transaction: all of them or none."""
+        _ensure_ledger()
+        rows = [
+            {"coin_id": t.coin_id, "action": t.action, "amount": t.amount, "price": t.price, "timestamp": t.timestamp}
+            for t in transactions
+        ]
+        with db.atomic():
+            for start in range(0, len(rows), INSERT_CHUNK):
+                LedgerEntry.insert_many(rows[start:start + INSERT_CHUNK]).execute()
+        return len(rows)
+
+    @classmethod
+    def _query(cls, coin_id: str = None, action: str = None, since: datetime = None, until: datetime = None):
+        cls.flush()
+        _ensure_ledger()
+        since, until = _naive_utc(since), _naive_utc(until)
+        query = LedgerEntry.select(
+            LedgerEntry.id, LedgerEntry.coin_id, LedgerEntry.action, LedgerEntry.amount, LedgerEntry.price,
+            LedgerEntry.timestamp,
+        )
+        if coin_id:
+            query = query.where(LedgerEntry.coin_id == coin_id)
+        if action:
+            query = query.where(LedgerEntry.action == action)
+        if since:
+            query = query.where(LedgerEntry.timestamp >= since)
+        if until:
+            query = query.where(LedgerEntry.timestamp < until)
+        return query
+
+    @classmethod
+    def page(cls, cursor: int = None, limit: int = 100, **filters):
+        """
+        One page of transactions, newest first.
+        :param cursor: ``next_cursor`` from the previous page (omit for the first page).
+        :return: ``(rows, next_cursor)``; next_cursor is None on the last page.
+        """
+        query = cls._query(**filters)
+        if cursor is not None:
+            query = query.where(LedgerEntry.id < cursor)
+        rows = [_row(r) for r in query.order_by(LedgerEntry.id.desc()).limit(limit + 1).tuples()]
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    @classmethod
+    def iter_rows(cls, chunk: int = 1000, **filters):
+        """Every matching transaction, oldest first, read in keyset-paginated chunks."""
+        last_id = 0
+        while True:
+            query = cls._query(**filters).where(LedgerEntry.id > last_id).order_by(LedgerEntry.id).limit(chunk)
+            rows = [_row(r) for r in query.tuples()]
+            yield from rows
+            if len(rows) < chunk:
+                return
+            last_id = rows[-1]["id"]
 
     @classmethod
     def get_transactions(cls):
-        return cls.transactions
+        return [
+            Transaction(r["coin_id"], r["action"], r["amount"], r["price"], datetime.fromisoformat(r["timestamp"]))
+            for r in cls.iter_rows()
+        ]
+
+    @classmethod
+    def count(cls, **filters):
+        return cls._query(**filters).count()
@@ -1,8 +1,13 @@
-import time
-import random
-import requests
-from fastapi import FastAPI, APIRouter, HTTPException
-from backend.ai.strategy import make_trade_decision  # Live strategy logic
+from fastapi import FastAPI, APIRouter, HTTPException, Request
+from backend.ai.strategy import get_historical_prices  # Live strategy logic
+from backend.ai import batch
+from backend.ai.simulator import simulator
+from backend.utils import http_client, lazy, shared
+from backend.utils.cache import SWRCache
+from backend.utils.coingecko import COINGECKO_BASE_URL
+from backend.utils.fanout import attach_batch_trade_indicators, run_blocking
+
+requests = lazy.LazyModule("requests")
 
 app = FastAPI()
 router = APIRouter()
@@ -25,30 +30,46 @@ def simulate_strategy(coin_id: str):
     if coin not in COIN_RANGES:
         return {"error": f"Invalid coin: '{coin_id}'"}
     low, high = COIN_RANGES[coin]
-    simulated_price = round(random.uniform(low, high), 2)
-    # Dummy strategy: buy if price is below the midpoint; sell otherwise.
-    mid = (low + high) / 2
-    decision = "BUY" if simulated_price < mid else "SELL"
+    simulated_price = round(simulator.price(coin, (low + high) / 2), 6)
+    # Dummy strategy: buy below the trailing 24-hour average; sell otherwise.
+    _, closes = simulator.history(coin, (low + high) / 2, bars=24)
+    decision = "BUY" if simulated_price < closes.mean() else "SELL"
     return {"decision": decision, "price": simulated_price, "coin": coin}
 
-# Cache for live coin data (with TTL of 300 seconds)
-cache = {"data": None, "timestamp": 0, "ttl": 300}
-COINGECKO_API_MARKETS = "https://api.coingecko.com/api/v3/coins/markets"
+COINGECKO_API_MARKETS = f"{COINGECKO_BASE_URL}/coins/markets"
+
+async def load_live_coins():
+    """Fetch the top cryptocurrencies from CoinGecko and add trade indicators to each coin."""
+    response = await run_blocking(
+        lambda: http_client.get(
+            COINGECKO_API_MARKETS,
+            params={"vs_currency": "usd", "order": "market_cap_desc", "per_page": 100},
+            timeout=10,
+        )
+    )
+    response.raise_for_status()
+    coins = response.json()
+
+    # Add trade indicators: concurrent history fetch, one vectorized decision pass
+    await attach_batch_trade_indicators(coins, get_historical_prices, batch.decide_series)
+    return coins
+
+# Cache for live coin data (TTL of 300 seconds, stale-while-revalidate)
+cache = SWRCache(load_live_coins, ttl=300, name="coins", key="id", diff_fields=("current_price", "trade_indicator"),
+                 shared=shared.store)
 
 @router.get("/coins", tags=["Coins"])
-def get_cached_coins():
+async def get_cached_coins(request: Request, since: int = None):
     """
     Fetch and cache the top cryptocurrencies data from CoinGecko
     and add trade indicators to each coin.
     In simulation mode, return simulated coin data.
     """
-    global cache
-
     # If simulation mode is active, build simulated data
     if current_mode["mode"] == "simulation":
         simulated_data = []
         for coin, (low, high) in COIN_RANGES.items():
-            simulated_price = round(random.uniform(low, high), 2)
+            simulated_price = round(simulator.price(coin, (low + high) / 2), 6)
             simulated_data.append({
                 "id": coin,
                 "current_price": simulated_price,
@@ -56,34 +77,9 @@ def get_cached_coins():
             })
         return simulated_data
 
-    # Otherwise, fetch live data and use cache
-    current_time = time.time()
-    if cache["data"] and (current_time - cache["timestamp"] < cache["ttl"]):
-        return cache["data"]
-
+    # Otherwise, serve live data from the cache
     try:
-        response = requests.get(
-            COINGECKO_API_MARKETS,
-            params={"vs_currency": "usd", "order": "market_cap_desc", "per_page": 100},
-            timeout=10,
-        )
-        response.raise_for_status()
-        coins = response.json()
-
-        # Add trade indicators using the live strategy
-        for coin in coins:
-            coin_id = coin["id"]
-            try:
-                trade_decision = make_trade_decision(coin_id)
-                coin["trade_indicator"] = trade_decision
-            except Exception as e:
-                coin["trade_indicator"] = {"decision": "ERROR", "error": str(e)}
-
-        cache["data"] = coins
-        cache["timestamp"] = current_time
-
-        return coins
-
+        return await cache.response(request.headers.get("accept-encoding", ""), request.headers.get("if-none-match"), since)
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"Error fetching data: {e}")
 
@@ -1,21 +1,17 @@
 from fastapi import APIRouter
 from backend.models.portfolio import Portfolio
-from backend.utils.coingecko import get_price_from_api
+from backend.utils.coingecko import get_price_from_api, price_batcher
 
 router = APIRouter()
 
+# Every batched price fetch, from any endpoint, marks held positions to market.
+price_batcher.subscribe(Portfolio.engine.on_prices)
+
 @router.get("/portfolio")
 def get_portfolio():
-    holdings = Portfolio.get_holdings()
-    coin_ids = ",".join(holdings.keys())
-    price_data = get_price_from_api(coin_ids)
-
-    portfolio_summary = []
-    total_value = 0
-    for coin, quantity in holdings.items():
-        price = price_data.get(coin, {}).get("usd", 0)
-        value = quantity * price
-        portfolio_summary.append({"coin": coin, "quantity": quantity, "price": price, "value": value})
-        total_value += value
-
-    return {"portfolio": portfolio_summary, "total_value": total_value}
+    Portfolio.ensure_loaded()
+    holdings = Portfolio.engine.holdings()
+    if holdings:
+        # Served from the shared price cache; only stale coins trigger one batched upstream call.
+        Portfolio.engine.on_prices(get_price_from_api(",".join(holdings)))
+    return Portfolio.engine.snapshot()
@@ -1,8 +1,50 @@
-from fastapi import APIRouter
+import json
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from backend.models.transactions import TransactionHistory
 
 router = APIRouter()
 
+def _filters(coin: Optional[str], action: Optional[str], since: Optional[datetime], until: Optional[datetime]):
+    if action and action not in ("buy", "sell"):
+        raise HTTPException(status_code=400, detail="Action must be 'buy' or 'sell'.")
+    return {"coin_id": coin, "action": action, "since": since, "until": until}
+
 @router.get("/transactions")
-def get_transactions():
-    return {"transactions": [tx.__dict__ for tx in TransactionHistory.get_transactions()]}
+def get_transactions(
+    coin: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    """Newest-first page of transactions; pass ``next_cursor`` back as ``cursor`` for the next page."""
+    rows, next_cursor = TransactionHistory.page(cursor=cursor, limit=limit, **_filters(coin, action, since, until))
+    return {"transactions": rows, "next_cursor": next_cursor}
+
+def export_lines(rows, fmt: str = "ndjson"):
+    """Encode rows one at a time so the response never holds the whole ledger."""
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(row) + "\n"
+        return
+    yield "["
+    for i, row in enumerate(rows):
+        yield ("," if i else "") + json.dumps(row)
+    yield "]"
+
+@router.get("/transactions/export")
+def export_transactions(
+    coin: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    format: str = Query("ndjson", pattern="^(ndjson|json)$"),
+):
+    """Stream every matching transaction, oldest first, as NDJSON (default) or a JSON array."""
+    rows = TransactionHistory.iter_rows(**_filters(coin, action, since, until))
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(export_lines(rows, format), media_type=media_type)
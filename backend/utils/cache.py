@@ -0,0 +1,342 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+import orjson
+from starlette.responses import Response
+from backend.utils.fanout import run_blocking
+
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are always sent uncompressed.
+GZIP_MIN_BYTES = 1024
+# Snapshot diffs kept for ?since= delta requests; older versions get the full payload.
+DELTA_HISTORY = int(os.getenv("HODLBOT_DELTA_HISTORY", "32"))
+
+def _encode_default(obj):
+    # numpy / pandas scalars that slip into payloads (e.g. indicator values)
+    if hasattr(obj, "item"):
+        return obj.item()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def _encode(value):
+    return orjson.dumps(value, default=_encode_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _etag_matches(etag: str, if_none_match: str):
+    """``If-None-Match`` check: ``*`` or any listed tag equal to ``etag`` (weak comparison)."""
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+
+def _accepts_gzip(accept_encoding: str):
+    """Whether ``Accept-Encoding`` allows gzip, honouring q-values (``gzip;q=0`` refuses it)."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip().lower()] = weight
+    return weights.get("gzip", weights.get("*", 0.0)) > 0
+
+class EncodedPayload:
+    """A payload serialized once with orjson, plus a gzip-compressed copy and a content ETag."""
+    __slots__ = ("body", "gzipped", "etag", "version")
+
+    def __init__(self, value, version: int = 0, body=None, gzipped=None):
+        """:param body: ``value`` already encoded (e.g. mapped from the shared store), with its ``gzipped`` copy."""
+        self.body = _encode(value) if body is None else body
+        if gzipped is None and len(self.body) >= GZIP_MIN_BYTES:
+            gzipped = gzip.compress(self.body, compresslevel=6)
+        self.gzipped = gzipped
+        # Weak, since the gzip and identity bodies share it.
+        self.etag = 'W/"%s"' % hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self.version = version
+
+    def headers(self):
+        return {"ETag": self.etag, "X-Snapshot-Version": str(self.version), "Vary": "Accept-Encoding"}
+
+    def response(self, accept_encoding: str = "", if_none_match: str = None):
+        """Raw JSON response (304 if the client already has it); no validation or encoding happens per request."""
+        if if_none_match and _etag_matches(self.etag, if_none_match):
+            return Response(status_code=304, headers=self.headers())
+        if self.gzipped is not None and accept_encoding and _accepts_gzip(accept_encoding):
+            return Response(self.gzipped, media_type="application/json",
+                            headers={**self.headers(), "Content-Encoding": "gzip"})
+        return Response(self.body, media_type="application/json", headers=self.headers())
+
+class SWRCache:
+    """
+    Stale-while-revalidate cache for one expensive async value.
+
+    - Empty cache: callers wait for a load; concurrent callers share it.
+    - Fresh value: returned as is.
+    - Older than ``refresh_ahead`` x ``ttl``: returned as is and a background
+      refresh starts, so hot keys are renewed before they expire.
+    - Expired value: the last good payload is still returned at once while a
+      background refresh runs.
+
+    Only one refresh runs at a time (single flight). A failed background
+    refresh keeps the previous payload.
+
+    Each refresh also serializes the payload once (``encoded``), so
+    ``response`` can answer a hit with prebuilt bytes. A refresh whose
+    content differs from the last one gets a new ``version``; for list
+    payloads with a ``key`` (e.g. "id"), the rows whose ``diff_fields``
+    changed are kept in a small ring buffer so ``response(since=...)`` can
+    send only those.
+
+    With a ``shared`` store (see ``backend.utils.shared``) the payload is
+    published under ``name`` for other worker processes: a refresh first
+    takes a fresh enough payload another worker published, and otherwise
+    holds the key's lock while loading, so one worker calls upstream and
+    the rest read its bytes (and version) from the shared mapping.
+    """
+
+    def __init__(self, loader, ttl: float = 300, refresh_ahead: float = 0.8, name: str = "cache",
+                 key: str = None, diff_fields=None, history: int = DELTA_HISTORY, shared=None):
+        self.loader = loader
+        self.shared = shared
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.name = name
+        self.key = key
+        self.diff_fields = tuple(diff_fields) if diff_fields else None
+        self.value = None
+        self.encoded = None
+        self.version = 0
+        self._diffs = deque(maxlen=history)  # (from version, version, changed keys, removed keys, order changed)
+        self.loaded_at = 0.0
+        self._task = None
+        self._task_generation = 0
+        self._generation = 0
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "coalesced_waits": 0,
+            "not_modified": 0,
+            "delta_responses": 0,
+            "shared_adopted": 0,
+            "shared_waits": 0,
+            "last_refresh_seconds": 0.0,
+        }
+
+    @property
+    def has_value(self):
+        return self.loaded_at > 0
+
+    def age(self):
+        return time.time() - self.loaded_at if self.has_value else None
+
+    async def get(self):
+        """Return the cached payload, loading or refreshing it as needed."""
+        if not self.has_value:
+            self.stats["misses"] += 1
+            return await self._wait_for_refresh()
+
+        age = self.age()
+        if age >= self.ttl:
+            self.stats["stale_hits"] += 1
+            self._start_refresh()
+        else:
+            self.stats["hits"] += 1
+            if age >= self.ttl * self.refresh_ahead:
+                self._start_refresh()
+        return self.value
+
+    async def response(self, accept_encoding: str = "", if_none_match: str = None, since: int = None):
+        """
+        Like ``get`` but returns the pre-serialized payload as a raw (optionally gzipped) JSON response.
+        :param if_none_match: The client's If-None-Match header; a matching ETag gets a 304.
+        :param since: A ``version`` the client already has; answered with
+            ``{"version", "since", "changed", "removed"[, "order"]}`` holding only the rows that changed, or
+            ``{"version", "full": true, "data"}`` when that version is no longer in the ring buffer.
+        """
+        value = await self.get()
+        encoded = self.encoded if self.value is value and self.encoded is not None else EncodedPayload(value)
+        if since is None:
+            response = encoded.response(accept_encoding, if_none_match)
+            if response.status_code == 304:
+                self.stats["not_modified"] += 1
+            return response
+        delta = self.changes_since(since) if encoded is self.encoded else None
+        if delta is None:
+            body = _encode({"version": encoded.version, "full": True, "data": orjson.Fragment(bytes(encoded.body))})
+        else:
+            self.stats["delta_responses"] += 1
+            body = _encode(delta)
+        return Response(body, media_type="application/json", headers=encoded.headers())
+
+    def changes_since(self, since: int):
+        """
+        Rows changed between version ``since`` and now.
+        :return: The delta dict, or None if ``since`` is not covered by the ring buffer.
+        """
+        if since == self.version:
+            return {"version": self.version, "since": since, "changed": [], "removed": []}
+        if self.key is None or not self._diffs or not self._diffs[0][0] <= since < self.version:
+            return None
+        changed, removed, order_changed = set(), set(), False
+        for _, version, keys, gone, reordered in self._diffs:
+            if version > since:
+                changed |= keys
+                removed |= gone
+                order_changed = order_changed or reordered
+        rows = {row.get(self.key): row for row in self.value}
+        delta = {
+            "version": self.version,
+            "since": since,
+            "changed": [rows[k] for k in rows if k in changed],
+            "removed": sorted(k for k in removed if k not in rows),
+        }
+        if order_changed:
+            delta["order"] = list(rows)
+        return delta
+
+    async def refresh(self):
+        """Force a refresh (joining one already in flight) and return the new payload."""
+        return await self._wait_for_refresh()
+
+    def invalidate(self):
+        """
+        Drop the payload; a refresh already in flight will not repopulate it.
+        That refresh keeps running (it is not dropped), and the next one waits for it.
+        """
+        self._generation += 1
+        self.value = None
+        self.encoded = None
+        self.loaded_at = 0.0
+        self._diffs.clear()
+
+    def metrics(self):
+        lookups = self.stats["hits"] + self.stats["stale_hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round((self.stats["hits"] + self.stats["stale_hits"]) / lookups, 6) if lookups else 0.0,
+            "age_seconds": round(self.age(), 3) if self.has_value else None,
+            "refreshing": self._task is not None and not self._task.done(),
+            "version": self.version,
+            "payload_bytes": len(self.encoded.body) if self.encoded else None,
+            "gzip_bytes": len(self.encoded.gzipped) if self.encoded and self.encoded.gzipped else None,
+        }
+
+    async def _wait_for_refresh(self):
+        task = self._start_refresh()
+        if task is None:
+            return self.value
+        # Shield so one cancelled request does not cancel the shared refresh.
+        return await asyncio.shield(task)
+
+    def _start_refresh(self):
+        previous = None
+        if self._task is not None and not self._task.done():
+            if self._task_generation == self._generation:
+                self.stats["coalesced_waits"] += 1
+                return self._task
+            # Invalidated mid-refresh: queue a fresh refresh behind it, so loaders never overlap.
+            previous = self._task
+        self._task = asyncio.get_running_loop().create_task(self._run_refresh(self._generation, previous))
+        self._task_generation = self._generation
+        # Background refreshes may finish with nobody awaiting them; mark their errors as seen.
+        self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._task
+
+    async def _run_refresh(self, generation: int, previous=None):
+        if previous is not None:
+            await asyncio.wait([previous])
+        started = time.time()
+        self.stats["refreshes"] += 1
+        try:
+            value, encoded, version = await self._load()
+        except Exception as e:
+            self.stats["refresh_failures"] += 1
+            logger.warning("%s refresh failed: %s", self.name, e)
+            if not self.has_value:
+                raise
+            return self.value
+        finally:
+            self.stats["last_refresh_seconds"] = round(time.time() - started, 3)
+        if generation == self._generation:
+            self._store(value, encoded, version)
+        return value
+
+    async def _load(self):
+        """:return: ``(value, encoded or None, version or None)``, from the loader or the shared store."""
+        if self.shared is None:
+            return await self.loader(), None, None
+        adopted = self._adopt()
+        if adopted is not None:
+            return adopted
+        lock = self.shared.lock(self.name)
+        if not lock.acquire(blocking=False):
+            # Another worker is refreshing; wait for it off the event loop, then take its result.
+            self.stats["shared_waits"] += 1
+            await run_blocking(lock.acquire)
+        try:
+            adopted = self._adopt()
+            if adopted is not None:
+                return adopted
+            value = await self.loader()
+            encoded = EncodedPayload(value)
+            record = self.shared.read(self.name)
+            version = self.version
+            if record is not None:
+                version = max(version, int(bytes(record[1][2])))
+            if record is None or record[1][0] != encoded.body:
+                version += 1
+            self.shared.write(self.name, encoded.body, encoded.gzipped or b"", str(version).encode())
+            return value, encoded, version
+        finally:
+            lock.release()
+
+    def _adopt(self):
+        """The payload another worker published since our last load, unless it is itself due for a refresh."""
+        record = self.shared.read(self.name)
+        if record is None:
+            return None
+        written_at, (body, gzipped, version) = record
+        if written_at <= self.loaded_at or time.time() - written_at >= self.ttl * self.refresh_ahead:
+            return None
+        self.stats["shared_adopted"] += 1
+        value = orjson.loads(body)
+        return value, EncodedPayload(value, body=body, gzipped=gzipped or None), int(bytes(version))
+
+    def _store(self, value, encoded=None, version=None):
+        encoded = encoded or EncodedPayload(value)
+        changed = self.encoded is None or encoded.etag != self.encoded.etag
+        if version is None:
+            version = self.version + 1 if changed else self.version
+        if changed:
+            self._record_diff(self.value, self.version, version, value)
+        self.version = encoded.version = version
+        self.value = value
+        self.encoded = encoded
+        self.loaded_at = time.time()
+
+    def _record_diff(self, previous, previous_version, version, value):
+        if self.key is None or not isinstance(previous, list) or not isinstance(value, list):
+            self._diffs.clear()
+            return
+        fields = self.diff_fields
+        before = {row.get(self.key): row for row in previous}
+        changed = set()
+        for row in value:
+            k = row.get(self.key)
+            old = before.get(k)
+            if old is None or (any(old.get(f) != row.get(f) for f in fields) if fields else old != row):
+                changed.add(k)
+        after_keys = [row.get(self.key) for row in value]
+        removed = set(before) - set(after_keys)
+        self._diffs.append(
+            (previous_version, version, frozenset(changed), frozenset(removed), list(before) != after_keys)
+        )
@@ -1,12 +1,131 @@
-import requests
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from fastapi import HTTPException
+from backend.utils import http_client, lazy
 
-COINGECKO_API = "https://api.coingecko.com/api/v3/simple/price"
+requests = lazy.LazyModule("requests")
 
-def get_price_from_api(coin_id: str):
-    try:
-        response = requests.get(f"{COINGECKO_API}?ids={coin_id}&vs_currencies=usd", timeout=10)
+logger = logging.getLogger(__name__)
+
+# Point this at a local stand-in (see backend/utils/replay.py) to run without the real API.
+COINGECKO_BASE_URL = os.getenv("COINGECKO_BASE_URL", "https://api.coingecko.com/api/v3").rstrip("/")
+COINGECKO_API = f"{COINGECKO_BASE_URL}/simple/price"
+
+# How long to collect lookups before sending one upstream call.
+PRICE_BATCH_WINDOW = float(os.getenv("HODLBOT_PRICE_BATCH_MS", "15")) / 1000
+# How long a fetched price is served without asking upstream again.
+PRICE_TTL = float(os.getenv("HODLBOT_PRICE_TTL", "10"))
+# simple/price rejects very long id lists; larger batches are split.
+MAX_IDS_PER_CALL = 250
+
+class PriceBatcher:
+    """
+    Coalesces concurrent spot-price lookups into batched ``simple/price`` calls.
+
+    Ids that are not cached are queued; the first one queued opens a short
+    window, and when it closes every queued id goes upstream in one
+    comma-separated request. Each caller then picks its own ids out of the
+    shared response. Results are cached for ``ttl`` seconds.
+    """
+
+    def __init__(self, window: float = PRICE_BATCH_WINDOW, ttl: float = PRICE_TTL, vs_currency: str = "usd"):
+        self.window = window
+        self.ttl = ttl
+        self.vs_currency = vs_currency
+        self._cache = {}  # coin id -> (fetched_at, quote dict)
+        self._pending = {}  # coin id -> Future shared by everyone waiting on that id
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.stats = {"lookups": 0, "cache_hits": 0, "upstream_calls": 0, "ids_fetched": 0}
+
+    def subscribe(self, callback):
+        """Call ``callback(quotes)`` with every fresh ``simple/price`` payload (e.g. to mark positions to market)."""
+        self._listeners.append(callback)
+
+    def get_prices(self, coin_ids, timeout: float = 15):
+        """
+        Return ``{coin_id: {"usd": price}}`` for the requested ids, like ``simple/price`` does.
+        Unknown ids are left out. Upstream errors are raised to every caller in the batch,
+        and a batch that takes longer than ``timeout`` raises ``requests.exceptions.Timeout``.
+        """
+        now = time.monotonic()
+        result = {}
+        waiting = {}
+        with self._lock:
+            for coin_id in dict.fromkeys(coin_ids):
+                self.stats["lookups"] += 1
+                cached = self._cache.get(coin_id)
+                if cached is not None and now - cached[0] < self.ttl:
+                    self.stats["cache_hits"] += 1
+                    if cached[1] is not None:
+                        result[coin_id] = cached[1]
+                    continue
+                future = self._pending.get(coin_id)
+                if future is None:
+                    if not self._pending:
+                        timer = threading.Timer(self.window, self._flush)
+                        timer.daemon = True
+                        timer.start()
+                    future = self._pending[coin_id] = Future()
+                waiting[coin_id] = future
+
+        deadline = time.monotonic() + timeout
+        for coin_id, future in waiting.items():
+            try:
+                quote = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                raise requests.exceptions.Timeout(f"Price batch for {coin_id} timed out after {timeout}s") from None
+            if quote is not None:
+                result[coin_id] = quote
+        return result
+
+    def invalidate(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        ids = list(pending)
+        for start in range(0, len(ids), MAX_IDS_PER_CALL):
+            chunk = ids[start:start + MAX_IDS_PER_CALL]
+            try:
+                data = self._fetch(chunk)
+            except Exception as e:
+                for coin_id in chunk:
+                    pending[coin_id].set_exception(e)
+                continue
+            fetched_at = time.monotonic()
+            with self._lock:
+                for coin_id in chunk:
+                    # Unknown ids are cached as None so a typo does not hit upstream on every call.
+                    self._cache[coin_id] = (fetched_at, data.get(coin_id))
+            for coin_id in chunk:
+                pending[coin_id].set_result(data.get(coin_id))
+            for callback in self._listeners:
+                try:
+                    callback(data)
+                except Exception:
+                    logger.exception("price listener failed")
+
+    def _fetch(self, coin_ids):
+        self.stats["upstream_calls"] += 1
+        self.stats["ids_fetched"] += len(coin_ids)
+        response = http_client.get(
+            COINGECKO_API, params={"ids": ",".join(coin_ids), "vs_currencies": self.vs_currency}, timeout=10
+        )
         response.raise_for_status()
         return response.json()
+
+price_batcher = PriceBatcher()
+
+def get_price_from_api(coin_id: str):
+    """Spot prices for one coin id or a comma-separated list, in the ``simple/price`` response shape."""
+    ids = [c.strip() for c in coin_id.split(",") if c.strip()]
+    try:
+        return price_batcher.get_prices(ids)
     except requests.exceptions.RequestException as e:
         raise HTTPException(status_code=500, detail=f"Error fetching price from API: {e}")
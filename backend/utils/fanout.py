@@ -0,0 +1,54 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from backend.utils.http_client import BULK_CONCURRENCY, FETCH_CONCURRENCY
+
+# Dedicated pool so a cold /coins build never starves FastAPI's own threadpool.
+_executor = ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="fanout")
+# History refreshes (BULK priority) get their own smaller pool: while they queue for the
+# upstream rate budget they hold these threads, not the ones interactive work runs on.
+_bulk_executor = ThreadPoolExecutor(max_workers=BULK_CONCURRENCY, thread_name_prefix="fanout-bulk")
+
+async def run_blocking(func, *args, bulk: bool = False):
+    """Run a blocking callable on the fan-out pool (the bulk pool for history fetches)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bulk_executor if bulk else _executor, func, *args)
+
+async def bounded_gather(func, items, limit: int = None, bulk: bool = False):
+    """
+    Call the blocking ``func(item)`` for every item with at most ``limit`` calls in flight.
+    :param bulk: Run on the bulk pool; use it for anything that fetches price histories.
+    :return: Results in input order; failed calls are returned as their exception.
+    """
+    semaphore = asyncio.Semaphore(limit or (BULK_CONCURRENCY if bulk else FETCH_CONCURRENCY))
+
+    async def run(item):
+        async with semaphore:
+            return await run_blocking(func, item, bulk=bulk)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+
+async def attach_batch_trade_indicators(coins, fetch_history, decide_batch, limit: int = None):
+    """
+    Fetch every coin's history concurrently, then decide for all of them in one batch call.
+    :param fetch_history: Blocking ``fetch_history(coin_id)`` returning a PriceSeries, or None.
+    :param decide_batch: Callable taking a list of price arrays and returning one decision dict per array.
+    """
+    histories = await bounded_gather(fetch_history, [coin["id"] for coin in coins], limit, bulk=True)
+    ready = []
+    for coin, history in zip(coins, histories):
+        if isinstance(history, Exception):
+            coin["trade_indicator"] = {"decision": "ERROR", "error": str(history)}
+        elif history is None or history.empty:
+            coin["trade_indicator"] = {"error": "No price data available"}
+        else:
+            ready.append((coin, history.prices))
+
+    if ready:
+        try:
+            # The batch pass is CPU-bound; keep it off the event loop.
+            decisions = await run_blocking(decide_batch, [prices for _, prices in ready])
+        except Exception as e:
+            decisions = [{"decision": "ERROR", "error": str(e)} for _ in ready]
+        for (coin, _), decision in zip(ready, decisions):
+            coin["trade_indicator"] = decision
+    return coins
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+import os
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# Seconds between producer polls while anyone is subscribed.
+FEED_INTERVAL = float(os.getenv("HODLBOT_FEED_INTERVAL", "10"))
+# Most coins one connection may follow; every subscribed coin costs a decision per poll.
+MAX_SUBSCRIBED_COINS = int(os.getenv("HODLBOT_FEED_MAX_COINS", "50"))
+
+class Subscriber:
+    """
+    One open dashboard. Pending updates are kept per (coin, kind), so a slow
+    client skips straight to the latest value instead of queueing a backlog.
+    """
+
+    def __init__(self):
+        self.coins = set()
+        self._pending = {}
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def push(self, key, message: str):
+        self._pending[key] = message
+        self._ready.set()
+
+    async def next_batch(self):
+        """Wait for updates and return them as encoded JSON strings."""
+        await self._ready.wait()
+        self._ready.clear()
+        messages, self._pending = list(self._pending.values()), {}
+        return messages
+
+class FeedHub:
+    """
+    Single producer, many subscribers.
+
+    ``publish`` drops values equal to the last one sent for that coin and
+    kind, encodes a change once, and hands the same string to every
+    subscriber of that coin, so the cost of an update does not depend on how
+    many dashboards are open. The polling producer only runs while someone
+    is subscribed, and only for the union of subscribed coins.
+
+    Clients subscribe through ``subscribe_known``, which keeps only names
+    ``known_coins`` lists and at most ``max_coins`` per connection, so a
+    client cannot make the producer poll arbitrary ids.
+    """
+
+    def __init__(self, interval: float = FEED_INTERVAL, max_coins: int = MAX_SUBSCRIBED_COINS):
+        self.interval = interval
+        self.max_coins = max_coins
+        self.producer = None  # async callable: coins -> {"price": {...}, "decision": {...}}
+        self.known_coins = None  # async callable: () -> collection of coin ids clients may subscribe to
+        self._by_coin = defaultdict(set)
+        self._subscribers = set()
+        self._last = {}
+        self._task = None
+        self._loop = None
+        self.stats = {"published": 0, "suppressed": 0, "deliveries": 0, "polls": 0, "rejected": 0}
+
+    def connect(self):
+        subscriber = Subscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def disconnect(self, subscriber):
+        subscriber.closed = True
+        self._subscribers.discard(subscriber)
+        self.unsubscribe(subscriber, list(subscriber.coins))
+
+    def subscribe(self, subscriber, coins):
+        """Add coins to a subscription and immediately queue their latest known values."""
+        for coin in coins:
+            subscriber.coins.add(coin)
+            self._by_coin[coin].add(subscriber)
+            for kind in ("price", "decision"):
+                message = self._last.get((coin, kind))
+                if message is not None:
+                    subscriber.push((coin, kind), message[1])
+        self._ensure_producer()
+
+    async def subscribe_known(self, subscriber, coins):
+        """
+        ``subscribe`` to the coins in a client request that ``known_coins`` lists, up to ``max_coins`` in all.
+        :return: The coins actually added.
+        """
+        names = [coin for coin in coins if isinstance(coin, str)] if isinstance(coins, (list, tuple)) else []
+        requested = candidates = [coin for coin in dict.fromkeys(names) if coin not in subscriber.coins]
+        if requested and self.known_coins is not None:
+            try:
+                known = await self.known_coins()
+            except Exception as e:
+                logger.warning("feed subscription check failed: %s", e)
+                known = ()
+            requested = [coin for coin in requested if coin in known]
+        added = requested[:max(0, self.max_coins - len(subscriber.coins))]
+        self.stats["rejected"] += len(candidates) - len(added)
+        if added:
+            self.subscribe(subscriber, added)
+        return added
+
+    def unsubscribe(self, subscriber, coins):
+        for coin in coins:
+            subscriber.coins.discard(coin)
+            members = self._by_coin.get(coin)
+            if members is not None:
+                members.discard(subscriber)
+                if not members:
+                    del self._by_coin[coin]
+
+    def coins(self):
+        return list(self._by_coin)
+
+    def publish(self, coin: str, kind: str, data):
+        """Send ``data`` to subscribers of ``coin`` if it differs from the last value published."""
+        key = (coin, kind)
+        previous = self._last.get(key)
+        if previous is not None and previous[0] == data:
+            self.stats["suppressed"] += 1
+            return False
+        message = json.dumps({"type": kind, "coin": coin, "data": data})
+        self._last[key] = (data, message)
+        self.stats["published"] += 1
+        for subscriber in self._by_coin.get(coin, ()):
+            subscriber.push(key, message)
+            self.stats["deliveries"] += 1
+        return True
+
+    def publish_threadsafe(self, coin: str, kind: str, data):
+        """``publish`` from a worker thread (e.g. a price fetch finishing on the fan-out pool)."""
+        if self._loop is not None and not self._loop.is_closed() and coin in self._by_coin:
+            self._loop.call_soon_threadsafe(self.publish, coin, kind, data)
+
+    def metrics(self):
+        return {**self.stats, "subscribers": len(self._subscribers), "coins": len(self._by_coin)}
+
+    async def poll_once(self):
+        coins = self.coins()
+        if not coins or self.producer is None:
+            return
+        self.stats["polls"] += 1
+        updates = await self.producer(coins)
+        for kind, values in updates.items():
+            for coin, data in values.items():
+                self.publish(coin, kind, data)
+
+    def _ensure_producer(self):
+        self._loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not self._loop:
+            self._task = self._loop.create_task(self._run())
+
+    async def _run(self):
+        while self._by_coin:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.warning("feed poll failed: %s", e)
+            await asyncio.sleep(self.interval)
+
+hub = FeedHub()
@@ -0,0 +1,207 @@
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from backend.utils import lazy, replay
+# Imported by name: this module's own metrics() reports the client's counters.
+from backend.utils.metrics import STAGES_ENABLED, stage, stage_seconds
+
+requests = lazy.LazyModule("requests")
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of upstream requests allowed in flight at once.
+FETCH_CONCURRENCY = int(os.getenv("HODLBOT_FETCH_CONCURRENCY", "16"))
+# Threads for bulk history fetches (see backend.utils.fanout); kept apart so they never hold every fetch thread.
+BULK_CONCURRENCY = int(os.getenv("HODLBOT_BULK_CONCURRENCY", "8"))
+# Upstream budget shared by every caller (0 disables it; a 429 still pauses everyone).
+# 120/min keeps the 24 fetch threads from bursting past CoinGecko while a cold /coins build
+# (~100 histories plus the markets call) still finishes in under a minute.
+RATE_LIMIT_PER_MINUTE = float(os.getenv("HODLBOT_RATE_LIMIT", "120"))
+RATE_LIMIT_BURST = int(os.getenv("HODLBOT_RATE_BURST", "10"))
+MAX_RETRIES = int(os.getenv("HODLBOT_HTTP_RETRIES", "3"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+
+# Priority lanes: lower goes first when callers queue for the budget.
+INTERACTIVE = 0  # user-facing lookups (spot prices, coin listing)
+BULK = 1  # background history refreshes
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class RateLimiter:
+    """
+    Token bucket shared across threads, with priority-ordered waiters.
+
+    Tokens refill at ``rate_per_minute`` up to ``burst``. Callers queue in
+    (priority, arrival) order, so a bulk refresh never takes a token while an
+    interactive request is waiting. ``pause`` empties the bucket for a while,
+    which is how a 429 slows every caller down, not just the one that got it.
+    """
+
+    def __init__(self, rate_per_minute: float = RATE_LIMIT_PER_MINUTE, burst: int = RATE_LIMIT_BURST):
+        self.rate = rate_per_minute / 60
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, priority: int = INTERACTIVE):
+        """Block until this caller may send a request. :return: Seconds spent waiting."""
+        if self.rate <= 0:
+            return self._wait_out_pause()
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == ticket and now >= self.paused_until and self.tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self.tokens -= 1
+                        self._cond.notify_all()
+                        return now - start
+                    wait = max(self.paused_until - now, (1 - self.tokens) / self.rate, 0.001)
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                if ticket in self._waiters:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._cond.notify_all()
+                raise
+
+    def pause(self, seconds: float):
+        """Hold every caller for ``seconds`` (e.g. after a 429)."""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+
+    def _wait_out_pause(self):
+        """No budget to share, but a 429 still holds every caller until the pause ends."""
+        with self._cond:
+            start = now = time.monotonic()
+            while now < self.paused_until:
+                self._cond.wait(timeout=self.paused_until - now)
+                now = time.monotonic()
+            return now - start
+
+    def queued(self):
+        with self._cond:
+            return len(self._waiters)
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+def _build_session(pool_size: int):
+    """Create a keep-alive session whose connection pool fits the fan-out limit."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+# One client and one budget shared by every upstream call site. The session
+# (and with it requests) is created on first use; read it as ``http_client.session``.
+_session = None
+_session_lock = threading.Lock()
+limiter = RateLimiter()
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(FETCH_CONCURRENCY + BULK_CONCURRENCY)
+    return _session
+
+def __getattr__(name):
+    if name == "session":
+        return _get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_stats_lock = threading.Lock()
+stats = {
+    "requests": 0,
+    "retries": 0,
+    "throttled": 0,
+    "errors": 0,
+    "queued": 0,
+    "queue_wait_seconds": 0.0,
+    "max_queue_wait_seconds": 0.0,
+}
+
+def _count(name, amount=1):
+    with _stats_lock:
+        stats[name] += amount
+
+def _backoff(attempt: int, response=None):
+    """Full-jitter exponential backoff, stretched to honour a numeric Retry-After header."""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, min(BACKOFF_CAP, float(retry_after)))
+    return delay
+
+def get(url: str, params: dict = None, timeout: float = 10, priority: int = INTERACTIVE, retries: int = MAX_RETRIES):
+    """
+    GET through the shared session, within the shared rate budget.
+    429s, 5xx responses and connection errors are retried with jittered backoff;
+    the last response (or error) is returned (or raised) for the caller to handle.
+    """
+    with stage("upstream_fetch"):
+        return _get(url, params, timeout, priority, retries)
+
+def _get(url, params, timeout, priority, retries):
+    for attempt in range(retries + 1):
+        waited = limiter.acquire(priority)
+        if STAGES_ENABLED:
+            stage_seconds.observe(waited, "upstream_queue_wait")
+        if waited > 0:
+            with _stats_lock:
+                stats["queued"] += 1
+                stats["queue_wait_seconds"] += waited
+                stats["max_queue_wait_seconds"] = max(stats["max_queue_wait_seconds"], waited)
+        _count("requests")
+        try:
+            response = _get_session().get(url, params=params, timeout=timeout)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            _count("errors")
+            if attempt == retries:
+                raise
+            _count("retries")
+            time.sleep(_backoff(attempt))
+            continue
+
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            if response.status_code == 429:
+                _count("throttled")
+            elif response.status_code == 200 and replay.RECORD_DIR:
+                try:
+                    replay.record(url, params, response.json())
+                except Exception as e:  # recording is a side channel; never fail the caller over it
+                    logger.warning("recording %s failed: %s", url, e)
+            return response
+        delay = _backoff(attempt, response)
+        if response.status_code == 429:
+            _count("throttled")
+            limiter.pause(delay)
+        _count("retries")
+        time.sleep(delay)
+
+def metrics():
+    with _stats_lock:
+        snapshot = dict(stats)
+    snapshot["queue_wait_seconds"] = round(snapshot["queue_wait_seconds"], 3)
+    snapshot["max_queue_wait_seconds"] = round(snapshot["max_queue_wait_seconds"], 3)
+    snapshot["waiting"] = limiter.queued()
+    snapshot["tokens"] = round(limiter.tokens, 3)
+    return snapshot
@@ -0,0 +1,68 @@
+import importlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# -------------------------------
+# Deferred imports
+# -------------------------------
+# numpy, pandas, ta and requests take longer to import than the rest of the
+# API, so modules bind them as LazyModule stand-ins and the process can answer
+# /health before any of them is loaded. ``warm_up`` imports them in a
+# background thread once the server is up, so the first real request does
+# not pay for them either.
+HEAVY_MODULES = ("numpy", "requests", "pandas", "ta")
+# Set HODLBOT_WARMUP=0 to skip the background import (e.g. for short-lived tools).
+WARMUP = os.getenv("HODLBOT_WARMUP", "1") != "0"
+
+# Seconds spent importing each module loaded through this file, for /health/startup.
+import_seconds = {}
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str, hint: str = None):
+        self.__dict__["_name"] = name
+        self.__dict__["_hint"] = hint
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = self.__dict__["_module"] = load(self._name, self._hint)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_module"] is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+def load(name: str, hint: str = None):
+    """Import ``name`` (timed), raising ImportError with ``hint`` if it is missing."""
+    started = time.perf_counter()
+    try:
+        module = importlib.import_module(name)
+    except ImportError as e:
+        if hint:
+            raise ImportError(hint) from e
+        raise
+    import_seconds.setdefault(name, round(time.perf_counter() - started, 6))
+    return module
+
+def warm_up(names=HEAVY_MODULES):
+    """Import ``names`` in a daemon thread. :return: The thread (already started)."""
+    def run():
+        for name in names:
+            try:
+                load(name)
+            except ImportError as e:
+                logger.warning("warm-up import of %s failed: %s", name, e)
+
+    thread = threading.Thread(target=run, name="import-warmup", daemon=True)
+    thread.start()
+    return thread
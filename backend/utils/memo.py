@@ -0,0 +1,185 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Defaults sized for a few thousand coins' 14-day hourly histories.
+MEMO_MAX_ENTRIES = int(os.getenv("HODLBOT_MEMO_MAX_ENTRIES", "4096"))
+MEMO_MAX_BYTES = int(os.getenv("HODLBOT_MEMO_MAX_BYTES", str(64 * 1024 * 1024)))
+
+def estimate_size(value):
+    """Rough in-memory size of a cached value in bytes."""
+    if hasattr(value, "memory_usage"):  # pandas DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes"):  # numpy arrays, PriceSeries
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+class _Flight:
+    """A computation in progress that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class MemoCache:
+    """
+    Thread-safe memo table with per-entry TTL, LRU eviction and a memory cap.
+
+    ``get_or_compute`` runs the computation at most once per key at a time:
+    threads asking for a key that is already being computed wait for that
+    result instead of repeating the work. ``invalidate`` drops everything,
+    including results of computations still in flight.
+
+    With a ``shared`` store (see ``backend.utils.shared``), calls made with
+    ``shared=True`` also go through it, so other worker processes reuse the
+    result instead of computing it again. ``invalidate`` also discards the
+    shared records this process looked up or published.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = MEMO_MAX_ENTRIES, max_bytes: int = MEMO_MAX_BYTES,
+                 name: str = "memo", shared=None):
+        self.ttl = ttl
+        self.shared = shared
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.name = name
+        self._entries = OrderedDict()  # key -> (expires_at, size, value), least recently used first
+        self._inflight = {}
+        self._shared_keys = {}  # key -> shared store key, for invalidate
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced_waits": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return default
+            self.stats["hits"] += 1
+            return entry[2]
+
+    def set(self, key, value, ttl: float = None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def get_or_compute(self, key, compute, ttl: float = None, cacheable=None, shared: bool = False):
+        """
+        Return the cached value for ``key`` or compute, store and return it.
+        :param compute: Zero-argument callable producing the value.
+        :param ttl: Lifetime for this entry; defaults to the cache TTL.
+        :param cacheable: Optional predicate; values it rejects are returned but not stored.
+        :param shared: Look the key up in (and publish it to) the cross-worker store, if one is configured.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry[2]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                generation = self._generation
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced_waits"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            if shared and self.shared is not None:
+                shared_key = f"{self.name}:{key!r}"
+                with self._lock:
+                    self._shared_keys[key] = shared_key
+                flight.value = self.shared.get_or_compute(
+                    shared_key, compute, self.ttl if ttl is None else ttl, cacheable
+                )
+            else:
+                flight.value = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        except BaseException:
+            # Interrupted (KeyboardInterrupt, SystemExit): nothing to cache, and waiters must not see a None result.
+            flight.error = RuntimeError(f"{self.name}: computing {key!r} was interrupted")
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                if (flight.error is None and generation == self._generation
+                        and (cacheable is None or cacheable(flight.value))):
+                    self._store(key, flight.value, ttl)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, predicate=None):
+        """Drop all entries, or only those whose key matches ``predicate``."""
+        with self._lock:
+            self.stats["invalidations"] += 1
+            if predicate is None:
+                self._generation += 1
+                self._entries.clear()
+                self._inflight.clear()
+                self._bytes = 0
+                shared_keys = list(self._shared_keys.values())
+                self._shared_keys.clear()
+            else:
+                for key in [k for k in self._entries if predicate(k)]:
+                    self._remove(key)
+                shared_keys = [self._shared_keys.pop(k) for k in [k for k in self._shared_keys if predicate(k)]]
+        if self.shared is not None:
+            for shared_key in shared_keys:
+                self.shared.discard(shared_key)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_ratio": round(self.stats["hits"] / lookups, 6) if lookups else 0.0,
+            }
+
+    # Callers below hold self._lock.
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self.stats["expirations"] += 1
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, value, ttl):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), size, value)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.stats["evictions"] += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
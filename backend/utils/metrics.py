@@ -0,0 +1,235 @@
+import bisect
+import os
+import threading
+import time
+
+# -------------------------------
+# Hot-path instrumentation (Prometheus text format)
+# -------------------------------
+# Latency histograms per endpoint and per pipeline stage, plus the counters
+# the caches and the upstream client already keep, rendered for a Prometheus
+# scrape at /metrics. An observation is a bisect into fixed buckets and a few
+# integer increments under a lock, so it is safe to leave on in production.
+#
+#   HODLBOT_METRICS=full   endpoint and stage histograms (default)
+#   HODLBOT_METRICS=basic  endpoint histograms only; stage timers become no-ops
+#   HODLBOT_METRICS=off    nothing is recorded; /metrics only reports the collectors
+#
+# Each worker process keeps its own numbers; Prometheus scrapes them per target.
+METRICS_MODE = os.getenv("HODLBOT_METRICS", "full").lower()
+ENDPOINTS_ENABLED = METRICS_MODE in ("full", "basic")
+STAGES_ENABLED = METRICS_MODE == "full"
+
+# Seconds; spans a cached /coins hit (~100 us) to a slow upstream call with retries.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Fixed-bucket latency histogram, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += seconds
+
+    def time(self, *labels):
+        """Context manager observing the wall time of its block."""
+        return _Timer(self, labels)
+
+    def snapshot(self, *labels):
+        """:return: ``{"count", "sum", "buckets": {le: cumulative count}}`` for one label combination."""
+        with self._lock:
+            series = list(self._series.get(labels, [0] * (len(self.buckets) + 1) + [0.0]))
+        cumulative, total = {}, 0
+        for le, count in zip(self.buckets + (float("inf"),), series[:-1]):
+            total += count
+            cumulative[le] = total
+        return {"count": total, "sum": series[-1], "buckets": cumulative}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            total = 0
+            for le, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                total += count
+                bucket = 'le="' + _number(le) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, bucket)} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {total}")
+        return lines
+
+class Counter:
+    """Monotonic counter, one value per label combination."""
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items)
+        return lines
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+_NO_TIMER = _NoTimer()
+
+request_seconds = Histogram(
+    "hodlbot_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "endpoint")
+)
+requests_total = Counter(
+    "hodlbot_http_requests_total", "HTTP responses by route template and status code.", ("method", "endpoint", "status")
+)
+stage_seconds = Histogram(
+    "hodlbot_stage_duration_seconds",
+    "Time spent in one stage of the decision pipeline (upstream fetch, history build, indicators, decision).",
+    ("stage",),
+)
+
+def stage(name: str):
+    """``with stage("indicator_rsi"): ...`` records the block in ``stage_seconds`` (a no-op unless mode is full)."""
+    return _Timer(stage_seconds, (name,)) if STAGES_ENABLED else _NO_TIMER
+
+# -------------------------------
+# Collectors: counters other modules already keep
+# -------------------------------
+# name -> callable returning {metric suffix: number}; read only when /metrics is scraped.
+_collectors = {}
+
+def register_collector(name: str, collect):
+    """
+    Export ``collect()`` (a flat dict of numbers, e.g. a cache's ``metrics()``) on every scrape.
+    Levels (ratios, sizes, ``max_``/``last_`` values, ...) become gauges; everything else is a counter.
+    """
+    _collectors[name] = collect
+
+# Stats that are levels rather than running totals.
+_GAUGE_KEYS = {"entries", "bytes", "waiting", "tokens", "version", "mapped_keys", "subscribers", "coins", "refreshing",
+               "age_seconds"}
+
+def _collected_lines():
+    gauges, counters = {}, {}
+    for source, collect in sorted(_collectors.items()):
+        try:
+            values = collect()
+        except Exception:  # a broken collector must not take the scrape down
+            continue
+        for key, value in (values or {}).items():
+            if isinstance(value, bool):
+                value = int(value)
+            if not isinstance(value, (int, float)):
+                continue
+            if key in _GAUGE_KEYS or key.endswith(("_ratio", "_bytes")) or key.startswith(("max_", "last_")):
+                gauges.setdefault(f"hodlbot_{key}", []).append((source, value))
+            else:
+                counters.setdefault(f"hodlbot_{key}_total", []).append((source, value))
+    lines = []
+    for kind, metrics in (("gauge", gauges), ("counter", counters)):
+        for name, samples in sorted(metrics.items()):
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f'{name}{{source="{_escape(source)}"}} {_number(value)}' for source, value in samples)
+    return lines
+
+def render():
+    """The whole registry in Prometheus text exposition format."""
+    lines = []
+    for metric in (request_seconds, requests_total, stage_seconds):
+        lines.extend(metric.render())
+    lines.extend(_collected_lines())
+    return "\n".join(lines) + "\n"
+
+# -------------------------------
+# ASGI middleware
+# -------------------------------
+class MetricsMiddleware:
+    """
+    Time every HTTP request by its route template (``/api/price/{coin_id}``, not the raw path),
+    so label cardinality stays bounded. WebSocket connections and the scrape itself are skipped.
+    """
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENDPOINTS_ENABLED or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            request_seconds.observe(time.perf_counter() - started, scope["method"], endpoint)
+            requests_total.inc(scope["method"], endpoint, str(status[0]))
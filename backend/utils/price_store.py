@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import threading
+from backend.utils import lazy
+from backend.utils.shared import FileLock
+
+np = lazy.LazyModule("numpy")
+
+# Directory holding one pair of append-only columns per coin.
+PRICE_STORE_DIR = os.getenv(
+    "HODLBOT_PRICE_STORE", os.path.join(os.path.expanduser("~"), ".hodlbot", "prices")
+)
+# Stored granularity; CoinGecko serves hourly points for 2-90 day ranges.
+RESOLUTION_MS = 3_600_000
+
+_VALID_COIN_ID = re.compile(r"^[a-z0-9][a-z0-9._-]*$")
+
+class PriceStore:
+    """
+    On-disk time series store with one int64 timestamp column and one float64
+    price column per coin. Files only grow at the tail; reads are memory-mapped.
+
+    At most one point is kept per ``resolution_ms`` bucket. A newer point in the
+    same bucket as the last stored one replaces it, so the tail always holds the
+    most recent price.
+    """
+
+    def __init__(self, root: str = PRICE_STORE_DIR, resolution_ms: int = RESOLUTION_MS):
+        self.root = root
+        self.resolution_ms = resolution_ms
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # -------------------------------
+    # Paths and locking
+    # -------------------------------
+    def _path(self, coin_id: str, suffix: str):
+        if not _VALID_COIN_ID.match(coin_id):
+            raise ValueError(f"⚠️ ERROR: Invalid coin id '{coin_id}'.")
+        return os.path.join(self.root, f"{coin_id}.{suffix}")
+
+    def lock(self, coin_id: str):
+        """
+        Per-coin lock; hold it around a fetch-and-append sequence.
+        It is also a file lock, so with several workers only one fetches a coin's history.
+        """
+        with self._locks_guard:
+            lock = self._locks.get(coin_id)
+            if lock is None:
+                os.makedirs(self.root, exist_ok=True)
+                lock = self._locks[coin_id] = FileLock(self._path(coin_id, "lock"))
+            return lock
+
+    def _load_meta(self, coin_id: str):
+        try:
+            with open(self._path(coin_id, "meta.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_meta(self, coin_id: str, meta: dict):
+        path = self._path(coin_id, "meta.json")
+        os.makedirs(self.root, exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    # -------------------------------
+    # Reads
+    # -------------------------------
+    def _map(self, coin_id: str, suffix: str, dtype):
+        path = self._path(coin_id, suffix)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=dtype)
+        count = size // np.dtype(dtype).itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,))
+
+    def read(self, coin_id: str, since_ms: int = None):
+        """
+        Return ``(timestamps_ms, prices)`` for points at or after ``since_ms``.
+        The arrays are read-only views over the memory-mapped files. They are only
+        safe to use until the coin's next write (append may truncate or rewrite the
+        tail), so copy anything that is kept beyond the current call.
+        """
+        timestamps = self._map(coin_id, "ts.i8", np.int64)
+        prices = self._map(coin_id, "px.f8", np.float64)
+        # A crash between the two column writes leaves one column longer; ignore the extra tail.
+        count = min(len(timestamps), len(prices))
+        start = 0
+        if since_ms is not None and count:
+            start = int(np.searchsorted(timestamps[:count], since_ms, side="left"))
+        return timestamps[start:count], prices[start:count]
+
+    def last_timestamp(self, coin_id: str):
+        timestamps, _ = self.read(coin_id)
+        return int(timestamps[-1]) if len(timestamps) else None
+
+    def covers(self, coin_id: str, since_ms: int):
+        """True when the store already holds (or already tried to fetch) history back to ``since_ms``."""
+        covered_from = self._load_meta(coin_id).get("covered_from")
+        return covered_from is not None and covered_from <= since_ms + self.resolution_ms
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+    def _bucketed(self, points):
+        """Collapse ``[[ts, price], ...]`` to one point per bucket, keeping the newest."""
+        buckets = {}
+        for ts, price in points:
+            if price is None:
+                continue
+            ts = int(ts)
+            buckets[ts // self.resolution_ms] = (ts, float(price))
+        return [buckets[key] for key in sorted(buckets)]
+
+    def append(self, coin_id: str, points):
+        """Append points newer than the stored tail. Returns the number of points written."""
+        timestamps, _ = self.read(coin_id)
+        last_ts = int(timestamps[-1]) if len(timestamps) else None
+        count = len(timestamps)
+        new_points = [p for p in self._bucketed(points) if last_ts is None or p[0] > last_ts]
+        if not new_points:
+            return 0
+        written = len(new_points)
+
+        os.makedirs(self.root, exist_ok=True)
+        ts_path, px_path = self._path(coin_id, "ts.i8"), self._path(coin_id, "px.f8")
+        # Re-align both columns in case an earlier write was interrupted.
+        for path, itemsize in ((ts_path, 8), (px_path, 8)):
+            if os.path.exists(path) and os.path.getsize(path) != count * itemsize:
+                os.truncate(path, count * itemsize)
+
+        # Replace the tail when the first new point lands in the same bucket.
+        if last_ts is not None and new_points[0][0] // self.resolution_ms == last_ts // self.resolution_ms:
+            ts, price = new_points.pop(0)
+            for path, value in ((px_path, np.float64(price)), (ts_path, np.int64(ts))):
+                with open(path, "r+b") as f:
+                    f.seek(-8, os.SEEK_END)
+                    f.write(value.tobytes())
+
+        if new_points:
+            ts_column = np.array([p[0] for p in new_points], dtype=np.int64)
+            px_column = np.array([p[1] for p in new_points], dtype=np.float64)
+            with open(px_path, "ab") as f:
+                f.write(px_column.tobytes())
+            with open(ts_path, "ab") as f:
+                f.write(ts_column.tobytes())
+        return written
+
+    def merge(self, coin_id: str, points, covered_from: int):
+        """
+        Merge a full backfill with what is already stored and rewrite both columns.
+        Used only when the requested window reaches further back than the store.
+        """
+        timestamps, prices = self.read(coin_id)
+        # Fetched points come last so they win over stored ones in shared buckets.
+        merged = self._bucketed(list(zip(timestamps.tolist(), prices.tolist())) + list(points))
+        os.makedirs(self.root, exist_ok=True)
+
+        for suffix, dtype, column in (
+            ("px.f8", np.float64, [p[1] for p in merged]),
+            ("ts.i8", np.int64, [p[0] for p in merged]),
+        ):
+            path = self._path(coin_id, suffix)
+            with open(path + ".tmp", "wb") as f:
+                f.write(np.array(column, dtype=dtype).tobytes())
+            os.replace(path + ".tmp", path)
+
+        meta = self._load_meta(coin_id)
+        meta["covered_from"] = min(covered_from, meta.get("covered_from", covered_from))
+        self._save_meta(coin_id, meta)
+        return len(merged)
+
+# Process-wide store used by the strategy module.
+store = PriceStore()
@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import zlib
+from urllib.parse import urlparse
+
+# -------------------------------
+# Upstream recording
+# -------------------------------
+# With HODLBOT_RECORD_DIR set, http_client saves every successful CoinGecko
+# response there. The stand-in server below replays those files, so a run
+# can be reproduced later without network access.
+RECORD_DIR = os.getenv("HODLBOT_RECORD_DIR")
+
+# Params that change on every call; recordings are matched without them.
+VOLATILE_PARAMS = {"from", "to"}
+
+def _endpoint(url: str):
+    """Path below /api/v3, e.g. ``/coins/bitcoin/market_chart``."""
+    path = urlparse(url).path
+    return path.split("/api/v3", 1)[-1] or "/"
+
+def _record_key(path: str, params: dict = None):
+    stable = sorted((k, str(v)) for k, v in (params or {}).items() if k not in VOLATILE_PARAMS)
+    return path, tuple(stable)
+
+def record(url: str, params: dict, body, record_dir: str = None):
+    """Save one upstream response body as a JSON recording."""
+    record_dir = record_dir or RECORD_DIR
+    path = _endpoint(url)
+    key = _record_key(path, params)
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:12]
+    slug = re.sub(r"[^a-z0-9]+", "_", path.lower()).strip("_")
+    os.makedirs(record_dir, exist_ok=True)
+    target = os.path.join(record_dir, f"{slug}-{digest}.json")
+    tmp = target + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"path": path, "params": params or {}, "recorded_at": int(time.time() * 1000), "body": body}, f)
+    os.replace(tmp, target)
+
+class Recordings:
+    """Recorded responses indexed by endpoint path and stable params."""
+
+    def __init__(self, record_dir: str = None):
+        self.exact = {}
+        self.by_path = {}
+        if record_dir and os.path.isdir(record_dir):
+            for name in sorted(os.listdir(record_dir)):
+                if name.endswith(".json"):
+                    with open(os.path.join(record_dir, name)) as f:
+                        rec = json.load(f)
+                    self.exact[_record_key(rec["path"], rec["params"])] = rec
+                    self.by_path.setdefault(rec["path"], []).append(rec)
+
+    def find(self, path: str, params: dict = None):
+        rec = self.exact.get(_record_key(path, params))
+        if rec is None and self.by_path.get(path):
+            rec = self.by_path[path][-1]
+        return rec
+
+    def chart(self, coin_id: str):
+        """Recorded ``[ts, price]`` points for a coin, shifted so the last one lands at the current time."""
+        recs = self.by_path.get(f"/coins/{coin_id}/market_chart", []) + self.by_path.get(
+            f"/coins/{coin_id}/market_chart/range", []
+        )
+        if not recs:
+            return None
+        prices = max((r["body"].get("prices", []) for r in recs), key=len)
+        if not prices:
+            return None
+        shift = int(time.time() * 1000) - prices[-1][0]
+        return [[ts + shift, price] for ts, price in prices]
+
+# -------------------------------
+# Synthetic data (no recording available)
+# -------------------------------
+HOUR_MS = 3_600_000
+SYNTHETIC_BASES = {"bitcoin": 100000.0, "ethereum": 2650.0, "dogecoin": 0.27, "litecoin": 120.0, "ripple": 2.35}
+
+def synthetic_price(coin_id: str, ts_ms: int):
+    """Deterministic price for a coin at a time: the same request always gets the same answer."""
+    seed = zlib.crc32(coin_id.encode())
+    base = SYNTHETIC_BASES.get(coin_id, 1 + seed % 5000 / 10)
+    hours = ts_ms / HOUR_MS
+    phase = seed % 1000 / 1000 * 2 * math.pi
+    wave = 0.06 * math.sin(hours / 168 * 2 * math.pi + phase) + 0.02 * math.sin(hours / 9.7 + 2 * phase)
+    noise = (zlib.crc32(f"{coin_id}:{int(hours)}".encode()) % 2001 - 1000) / 1000 * 0.004
+    return round(base * math.exp(wave + noise), 6)
+
+def synthetic_chart(coin_id: str, start_ms: int, end_ms: int):
+    first = -(-start_ms // HOUR_MS) * HOUR_MS
+    return [[ts, synthetic_price(coin_id, ts)] for ts in range(first, end_ms + 1, HOUR_MS)]
+
+def synthetic_markets(count: int):
+    ids = list(SYNTHETIC_BASES) + [f"coin-{i:04d}" for i in range(max(0, count - len(SYNTHETIC_BASES)))]
+    now = int(time.time() * 1000)
+    return [
+        {"id": coin, "symbol": coin[:4], "name": coin.title(), "current_price": synthetic_price(coin, now),
+         "market_cap_rank": rank}
+        for rank, coin in enumerate(ids[:count], start=1)
+    ]
+
+# -------------------------------
+# Stand-in server
+# -------------------------------
+def create_app(record_dir: str = None, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0.0,
+               throttle_rate: float = 0.0, synthetic: bool = True, seed: int = None):
+    """
+    FastAPI app serving the CoinGecko endpoints HodlBot uses, from recordings or synthetic data.
+    :param latency_ms: Added delay per request.
+    :param jitter_ms: Extra uniform random delay per request.
+    :param error_rate: Fraction of requests answered with a 500.
+    :param throttle_rate: Fraction of requests answered with a 429 and ``Retry-After: 1``.
+    :param synthetic: Serve generated data for anything not recorded (otherwise 404).
+    """
+    # Imported here so the backend can load this module (for recording) without pulling in the server side.
+    from fastapi import FastAPI, Query
+    from fastapi.responses import JSONResponse
+
+    app = FastAPI(title="CoinGecko stand-in")
+    recordings = Recordings(record_dir)
+    rng = random.Random(seed)
+    app.state.stats = {"requests": 0, "errors": 0, "throttled": 0}
+
+    @app.middleware("http")
+    async def inject_faults(request, call_next):
+        app.state.stats["requests"] += 1
+        delay = latency_ms + rng.uniform(0, jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        roll = rng.random()
+        if roll < throttle_rate:
+            app.state.stats["throttled"] += 1
+            return JSONResponse({"status": {"error_code": 429, "error_message": "Throttled"}},
+                                status_code=429, headers={"Retry-After": "1"})
+        if roll < throttle_rate + error_rate:
+            app.state.stats["errors"] += 1
+            return JSONResponse({"error": "Injected failure"}, status_code=500)
+        return await call_next(request)
+
+    def not_found():
+        return JSONResponse({"error": "coin not found"}, status_code=404)
+
+    @app.get("/api/v3/coins/markets")
+    def markets(vs_currency: str = "usd", order: str = "market_cap_desc", per_page: int = 100, page: int = 1):
+        rec = recordings.find("/coins/markets", {"vs_currency": vs_currency, "order": order, "per_page": per_page})
+        if rec is not None:
+            return rec["body"]
+        return synthetic_markets(per_page) if synthetic else not_found()
+
+    @app.get("/api/v3/coins/{coin_id}/market_chart")
+    def market_chart(coin_id: str, vs_currency: str = "usd", days: float = 14):
+        now = int(time.time() * 1000)
+        since = now - int(days * 86_400_000)
+        points = recordings.chart(coin_id)
+        if points is None:
+            if not synthetic:
+                return not_found()
+            points = synthetic_chart(coin_id, since, now)
+        return {"prices": [p for p in points if p[0] >= since]}
+
+    @app.get("/api/v3/coins/{coin_id}/market_chart/range")
+    def market_chart_range(coin_id: str, vs_currency: str = "usd", start: int = Query(alias="from"),
+                           end: int = Query(alias="to")):
+        start_ms, end_ms = start * 1000, end * 1000
+        points = recordings.chart(coin_id)
+        if points is None:
+            if not synthetic:
+                return not_found()
+            points = synthetic_chart(coin_id, start_ms, end_ms)
+        return {"prices": [p for p in points if start_ms <= p[0] <= end_ms]}
+
+    @app.get("/api/v3/simple/price")
+    def simple_price(ids: str, vs_currencies: str = "usd"):
+        quotes = {}
+        for rec in recordings.by_path.get("/simple/price", []):
+            quotes.update(rec["body"])
+        result = {}
+        now = int(time.time() * 1000)
+        for coin in filter(None, ids.split(",")):
+            if coin in quotes:
+                result[coin] = quotes[coin]
+            else:
+                points = recordings.chart(coin)
+                if points:
+                    result[coin] = {vs_currencies: points[-1][1]}
+                elif synthetic:
+                    result[coin] = {vs_currencies: synthetic_price(coin, now)}
+        return result
+
+    @app.get("/stand-in/stats")
+    def stats():
+        return app.state.stats
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve recorded or synthetic CoinGecko responses locally.")
+    parser.add_argument("--records", default=RECORD_DIR, help="directory written with HODLBOT_RECORD_DIR")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--no-synthetic", action="store_true", help="404 for anything not recorded")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    print(f"Set COINGECKO_BASE_URL=http://{args.host}:{args.port}/api/v3 to use this stand-in.")
+    uvicorn.run(
+        create_app(args.records, args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate,
+                   synthetic=not args.no_synthetic, seed=args.seed),
+        host=args.host, port=args.port, log_level="warning",
+    )
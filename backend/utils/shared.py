@@ -0,0 +1,181 @@
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks then only cover the threads of one process
+    fcntl = None
+
+# -------------------------------
+# Cross-worker shared store
+# -------------------------------
+# Under gunicorn every worker process imports its own copy of the caches. With
+# HODLBOT_SHARED_DIR set, cached values are also published as one file per key
+# in that directory: written to a temp file and renamed into place, read back
+# through a read-only mmap. A refresh holds an flock on the key, so exactly one
+# worker calls upstream for it while the others wait and then read its result.
+SHARED_DIR = os.getenv("HODLBOT_SHARED_DIR", "")
+
+_HEADER = struct.Struct("<dI")  # written_at, number of parts
+_LENGTH = struct.Struct("<Q")
+
+class FileLock:
+    """
+    Exclusive lock across threads and processes: a threading lock serializes
+    this process, an ``flock`` on ``path`` serializes the workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def acquire(self, blocking: bool = True):
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if fcntl is None:
+            return True
+        f = None
+        try:
+            f = open(self.path, "a+b")
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BaseException as e:
+            if f is not None:
+                f.close()
+            self._thread_lock.release()
+            if isinstance(e, BlockingIOError):
+                return False
+            raise
+        self._file = f
+        return True
+
+    def release(self):
+        f, self._file = self._file, None
+        if f is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            f.close()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+class SharedStore:
+    """
+    Keyed records of one or more byte strings, shared by every process using ``directory``.
+
+    ``read`` returns memoryviews over a memory-mapped record, so a payload
+    another worker wrote can be served without copying it. A map stays valid
+    after its record is replaced; the next ``read`` notices the new file and
+    maps that instead.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._maps = {}  # key -> ((inode, mtime_ns, size), record)
+        self._locks = {}
+        self._guard = threading.Lock()
+        self.stats = {"hits": 0, "waited_hits": 0, "computes": 0, "writes": 0, "maps": 0}
+
+    def _path(self, key: str):
+        return os.path.join(self.directory, hashlib.blake2b(key.encode(), digest_size=16).hexdigest())
+
+    def lock(self, key: str):
+        """The cross-process lock for ``key``; hold it while refreshing the key."""
+        with self._guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = FileLock(self._path(key) + ".lock")
+            return lock
+
+    def read(self, key: str):
+        """:return: ``(written_at, [memoryview, ...])`` for the key's current record, or None."""
+        path = self._path(key)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        ident = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._guard:
+            cached = self._maps.get(key)
+        if cached is not None and cached[0] == ident:
+            return cached[1]
+        try:
+            with open(path, "rb") as f:
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (FileNotFoundError, ValueError):  # replaced or removed meanwhile, or empty
+            return None
+        written_at, count = _HEADER.unpack_from(view)
+        offset = _HEADER.size + count * _LENGTH.size
+        parts = []
+        for i in range(count):
+            (length,) = _LENGTH.unpack_from(view, _HEADER.size + i * _LENGTH.size)
+            parts.append(view[offset:offset + length])
+            offset += length
+        record = (written_at, parts)
+        with self._guard:
+            self._maps[key] = (ident, record)
+            self.stats["maps"] += 1
+        return record
+
+    def write(self, key: str, *parts):
+        """Atomically replace the key's record with ``parts`` (bytes-like)."""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(time.time(), len(parts)))
+                for part in parts:
+                    f.write(_LENGTH.pack(len(part)))
+                for part in parts:
+                    f.write(part)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with self._guard:
+            self.stats["writes"] += 1
+
+    def discard(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def get_or_compute(self, key: str, compute, ttl: float, cacheable=None, dumps=pickle.dumps, loads=pickle.loads):
+        """
+        The key's value if a worker stored it less than ``ttl`` seconds ago; otherwise
+        compute it under the key's lock (other workers wait for it) and store it.
+        :param cacheable: Optional predicate; values it rejects are returned but not stored.
+        """
+        record = self.read(key)
+        if record is not None and time.time() - record[0] < ttl:
+            self.stats["hits"] += 1
+            return loads(record[1][0])
+        with self.lock(key):
+            record = self.read(key)
+            if record is not None and time.time() - record[0] < ttl:
+                self.stats["waited_hits"] += 1
+                return loads(record[1][0])
+            self.stats["computes"] += 1
+            value = compute()
+            if cacheable is None or cacheable(value):
+                self.write(key, dumps(value))
+            return value
+
+    def metrics(self):
+        with self._guard:
+            return {**self.stats, "directory": self.directory, "mapped_keys": len(self._maps)}
+
+# Process-wide store; None unless HODLBOT_SHARED_DIR is set.
+store = SharedStore(SHARED_DIR) if SHARED_DIR else None
@@ -0,0 +1,246 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from unittest import mock
+import numpy as np
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from backend import main
+from backend.ai import strategy
+from backend.ai.series import PriceSeries
+from backend.ai.simulator import MarketSimulator
+from backend.utils.cache import EncodedPayload
+
+# -------------------------------
+# Strategy / indicator micro-benchmarks
+# -------------------------------
+# Every case runs on fixed synthetic prices (seeded random walks), with the
+# upstream API and the price store replaced by in-memory frames, so timings
+# only measure the pipeline itself. Each run is appended to a JSON history
+# and compared with the previous run, so regressions show up between commits.
+# The history is machine-specific, so it stays out of the repo (see .gitignore).
+#
+#   python -m benchmarks.run                # full matrix
+#   python -m benchmarks.run --quick        # skip the largest scales
+#   python -m benchmarks.run -k adx         # only cases whose name contains "adx"
+
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.json")
+# A case this much slower than in the previous run is flagged.
+REGRESSION_THRESHOLD = 0.20
+
+COIN_SCALES = (5, 100, 1000)
+HISTORY_SCALES = (14, 90, 365)  # days
+GRANULARITIES = {"hourly": 60, "minute": 1}  # minutes per bar
+# Coins per case when the decision and /coins benchmarks sweep history length and granularity.
+HISTORY_SCALE_COINS = 5
+
+INDICATORS = {
+    "calculate_sma": lambda df: strategy.calculate_sma(df, window=5),
+    "calculate_rsi": strategy.calculate_rsi,
+    "calculate_macd": strategy.calculate_macd,
+    "calculate_bollinger_bands": strategy.calculate_bollinger_bands,
+    "calculate_adx": strategy.calculate_adx,
+}
+
+def synthetic_frame(days: int, minutes_per_bar: int, seed: int = 0):
+    """Seeded simulated market (see backend.ai.simulator) with one row per bar."""
+    bars = days * 1440 // minutes_per_bar
+    prices = np.round(MarketSimulator(seed=seed, bar_seconds=minutes_per_bar * 60).paths([100.0], bars)[:, 0], 6)
+    timestamps = pd.date_range(end="2025-01-01", periods=bars, freq=f"{minutes_per_bar}min")
+    return pd.DataFrame({"timestamp": timestamps, "price": prices})
+
+def coin_ids(count: int):
+    return [f"coin-{i:04d}" for i in range(count)]
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+@contextlib.contextmanager
+def offline(frames):
+    """Serve ``frames[coin_id]`` as every coin's history and a fixed markets listing; silence the debug prints."""
+    markets = [{"id": coin, "current_price": float(df["price"].iloc[-1])} for coin, df in frames.items()]
+    histories = {coin: PriceSeries.from_frame(df) for coin, df in frames.items()}
+    with mock.patch.object(strategy, "_load_historical_prices", lambda coin_id, days=14: histories[coin_id]), \
+            mock.patch.object(main.http_client, "get", lambda *args, **kwargs: FakeResponse([dict(m) for m in markets])), \
+            contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def measure(func, repeat: int, setup=None):
+    """Run ``func`` ``repeat`` times (after ``setup`` each time) and return per-run seconds."""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+# -------------------------------
+# Cases
+# -------------------------------
+def indicator_cases(quick: bool):
+    for days in HISTORY_SCALES:
+        for granularity, minutes in GRANULARITIES.items():
+            if quick and granularity == "minute" and days > 14:
+                continue
+            frame = synthetic_frame(days, minutes)
+            for name, indicator in INDICATORS.items():
+                yield f"{name}[{days}d-{granularity}]", (lambda f=frame, i=indicator: i(f.copy())), None
+
+def scaled_frames(quick: bool):
+    """
+    ``(label, frames)`` per scale: every coin count on 14 days of hourly bars, then
+    ``HISTORY_SCALE_COINS`` coins on each longer or finer history.
+    """
+    for count in COIN_SCALES:
+        if quick and count > 100:
+            continue
+        yield f"{count}-coins", {coin: synthetic_frame(14, 60, seed=i) for i, coin in enumerate(coin_ids(count))}
+    for days in HISTORY_SCALES:
+        for granularity, minutes in GRANULARITIES.items():
+            if (days, granularity) == (14, "hourly") or (quick and granularity == "minute" and days > 14):
+                continue
+            frames = {coin: synthetic_frame(days, minutes, seed=i)
+                      for i, coin in enumerate(coin_ids(HISTORY_SCALE_COINS))}
+            yield f"{days}d-{granularity}-{HISTORY_SCALE_COINS}-coins", frames
+
+def decision_cases(quick: bool):
+    for label, frames in scaled_frames(quick):
+        def decide_all(frames=frames):
+            with offline(frames):
+                for coin in frames:
+                    strategy.make_trade_decision(coin)
+
+        yield f"make_trade_decision[{label}-cold]", decide_all, strategy.decision_cache.invalidate
+        yield f"make_trade_decision[{label}-warm]", decide_all, None
+
+def coins_build_cases(quick: bool):
+    for label, frames in scaled_frames(quick):
+        def build(frames=frames):
+            with offline(frames):
+                asyncio.run(main.load_live_coins())
+
+        yield f"coins_build[{label}]", build, strategy.decision_cache.invalidate
+
+def coins_response_cases(quick: bool):
+    """Serving a cached 100-coin listing 100 times: encode per request vs. the bytes stored at refresh."""
+    frames = {coin: synthetic_frame(14, 60, seed=i) for i, coin in enumerate(coin_ids(100))}
+    with offline(frames):
+        coins = asyncio.run(main.load_live_coins())
+    for i, coin in enumerate(coins):  # pad rows to roughly the size of a real /coins/markets entry
+        coin.update({"symbol": coin["id"][-4:], "name": coin["id"].title(), "image": f"https://example.com/{i}.png",
+                     **{field: float(i) for field in ("market_cap", "total_volume", "high_24h", "low_24h",
+                                                      "price_change_24h", "price_change_percentage_24h",
+                                                      "circulating_supply", "total_supply", "ath", "atl")}})
+    payload = EncodedPayload(coins)
+
+    def encode_per_request():
+        for _ in range(100):
+            JSONResponse(jsonable_encoder(coins))
+
+    def cached_bytes():
+        for _ in range(100):
+            payload.response("gzip, deflate")
+
+    yield "coins_response[encode-per-request-x100]", encode_per_request, None
+    yield "coins_response[cached-bytes-x100]", cached_bytes, None
+
+def simulator_cases(quick: bool):
+    """Generating a whole simulated market at once (float32, as a load test would)."""
+    coins, bars = (1000, 10_000) if quick else (1000, 100_000)
+    start_prices = np.linspace(0.01, 60_000, coins)
+    sim = MarketSimulator(seed=0)
+    yield f"simulator_paths[{coins}-coins-x-{bars}-bars]", lambda: sim.paths(start_prices, bars, dtype=np.float32), None
+
+SUITES = (indicator_cases, decision_cases, coins_build_cases, coins_response_cases, simulator_cases)
+
+# -------------------------------
+# Runner and history
+# -------------------------------
+def run(pattern: str = None, repeat: int = 3, quick: bool = False):
+    """:return: ``{case name: {"min_s", "median_s", "runs"}}``"""
+    results = {}
+    for suite in SUITES:
+        for name, func, setup in suite(quick):
+            if pattern and pattern not in name:
+                continue
+            measure(func, 1, setup)  # warm-up: imports, caches, allocator
+            timings = measure(func, repeat, setup)
+            results[name] = {
+                "min_s": round(min(timings), 6),
+                "median_s": round(statistics.median(timings), 6),
+                "runs": repeat,
+            }
+            print(f"{name:<55} median {results[name]['median_s'] * 1000:>10.2f} ms", file=sys.stderr)
+    return results
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path: str = HISTORY_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+def save_run(results, path: str = HISTORY_FILE):
+    history = load_history(path)
+    history.append({
+        "commit": current_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    })
+    with open(path, "w") as f:
+        json.dump(history, f, indent=2)
+
+def compare(results, previous):
+    """:return: ``(name, previous median, current median, ratio)`` for cases slower than the threshold."""
+    regressions = []
+    for name, result in results.items():
+        before = previous.get(name)
+        if before and before["median_s"] > 0:
+            ratio = result["median_s"] / before["median_s"]
+            if ratio > 1 + REGRESSION_THRESHOLD:
+                regressions.append((name, before["median_s"], result["median_s"], ratio))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the strategy and indicator hot paths on synthetic data.")
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="skip 1,000 coins and long minute-level histories")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    history = load_history(args.history)
+    results = run(args.pattern, args.repeat, args.quick)
+    regressions = compare(results, history[-1]["results"] if history else {})
+    for name, before, after, ratio in regressions:
+        print(f"⚠️ REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms ({ratio:.2f}x)")
+    if not args.no_save:
+        save_run(results, args.history)
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,93 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+# -------------------------------
+# Cold start report
+# -------------------------------
+# Measures what an App Service cold start or scale-out pays before the API can
+# answer: the import profile of backend.main (from ``python -X importtime``)
+# and the wall time from launching uvicorn to the first 200 from /health.
+#
+#   python -m benchmarks.startup            # top imports and time to /health
+#   python -m benchmarks.startup --top 40
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Libraries that must stay out of the startup path (see backend.utils.lazy).
+DEFERRED = ("numpy", "pandas", "ta", "requests")
+
+def import_profile(module: str = "backend.main"):
+    """
+    Import ``module`` in a fresh interpreter under ``-X importtime``.
+    :return: ``{module name: (self seconds, cumulative seconds)}``
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        profile[name.strip()] = (int(self_us) / 1e6, int(cumulative_us) / 1e6)
+    return profile
+
+def own_import_seconds(profile, module: str = "backend.main", framework: str = "fastapi"):
+    """Cumulative import time of ``module`` minus the framework it imports, from one ``import_profile``."""
+    return profile[module][1] - profile.get(framework, (0.0, 0.0))[1]
+
+def bare_app():
+    """A FastAPI app with nothing but /health: the floor any cold start pays (``--factory`` target)."""
+    from fastapi import FastAPI
+
+    app = FastAPI()
+    app.get("/health")(lambda: {"status": "ok"})
+    return app
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def time_to_health(timeout: float = 30, app: str = "backend.main:app", factory: bool = False):
+    """Seconds from launching ``uvicorn <app>`` until /health returns 200."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"]
+        + (["--factory"] if factory else []),
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env={**os.environ, "HODLBOT_TRADING_LOG": os.devnull},  # keep the trade log out of the checkout
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError(f"/health did not answer within {timeout} s")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report the API's import profile and time to first /health.")
+    parser.add_argument("--top", type=int, default=20, help="number of slowest imports to list")
+    args = parser.parse_args()
+
+    profile = import_profile()
+    for name, (_, cumulative) in sorted(profile.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{name:<55} {cumulative * 1000:>10.2f} ms")
+    loaded = [name for name in DEFERRED if name in profile]
+    print(f"\nbackend.main import: {profile['backend.main'][1] * 1000:.2f} ms (under -X importtime), "
+          f"{own_import_seconds(profile) * 1000:.2f} ms on top of fastapi")
+    print(f"deferred libraries imported at startup: {', '.join(loaded) or 'none'}")
+    floor = time_to_health(app="benchmarks.startup:bare_app", factory=True)
+    print(f"time to /health: {time_to_health() * 1000:.2f} ms (bare FastAPI app: {floor * 1000:.2f} ms)")
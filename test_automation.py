@@ -1,4 +1,7 @@
+import asyncio
+import time
 import pytest
+from backend.ai import automation
 from backend.ai.automation import start_automated_trading, stop_automated_trading, trading_states
 
 @pytest.mark.asyncio
@@ -20,3 +23,41 @@ async def test_stop_automated_trading():
 def test_invalid_stop_trading():
     stop_automated_trading("invalidcoin")
     assert "invalidcoin" not in trading_states
+
+def test_engine_tick_keeps_event_loop_responsive(monkeypatch):
+    """
+    One tick decides every active coin while blocking fetches run off the event loop.
+    """
+    def slow_sync(coin_id, days=14):
+        time.sleep(0.05)
+        if coin_id == "broken":
+            raise RuntimeError("upstream timeout")
+
+    monkeypatch.setattr(automation.strategy, "sync_price_history", slow_sync)
+    monkeypatch.setattr(automation, "decide_from_store", lambda coin, days, *params: {"decision": "HOLD", "price": 1.0})
+    engine = automation.AutomationEngine(states={})
+    for coin in [f"coin-{i}" for i in range(100)] + ["broken"]:
+        engine.states[coin] = True
+
+    async def scenario():
+        gaps = []
+
+        async def heartbeat():
+            last = time.perf_counter()
+            while True:
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        beat = asyncio.ensure_future(heartbeat())
+        decisions = await engine.tick()
+        beat.cancel()
+        return decisions, max(gaps)
+
+    decisions, worst_gap = asyncio.run(scenario())
+    assert len(decisions) == 101
+    assert decisions["coin-7"]["decision"] == "HOLD"
+    assert "error" in engine.last_decisions["broken"]
+    # Run inline, the 101 sleeps would stall the loop for over 5 s; off the loop no gap comes close.
+    assert worst_gap < 1.0
@@ -0,0 +1,78 @@
+import numpy as np
+from backend.ai import batch
+from backend.ai.backtest import backtest, simulate
+
+def random_walk(n, seed=1, sigma=0.01):
+    rng = np.random.default_rng(seed)
+    return np.round(1000 * np.exp(np.cumsum(rng.normal(0, sigma, n))), 6)
+
+def test_trades_follow_rule_signals():
+    """
+    Every trade opens on the bar after a BUY decision from the live rule cascade.
+    """
+    prices = random_walk(3000)
+    result = backtest(prices)
+    values = {name: column[0] for name, column in batch.compute_indicators(prices[None, :]).items()}
+    decisions, _ = batch.rule_cascade(values)
+
+    assert result["trades"]
+    for trade in result["trades"]:
+        assert decisions[trade["entry_bar"] - 1] == "BUY"
+        assert trade["exit_bar"] >= trade["entry_bar"]
+
+def test_equity_compounds_trade_returns():
+    """
+    Without fees the final equity equals the compounded per-trade returns.
+    """
+    prices = random_walk(3000, seed=2)
+    result = backtest(prices, initial_capital=1000.0)
+    growth = np.prod([t["exit_price"] / t["entry_price"] for t in result["trades"]])
+    assert np.isclose(result["equity"][-1], 1000.0 * growth, rtol=1e-6)
+    assert result["stats"]["trades"] == len(result["trades"])
+    assert result["stats"]["max_drawdown_pct"] <= 0
+
+def test_stop_loss_and_take_profit_exits():
+    """
+    Tight thresholds close positions at the stop-loss / take-profit levels of the entry price.
+    """
+    prices = random_walk(5000, seed=3, sigma=0.02)
+    result = backtest(prices, stop_loss_percent=1, take_profit_percent=1)
+    reasons = {t["reason"] for t in result["trades"]}
+    assert "Stop-loss triggered" in reasons and "Take-profit triggered" in reasons
+    for trade in result["trades"]:
+        if trade["reason"] == "Stop-loss triggered":
+            assert trade["exit_price"] <= round(trade["entry_price"] * 0.99, 6)
+        elif trade["reason"] == "Take-profit triggered":
+            assert trade["exit_price"] >= round(trade["entry_price"] * 1.01, 6)
+
+def test_fees_reduce_equity():
+    """
+    Charging a fee on each fill lowers the final equity.
+    """
+    prices = random_walk(3000, seed=4)
+    assert backtest(prices, fee_percent=0.1)["equity"][-1] < backtest(prices)["equity"][-1]
+
+def test_sell_signal_on_last_bar_is_a_signal_exit():
+    """
+    A position closed by a SELL on the final bar is labelled a signal exit, not end of data.
+    """
+    prices = np.array([100.0, 101.0, 102.0, 101.5])
+    decisions = np.array(["BUY", "HOLD", "HOLD", "SELL"])
+    trades = simulate(prices, decisions, stop_loss_percent=50, take_profit_percent=50)["trades"]
+    assert [(t["exit_bar"], t["reason"]) for t in trades] == [(3, "Signal")]
+    decisions[3] = "HOLD"
+    trades = simulate(prices, decisions, stop_loss_percent=50, take_profit_percent=50)["trades"]
+    assert [(t["exit_bar"], t["reason"]) for t in trades] == [(3, "End of data")]
+
+def test_turnover_is_traded_notional_over_average_equity():
+    """
+    One round trip at a fee trades its entry and exit notional, measured against average equity.
+    """
+    prices = np.array([100.0, 100.0, 110.0, 110.0])
+    decisions = np.array(["BUY", "HOLD", "SELL", "HOLD"])
+    result = simulate(prices, decisions, stop_loss_percent=50, take_profit_percent=50, fee_percent=1,
+                      initial_capital=1000.0)
+    entry_equity = 1000.0
+    exit_equity = 1000.0 * 0.99 * 1.1
+    expected = (entry_equity + exit_equity) / result["equity"].mean()
+    assert np.isclose(result["stats"]["turnover"], expected, atol=1e-6)
@@ -0,0 +1,57 @@
+import math
+import numpy as np
+import pandas as pd
+from backend.ai import batch, strategy
+
+COLUMNS = ["SMA_5", "SMA_10", "RSI", "MACD", "MACD_Signal", "BB_High", "BB_Low", "ADX"]
+
+def random_walks(lengths, seed=11):
+    rng = np.random.default_rng(seed)
+    return [np.round(rng.uniform(1, 50000) * np.exp(np.cumsum(rng.normal(0, 0.02, n))), 6) for n in lengths]
+
+def per_coin(prices):
+    df = pd.DataFrame({"price": prices})
+    for calc in (lambda d: strategy.calculate_sma(d, window=5), lambda d: strategy.calculate_sma(d, window=10),
+                 strategy.calculate_rsi, strategy.calculate_macd, strategy.calculate_bollinger_bands,
+                 strategy.calculate_adx):
+        df = calc(df)
+    return df
+
+def test_batch_indicators_match_per_coin_functions():
+    """
+    Each row of a ragged price matrix gets the same indicators as its own DataFrame.
+    """
+    series = random_walks([336, 300, 120, 64])
+    indicators = batch.compute_indicators(batch.stack_prices(series))
+    for row, prices in enumerate(series):
+        expected = per_coin(prices)
+        offset = indicators["price"].shape[1] - len(prices)
+        for column in COLUMNS:
+            got = indicators[column][row, offset:]
+            want = expected[column].to_numpy()
+            assert np.array_equal(np.isnan(got), np.isnan(want)), column
+            mask = ~np.isnan(want)
+            assert np.allclose(got[mask], want[mask], rtol=1e-9, atol=2e-6), column
+
+def test_batch_decisions_match_make_trade_decision_rules():
+    """
+    The vectorized cascade agrees with strategy.decide for every coin.
+    """
+    series = random_walks([336] * 40, seed=5)
+    decisions = batch.trade_decisions(batch.stack_prices(series))
+    for prices, result in zip(series, decisions):
+        expected = strategy.decide(per_coin(prices).iloc[-1])
+        assert result["decision"] == expected["decision"]
+        assert result["price"] == expected["price"]
+        assert math.isclose(result["RSI"], expected["RSI"], abs_tol=2e-6)
+
+def test_recursive_mean_paths_agree():
+    """
+    The time-walk and per-column pandas implementations give the same smoothing.
+    """
+    prices = batch.stack_prices(random_walks([200, 150, 90]))
+    for seed, min_periods in ((1, 1), (1, 26), (14, 1)):
+        walked = batch._recursive_mean_walk(prices, 1 / 14, seed, min_periods)
+        columns = batch._recursive_mean_columns(prices, 1 / 14, seed, min_periods)
+        assert np.array_equal(np.isnan(walked), np.isnan(columns))
+        assert np.allclose(walked[~np.isnan(walked)], columns[~np.isnan(columns)], rtol=1e-10)
@@ -0,0 +1,27 @@
+from benchmarks import run as bench
+
+def test_benchmark_run_records_history(tmp_path):
+    """
+    A filtered run produces timings, is appended to the history and compared with the previous run.
+    """
+    history = str(tmp_path / "history.json")
+    results = bench.run(pattern="[5-coins", repeat=1, quick=True)
+    assert set(results) == {
+        "make_trade_decision[5-coins-cold]", "make_trade_decision[5-coins-warm]", "coins_build[5-coins]"
+    }
+    bench.save_run(results, history)
+    bench.save_run(results, history)
+    assert len(bench.load_history(history)) == 2
+
+    slower = {name: {**r, "median_s": r["median_s"] * 2} for name, r in results.items()}
+    assert {name for name, *_ in bench.compare(slower, results)} == set(results)
+
+def test_decision_and_build_cases_cover_longer_histories():
+    """
+    The decision and /coins benchmarks also run on 90- and 365-day and minute-bar histories.
+    """
+    names = {name for suite in (bench.decision_cases, bench.coins_build_cases) for name, *_ in suite(quick=False)
+             if "-5-coins" in name}
+    for scale in ("14d-minute", "90d-hourly", "90d-minute", "365d-hourly", "365d-minute"):
+        assert f"make_trade_decision[{scale}-5-coins-cold]" in names
+        assert f"coins_build[{scale}-5-coins]" in names
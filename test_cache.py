@@ -0,0 +1,199 @@
+import asyncio
+import gzip
+import json
+import numpy as np
+from backend.utils.cache import EncodedPayload, SWRCache
+
+def make_loader(delay=0.02, fail_after=None):
+    calls = {"count": 0}
+
+    async def loader():
+        calls["count"] += 1
+        await asyncio.sleep(delay)
+        if fail_after is not None and calls["count"] > fail_after:
+            raise RuntimeError("upstream down")
+        return calls["count"]
+
+    return loader, calls
+
+def test_concurrent_misses_share_one_load():
+    """
+    A burst of requests on an empty cache triggers a single load.
+    """
+    async def scenario():
+        loader, calls = make_loader()
+        cache = SWRCache(loader, ttl=60)
+        results = await asyncio.gather(*(cache.get() for _ in range(50)))
+        return results, calls["count"], cache.metrics()
+
+    results, loads, metrics = asyncio.run(scenario())
+    assert results == [1] * 50
+    assert loads == 1
+    assert metrics["misses"] == 50 and metrics["refreshes"] == 1
+
+def test_expired_value_is_served_while_refreshing():
+    """
+    After expiry callers get the stale payload at once; one background refresh replaces it.
+    """
+    async def scenario():
+        loader, calls = make_loader()
+        cache = SWRCache(loader, ttl=0.05)
+        await cache.get()
+        await asyncio.sleep(0.06)
+        stale = await asyncio.gather(*(cache.get() for _ in range(10)))
+        await asyncio.sleep(0.05)
+        return stale, await cache.get(), calls["count"]
+
+    stale, fresh, loads = asyncio.run(scenario())
+    assert stale == [1] * 10
+    assert fresh == 2
+    assert loads == 2
+
+def test_refresh_ahead_and_failed_refresh_keep_value():
+    """
+    Near expiry a refresh starts early; if it fails the previous payload stays.
+    """
+    async def scenario():
+        loader, calls = make_loader(fail_after=1)
+        cache = SWRCache(loader, ttl=1, refresh_ahead=0.0)
+        await cache.get()
+        value = await cache.get()
+        await asyncio.sleep(0.05)
+        return value, await cache.get(), cache.metrics()
+
+    value, after_failure, metrics = asyncio.run(scenario())
+    assert value == 1 and after_failure == 1
+    assert metrics["refresh_failures"] >= 1
+
+def test_invalidate_discards_inflight_result():
+    """
+    A refresh started before invalidate does not repopulate the cache.
+    """
+    async def scenario():
+        loader, _ = make_loader()
+        cache = SWRCache(loader, ttl=60)
+        task = asyncio.ensure_future(cache.get())
+        await asyncio.sleep(0)
+        cache.invalidate()
+        await task
+        return cache.has_value
+
+    assert asyncio.run(scenario()) is False
+
+def test_refresh_after_invalidate_waits_for_the_inflight_one():
+    """
+    A get after invalidate loads afresh, but only once the older load is done; the older result is never stored.
+    """
+    running = {"now": 0, "max": 0, "loads": 0}
+
+    async def loader():
+        running["now"] += 1
+        running["max"] = max(running["max"], running["now"])
+        running["loads"] += 1
+        load = running["loads"]
+        await asyncio.sleep(0.02)
+        running["now"] -= 1
+        return load
+
+    async def scenario():
+        cache = SWRCache(loader, ttl=60)
+        first = asyncio.ensure_future(cache.get())
+        await asyncio.sleep(0)
+        cache.invalidate()
+        second = await cache.get()
+        await first
+        return second, cache.value
+
+    assert asyncio.run(scenario()) == (2, 2)
+    assert running["max"] == 1
+
+def test_response_serves_bytes_encoded_at_refresh():
+    """
+    Hits reuse the bytes (and gzip copy) built when the payload was loaded.
+    """
+    coins = [{"id": f"coin-{i}", "current_price": np.float64(i), "trade_indicator": {"decision": "HOLD"}}
+             for i in range(100)]
+
+    async def loader():
+        return coins
+
+    async def scenario():
+        cache = SWRCache(loader, ttl=60)
+        plain = await cache.response()
+        zipped = await cache.response("gzip, deflate, br")
+        again = await cache.response("gzip")
+        return cache, plain, zipped, again
+
+    cache, plain, zipped, again = asyncio.run(scenario())
+    assert json.loads(plain.body) == json.loads(json.dumps(coins, default=float))
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(zipped.body) == plain.body
+    assert again.body is cache.encoded.gzipped
+    assert cache.metrics()["gzip_bytes"] < cache.metrics()["payload_bytes"]
+
+def test_etag_and_since_deltas():
+    """
+    Unchanged content keeps its version and ETag; ?since= returns only the coins that moved.
+    """
+    snapshots = [
+        [{"id": "a", "current_price": 1, "trade_indicator": "HOLD"}, {"id": "b", "current_price": 2, "trade_indicator": "BUY"}],
+        [{"id": "a", "current_price": 1, "trade_indicator": "HOLD"}, {"id": "b", "current_price": 2, "trade_indicator": "BUY"}],
+        [{"id": "a", "current_price": 1, "trade_indicator": "HOLD"}, {"id": "b", "current_price": 3, "trade_indicator": "BUY"}],
+        [{"id": "c", "current_price": 9, "trade_indicator": "SELL"}, {"id": "b", "current_price": 3, "trade_indicator": "BUY"}],
+    ]
+
+    async def loader():
+        return snapshots.pop(0)
+
+    async def scenario():
+        cache = SWRCache(loader, ttl=60, key="id", diff_fields=("current_price", "trade_indicator"), history=4)
+        first = await cache.response()
+        etag = first.headers["etag"]
+        not_modified = await cache.response(if_none_match=etag)
+        await cache.refresh()
+        same_version = cache.version
+        await cache.refresh()
+        one_change = json.loads((await cache.response(since=1)).body)
+        await cache.refresh()
+        two_changes = json.loads((await cache.response(since=1)).body)
+        unknown = json.loads((await cache.response(since=99)).body)
+        return first, not_modified, same_version, one_change, two_changes, unknown, cache
+
+    first, not_modified, same_version, one_change, two_changes, unknown, cache = asyncio.run(scenario())
+    assert first.headers["x-snapshot-version"] == "1"
+    assert not_modified.status_code == 304 and not_modified.body == b""
+    assert same_version == 1
+    assert one_change == {"version": 2, "since": 1, "changed": [{"id": "b", "current_price": 3, "trade_indicator": "BUY"}],
+                          "removed": []}
+    assert [row["id"] for row in two_changes["changed"]] == ["c", "b"]
+    assert two_changes["removed"] == ["a"] and two_changes["order"] == ["c", "b"]
+    assert unknown["full"] is True and len(unknown["data"]) == 2
+    assert cache.metrics()["not_modified"] == 1
+
+def test_if_none_match_compares_whole_tags():
+    """
+    If-None-Match is a list of tags: a listed tag or * gives a 304, a tag that only contains ours does not.
+    """
+    payload = EncodedPayload([{"id": "bitcoin"}])
+    assert payload.response(if_none_match=f'"other", {payload.etag}').status_code == 304
+    assert payload.response(if_none_match=payload.etag.removeprefix("W/")).status_code == 304
+    assert payload.response(if_none_match="*").status_code == 304
+    assert payload.response(if_none_match=payload.etag[:-1] + 'x"').status_code == 200
+    assert payload.response(if_none_match=f'W/"x{payload.etag[3:]}').status_code == 200
+
+def test_gzip_respects_q_values():
+    """
+    gzip is only sent when Accept-Encoding allows it with a non-zero q-value.
+    """
+    payload = EncodedPayload([{"id": f"coin-{i}", "price": i} for i in range(200)])
+
+    def encoding(accept):
+        return payload.response(accept).headers.get("content-encoding")
+
+    assert encoding("gzip, deflate") == "gzip"
+    assert encoding("br;q=1.0, gzip;q=0.5") == "gzip"
+    assert encoding("*") == "gzip"
+    assert encoding("gzip;q=0") is None
+    assert encoding("gzip; q=0.0, deflate") is None
+    assert encoding("*;q=0") is None
+    assert encoding("") is None
@@ -0,0 +1,75 @@
+import threading
+import pytest
+import requests
+from backend.utils import coingecko
+from backend.utils.coingecko import PriceBatcher
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+def fake_upstream(monkeypatch, fail=False):
+    calls = []
+
+    def get(url, params=None, timeout=10):
+        calls.append(params["ids"].split(","))
+        if fail:
+            raise requests.exceptions.ConnectionError("upstream down")
+        return FakeResponse({coin: {"usd": float(len(coin))} for coin in params["ids"].split(",") if coin != "nope"})
+
+    monkeypatch.setattr(coingecko.http_client, "get", get)
+    return calls
+
+def run_concurrently(batcher, id_lists):
+    results = [None] * len(id_lists)
+
+    def lookup(i, ids):
+        results[i] = batcher.get_prices(ids)
+
+    threads = [threading.Thread(target=lookup, args=(i, ids)) for i, ids in enumerate(id_lists)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_concurrent_lookups_share_one_upstream_call(monkeypatch):
+    """
+    Lookups arriving in the same window go out as one request and each caller gets its own ids.
+    """
+    calls = fake_upstream(monkeypatch)
+    batcher = PriceBatcher(window=0.05, ttl=60)
+    results = run_concurrently(batcher, [["bitcoin"], ["ethereum", "bitcoin"], ["nope"], ["ripple"]])
+
+    assert len(calls) == 1
+    assert sorted(calls[0]) == ["bitcoin", "ethereum", "nope", "ripple"]
+    assert results[0] == {"bitcoin": {"usd": 7.0}}
+    assert results[1] == {"ethereum": {"usd": 8.0}, "bitcoin": {"usd": 7.0}}
+    assert results[2] == {}
+
+    assert batcher.get_prices(["bitcoin", "nope"]) == {"bitcoin": {"usd": 7.0}}
+    assert len(calls) == 1
+
+def test_upstream_errors_reach_every_caller(monkeypatch):
+    """
+    An upstream failure is raised to the caller waiting on the batch.
+    """
+    fake_upstream(monkeypatch, fail=True)
+    batcher = PriceBatcher(window=0.01, ttl=60)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        batcher.get_prices(["bitcoin"])
+
+def test_slow_batch_raises_an_upstream_timeout(monkeypatch):
+    """
+    A caller that gives up waiting gets requests' Timeout, which the routes already turn into an error response.
+    """
+    fake_upstream(monkeypatch)
+    batcher = PriceBatcher(window=5, ttl=60)
+    with pytest.raises(requests.exceptions.Timeout):
+        batcher.get_prices(["bitcoin"], timeout=0.01)
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+from backend.ai.series import PriceSeries
+from backend.utils.fanout import attach_batch_trade_indicators, bounded_gather, run_blocking
+
+def test_bounded_gather_respects_limit():
+    """
+    No more than `limit` calls run at once, and the calls overlap instead of running serially.
+    """
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def slow(item):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.05)
+        with lock:
+            state["active"] -= 1
+        return item * 2
+
+    start = time.perf_counter()
+    results = asyncio.run(bounded_gather(slow, list(range(8)), limit=4))
+    elapsed = time.perf_counter() - start
+
+    assert results == [i * 2 for i in range(8)]
+    assert state["peak"] <= 4
+    assert elapsed < 0.05 * 8
+
+def test_attach_batch_trade_indicators_splits_failures():
+    """
+    Coins without history get error entries; the rest are decided in one batch call.
+    """
+
+    def fetch(coin_id):
+        if coin_id == "broken":
+            raise RuntimeError("upstream timeout")
+        if coin_id == "empty":
+            return None
+        return PriceSeries([1, 2, 3], [1.0, 2.0, 3.0])
+
+    batches = []
+
+    def decide_batch(series_list):
+        batches.append(len(series_list))
+        return [{"decision": "HOLD", "price": float(s[-1])} for s in series_list]
+
+    coins = [{"id": "bitcoin"}, {"id": "broken"}, {"id": "empty"}, {"id": "ethereum"}]
+    asyncio.run(attach_batch_trade_indicators(coins, fetch, decide_batch))
+
+    assert batches == [2]
+    assert coins[0]["trade_indicator"] == {"decision": "HOLD", "price": 3.0}
+    assert coins[1]["trade_indicator"]["decision"] == "ERROR"
+    assert coins[2]["trade_indicator"] == {"error": "No price data available"}
+
+def test_interactive_work_runs_while_bulk_pool_is_saturated():
+    """
+    Bulk fetches stuck waiting (e.g. on the rate budget) leave the interactive pool free.
+    """
+    release = threading.Event()
+
+    async def scenario():
+        stuck = asyncio.ensure_future(bounded_gather(lambda _: release.wait(5), range(40), bulk=True))
+        await asyncio.sleep(0.05)
+        try:
+            return await asyncio.wait_for(run_blocking(lambda: "quote"), timeout=2)
+        finally:
+            release.set()
+            await stuck
+
+    assert asyncio.run(scenario()) == "quote"
@@ -0,0 +1,131 @@
+import asyncio
+import json
+from backend import main
+from backend.utils.feed import FeedHub
+
+def test_publish_suppresses_unchanged_values():
+    """
+    Only changes reach subscribers; a repeated value is dropped.
+    """
+    async def scenario():
+        hub = FeedHub()
+        subscriber = hub.connect()
+        hub.subscribe(subscriber, ["bitcoin"])
+        assert hub.publish("bitcoin", "price", {"usd": 100})
+        assert not hub.publish("bitcoin", "price", {"usd": 100})
+        assert hub.publish("ethereum", "price", {"usd": 5})  # recorded even with no subscribers
+        batch = await subscriber.next_batch()
+        assert [json.loads(m) for m in batch] == [{"type": "price", "coin": "bitcoin", "data": {"usd": 100}}]
+        assert hub.stats["suppressed"] == 1
+        hub.disconnect(subscriber)
+        assert hub.metrics()["subscribers"] == 0
+
+    asyncio.run(scenario())
+
+def test_one_encode_fans_out_to_every_subscriber():
+    """
+    A change is encoded once and the same string is handed to all subscribers of the coin.
+    """
+    async def scenario():
+        hub = FeedHub()
+        subscribers = [hub.connect() for _ in range(1000)]
+        for subscriber in subscribers:
+            hub.subscribe(subscriber, ["bitcoin"])
+        hub.publish("bitcoin", "decision", {"decision": "BUY"})
+        batches = [await s.next_batch() for s in subscribers]
+        assert all(batch[0] is batches[0][0] for batch in batches)
+        assert hub.stats["published"] == 1 and hub.stats["deliveries"] == 1000
+
+    asyncio.run(scenario())
+
+def test_slow_subscriber_gets_latest_value_only():
+    """
+    Updates pile up per coin and kind, so a slow client reads the newest value, not a backlog.
+    """
+    async def scenario():
+        hub = FeedHub()
+        subscriber = hub.connect()
+        hub.subscribe(subscriber, ["bitcoin"])
+        for price in range(50):
+            hub.publish("bitcoin", "price", {"usd": price})
+        hub.publish("bitcoin", "decision", {"decision": "HOLD"})
+        batch = [json.loads(m) for m in await subscriber.next_batch()]
+        assert batch == [
+            {"type": "price", "coin": "bitcoin", "data": {"usd": 49}},
+            {"type": "decision", "coin": "bitcoin", "data": {"decision": "HOLD"}},
+        ]
+
+    asyncio.run(scenario())
+
+def test_poll_once_queries_only_subscribed_coins():
+    """
+    The producer is called once per round with the union of subscriptions; late subscribers get the last value.
+    """
+    calls = []
+
+    async def producer(coins):
+        calls.append(sorted(coins))
+        return {"price": {coin: {"usd": 1.0} for coin in coins}}
+
+    async def scenario():
+        hub = FeedHub(interval=3600)
+        hub.producer = producer
+        first, second = hub.connect(), hub.connect()
+        hub.subscribe(first, ["bitcoin"])
+        hub.subscribe(second, ["bitcoin", "ethereum"])
+        await asyncio.sleep(0)  # let the background producer run its first round
+        await hub.poll_once()
+        assert calls == [["bitcoin", "ethereum"], ["bitcoin", "ethereum"]]
+        assert hub.stats["published"] == 2 and hub.stats["suppressed"] == 2
+
+        late = hub.connect()
+        hub.subscribe(late, ["ethereum"])
+        assert [json.loads(m)["coin"] for m in await late.next_batch()] == ["ethereum"]
+        for subscriber in (first, second, late):
+            hub.disconnect(subscriber)
+        hub._task.cancel()
+
+    asyncio.run(scenario())
+
+def test_subscribe_known_filters_and_caps_requests():
+    """
+    Client requests only add coins the hub knows, never more than max_coins per connection.
+    """
+    async def known_coins():
+        return {"bitcoin", "ethereum", "ripple", "solana"}
+
+    async def scenario():
+        hub = FeedHub(interval=3600, max_coins=2)
+        hub.known_coins = known_coins
+        subscriber = hub.connect()
+        assert await hub.subscribe_known(subscriber, ["bitcoin", "not-a-coin", ["nested"], "bitcoin"]) == ["bitcoin"]
+        assert await hub.subscribe_known(subscriber, ["ethereum", "ripple"]) == ["ethereum"]
+        assert await hub.subscribe_known(subscriber, "solana") == []
+        assert subscriber.coins == {"bitcoin", "ethereum"}
+        assert hub.stats["rejected"] == 2
+        hub.disconnect(subscriber)
+        hub._task.cancel()
+
+    asyncio.run(scenario())
+
+def test_feed_socket_logs_task_failures(monkeypatch, caplog):
+    """
+    A failing receive or send task is retrieved and logged, and the subscriber is disconnected.
+    """
+    class BrokenSocket:
+        query_params = {}
+
+        async def accept(self):
+            pass
+
+        async def receive_json(self):
+            raise ValueError("not JSON")
+
+        async def send_text(self, message):
+            pass
+
+    monkeypatch.setattr(main.feed, "hub", FeedHub(interval=3600))
+    with caplog.at_level("WARNING", logger="backend.main"):
+        asyncio.run(main.feed_socket(BrokenSocket()))
+    assert "not JSON" in caplog.text
+    assert main.feed.hub.metrics()["subscribers"] == 0
@@ -0,0 +1,82 @@
+import threading
+import pytest
+import time
+import requests
+from backend.utils import http_client
+from backend.utils.http_client import BULK, INTERACTIVE, RateLimiter
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def test_interactive_callers_jump_the_bulk_queue():
+    """
+    With the bucket empty, a later interactive caller is served before earlier bulk ones.
+    """
+    limiter = RateLimiter(rate_per_minute=600, burst=1)  # one token every 0.1 s
+    limiter.acquire()
+    order = []
+
+    def take(name, priority):
+        limiter.acquire(priority)
+        order.append(name)
+
+    threads = [threading.Thread(target=take, args=(f"bulk{i}", BULK)) for i in range(2)]
+    for t in threads:
+        t.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=take, args=("interactive", INTERACTIVE))
+    interactive.start()
+    for t in threads + [interactive]:
+        t.join()
+    assert order[0] == "interactive"
+
+def test_get_retries_throttled_requests(monkeypatch):
+    """
+    A 429 pauses the shared budget and is retried; the eventual success is returned.
+    """
+    responses = [FakeResponse(429, {"Retry-After": "0"}), FakeResponse(503), FakeResponse(200)]
+    monkeypatch.setattr(http_client.session, "get", lambda url, params=None, timeout=10: responses.pop(0))
+    monkeypatch.setattr(http_client, "limiter", RateLimiter(rate_per_minute=0))
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+    before = http_client.metrics()
+
+    assert http_client.get("https://example.invalid").status_code == 200
+    after = http_client.metrics()
+    assert after["retries"] - before["retries"] == 2
+    assert after["throttled"] - before["throttled"] == 1
+
+def test_get_raises_after_last_connection_error(monkeypatch):
+    def fail(url, params=None, timeout=10):
+        raise requests.exceptions.ConnectionError("refused")
+
+    monkeypatch.setattr(http_client.session, "get", fail)
+    monkeypatch.setattr(http_client, "limiter", RateLimiter(rate_per_minute=0))
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        http_client.get("https://example.invalid", retries=1)
+
+def test_recording_failure_does_not_fail_the_request(monkeypatch):
+    """
+    A response that cannot be recorded is still returned to the caller.
+    """
+    def broken_record(url, params, body):
+        raise OSError("disk full")
+
+    response = FakeResponse(200)
+    response.json = lambda: {}
+    monkeypatch.setattr(http_client.session, "get", lambda url, params=None, timeout=10: response)
+    monkeypatch.setattr(http_client, "limiter", RateLimiter(rate_per_minute=0))
+    monkeypatch.setattr(http_client.replay, "RECORD_DIR", "recordings")
+    monkeypatch.setattr(http_client.replay, "record", broken_record)
+    assert http_client.get("https://example.invalid") is response
+
+def test_pause_holds_callers_without_a_budget():
+    """
+    With the bucket disabled, a 429 pause still makes every caller wait it out.
+    """
+    limiter = RateLimiter(rate_per_minute=0)
+    assert limiter.acquire() == 0.0
+    limiter.pause(0.05)
+    assert limiter.acquire() >= 0.04
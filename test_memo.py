@@ -0,0 +1,110 @@
+import threading
+import time
+import numpy as np
+import pytest
+from backend.ai import strategy
+from backend.ai.series import PriceSeries
+from backend.utils.memo import MemoCache
+from backend.utils.shared import SharedStore
+
+def test_lru_eviction_respects_entry_and_byte_caps():
+    """
+    The least recently used entries go first when either cap is exceeded.
+    """
+    cache = MemoCache(ttl=60, max_entries=2, max_bytes=8_500)
+    cache.set("a", np.zeros(100))
+    cache.set("b", np.zeros(100))
+    cache.get("a")
+    cache.set("c", np.zeros(100))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    cache.set("big", np.zeros(1000))  # 8000 bytes pushes the total over 8_500
+    assert len(cache) == 1 and cache.get("big") is not None
+    assert cache.metrics()["evictions"] == 3
+
+def test_concurrent_lookups_compute_once():
+    """
+    Threads asking for the same key wait for one computation.
+    """
+    cache = MemoCache(ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"decision": "HOLD"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert results == [{"decision": "HOLD"}] * 8
+
+def test_ttl_and_invalidate():
+    cache = MemoCache(ttl=0.02)
+    cache.set("k", 1)
+    time.sleep(0.03)
+    assert cache.get("k") is None
+    cache.set("k", 2, ttl=60)
+    cache.invalidate()
+    assert cache.get("k") is None
+
+def test_make_trade_decision_is_memoized(monkeypatch):
+    """
+    Repeated decisions for the same coin and parameters reuse the first result; new parameters recompute.
+    """
+    loads = []
+    prices = 100 * np.exp(np.cumsum(np.random.default_rng(3).normal(0, 0.01, 200)))
+
+    def load(coin_id, days=14):
+        loads.append((coin_id, days))
+        return PriceSeries(np.arange(len(prices)), prices)
+
+    monkeypatch.setattr(strategy, "_load_historical_prices", load)
+    strategy.decision_cache.invalidate()
+    try:
+        first = strategy.make_trade_decision("bitcoin")
+        first["decision"] = "mutated"
+        again = strategy.make_trade_decision("bitcoin")
+        assert again["decision"] != "mutated"
+        assert loads == [("bitcoin", 14)]
+
+        strategy.make_trade_decision("bitcoin", adx_threshold=40)
+        assert loads == [("bitcoin", 14)]  # the history is shared, only the rules re-run
+        assert strategy.decision_cache.metrics()["entries"] == 3
+    finally:
+        strategy.decision_cache.invalidate()
+
+def test_invalidate_discards_shared_records(tmp_path):
+    """
+    After invalidate, a shared key is computed again instead of being read back from the store.
+    """
+    cache = MemoCache(ttl=60, shared=SharedStore(str(tmp_path)))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("k", compute, shared=True) == 1
+    cache.invalidate()
+    assert cache.get_or_compute("k", compute, shared=True) == 2
+
+def test_interrupted_compute_is_not_cached():
+    """
+    A computation stopped by a BaseException stores nothing and never asks ``cacheable`` about it.
+    """
+    cache = MemoCache(ttl=60)
+    checked = []
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        cache.get_or_compute("k", interrupted, cacheable=lambda value: checked.append(value) or True)
+    assert checked == []
+    assert cache.get("k", "missing") == "missing"
@@ -0,0 +1,74 @@
+import asyncio
+from fastapi import FastAPI
+from backend.utils import metrics
+from backend.utils.metrics import Histogram, MetricsMiddleware
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    """
+    Buckets are cumulative, end with +Inf, and carry the label values; _count and _sum follow.
+    """
+    histogram = Histogram("test_seconds", "Test latency.", ("stage",), buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(seconds, "fetch")
+    assert histogram.render() == [
+        "# HELP test_seconds Test latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{stage="fetch",le="0.1"} 1',
+        'test_seconds_bucket{stage="fetch",le="1.0"} 3',
+        'test_seconds_bucket{stage="fetch",le="+Inf"} 4',
+        'test_seconds_sum{stage="fetch"} 4.05',
+        'test_seconds_count{stage="fetch"} 4',
+    ]
+
+def test_collectors_export_counters_and_gauges(monkeypatch):
+    """
+    Running totals become _total counters, levels become gauges, and a failing collector is skipped.
+    """
+    monkeypatch.setattr(metrics, "_collectors", {})
+    metrics.register_collector("coins", lambda: {"hits": 3, "hit_ratio": 0.75, "age_seconds": None, "name": "x"})
+    metrics.register_collector("broken", lambda: 1 / 0)
+    text = metrics.render()
+    assert 'hodlbot_hits_total{source="coins"} 3' in text
+    assert "# TYPE hodlbot_hit_ratio gauge" in text and 'hodlbot_hit_ratio{source="coins"} 0.75' in text
+    assert "age_seconds" not in text and "broken" not in text
+
+def test_middleware_labels_requests_by_route_template(monkeypatch):
+    """
+    Requests are timed under the route template, so per-coin paths share one series; unknown paths are grouped.
+    """
+    monkeypatch.setattr(metrics, "request_seconds", Histogram("t", "t", ("method", "endpoint")))
+    monkeypatch.setattr(metrics, "requests_total", metrics.Counter("c", "c", ("method", "endpoint", "status")))
+    app = FastAPI()
+
+    @app.get("/price/{coin_id}")
+    def price(coin_id: str):
+        return {coin_id: 1}
+
+    wrapped = MetricsMiddleware(app)
+
+    async def call(path):
+        scope = {"type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+                 "headers": [], "scheme": "http", "server": ("test", 80), "root_path": "", "http_version": "1.1"}
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            pass
+
+        await wrapped(scope, receive, send)
+
+    for path in ("/price/bitcoin", "/price/ethereum", "/nope"):
+        asyncio.run(call(path))
+    assert metrics.request_seconds.snapshot("GET", "/price/{coin_id}")["count"] == 2
+    assert metrics.requests_total.value("GET", "/price/{coin_id}", "200") == 2
+    assert metrics.requests_total.value("GET", "unmatched", "404") == 1
+
+def test_stage_timer_is_a_no_op_in_basic_mode(monkeypatch):
+    """
+    With stage timing off, ``stage`` records nothing.
+    """
+    monkeypatch.setattr(metrics, "STAGES_ENABLED", False)
+    with metrics.stage("test_stage_off"):
+        pass
+    assert metrics.stage_seconds.snapshot("test_stage_off")["count"] == 0
@@ -0,0 +1,73 @@
+import asyncio
+import numpy as np
+import pytest
+from backend import main
+from backend.ai import batch, optimize
+from backend.ai.backtest import backtest
+
+def random_walks(count, n=600, seed=3):
+    rng = np.random.default_rng(seed)
+    return [np.round(100 * np.exp(np.cumsum(rng.normal(0, 0.015, n))), 6) for _ in range(count)]
+
+class FakeRequest:
+    def __init__(self, body):
+        self.body = body
+
+    async def json(self):
+        return self.body
+
+def test_expand_grid_fills_defaults():
+    """
+    Grid expansion covers every combination and keeps defaults for other parameters.
+    """
+    combos = optimize.expand_grid({"rsiWindow": [7, 14], "adxThreshold": [20, 25, 30]})
+    assert len(combos) == 6
+    assert all(c["maxLoss"] == optimize.DEFAULT_PARAMS["maxLoss"] for c in combos)
+
+def test_sweep_matches_single_backtests_across_workers():
+    """
+    Ranked sweep results agree with per-coin backtests, with and without the process pool.
+    """
+    series = random_walks(3)
+    prices = batch.stack_prices(series)
+    combos = optimize.expand_grid({"rsiWindow": [10, 14], "maxLoss": [2, 5], "adxThreshold": [20, 30]})
+
+    serial = optimize.run_sweep(prices, combos, workers=1)
+    pooled = optimize.run_sweep(prices, combos, workers=2)
+    assert [r["params"] for r in serial] == [r["params"] for r in pooled]
+    assert [r["rank"] for r in serial] == list(range(1, len(combos) + 1))
+
+    best = serial[0]["params"]
+    returns = [
+        backtest(p, stop_loss_percent=best["maxLoss"], take_profit_percent=best["profitThreshold"],
+                 rsi_window=best["rsiWindow"], adx_threshold=best["adxThreshold"])["stats"]["return_pct"]
+        for p in series
+    ]
+    assert np.isclose(serial[0]["mean_return_pct"], np.mean(returns), atol=1e-5)
+
+def test_oversized_sweeps_are_rejected(monkeypatch):
+    """
+    Grids and samples above the combination cap raise before anything is built.
+    """
+    monkeypatch.setattr(optimize, "MAX_COMBINATIONS", 100)
+    with pytest.raises(ValueError):
+        optimize.expand_grid({"rsiWindow": list(range(2, 22)), "adxThreshold": list(range(10))})
+    with pytest.raises(ValueError):
+        optimize.sample_random({"adxThreshold": [10, 40]}, 101)
+    assert len(optimize.expand_grid({"rsiWindow": list(range(2, 12)), "adxThreshold": list(range(10))})) == 100
+
+def test_optimize_endpoint_rejects_bad_days_and_too_many_coins():
+    """
+    Non-numeric or out-of-range days and oversized coin lists are 400s, before any history is fetched.
+    """
+    bodies = [
+        {"coins": ["bitcoin"], "days": "ninety"},
+        {"coins": ["bitcoin"], "days": 0},
+        {"coins": ["bitcoin"], "days": optimize.MAX_DAYS + 1},
+        {"coins": ["coin"] * (optimize.MAX_COINS + 1)},
+        {"coins": "bitcoin"},
+    ]
+    for body in bodies:
+        with pytest.raises(main.HTTPException) as error:
+            asyncio.run(main.optimize_strategy(FakeRequest(body)))
+        assert error.value.status_code == 400, body
@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+from backend.models import orders, transactions
+from backend.models.orders import OrderQueue, OrderRejected
+from backend.models.portfolio import Portfolio, PortfolioEngine
+from backend.models.transactions import TransactionHistory, init_ledger
+
+@pytest.fixture
+def fresh_books(tmp_path, monkeypatch):
+    init_ledger(str(tmp_path / "ledger.db"))
+    monkeypatch.setattr(Portfolio, "engine", PortfolioEngine())
+    monkeypatch.setattr(Portfolio, "holdings", {})
+    monkeypatch.setattr(Portfolio, "_loaded", True)
+    price_calls = []
+
+    def get_prices(ids):
+        price_calls.append(ids)
+        return {coin: {"usd": 100.0} for coin in ids if coin != "nope"}
+
+    monkeypatch.setattr(orders.price_batcher, "get_prices", get_prices)
+    yield price_calls
+    TransactionHistory.flush()
+    transactions.db.close()
+
+def test_concurrent_sells_never_overdraw(fresh_books):
+    """
+    With 10 coins held, 50 concurrent 1-coin sells fill exactly 10 times; the rest are rejected.
+    """
+    queue = OrderQueue()
+
+    async def scenario():
+        await queue.submit("bitcoin", "buy", 1000.0)
+        results = await asyncio.gather(
+            *(queue.submit("bitcoin", "sell", 100.0) for _ in range(50)), return_exceptions=True
+        )
+        return results
+
+    results = asyncio.run(scenario())
+    filled = [r for r in results if not isinstance(r, Exception)]
+    rejected = [r for r in results if isinstance(r, OrderRejected)]
+    assert len(filled) == 10 and len(rejected) == 40
+    assert Portfolio.engine.holdings() == {}
+    assert TransactionHistory.count() == 11
+    # One price snapshot per batch, not per order.
+    assert len(fresh_books) == queue.stats["batches"] < 11
+
+def test_invalid_orders_are_rejected_individually(fresh_books):
+    queue = OrderQueue()
+
+    async def scenario():
+        return await asyncio.gather(
+            queue.submit("nope", "buy", 10.0),
+            queue.submit("ethereum", "buy", 50.0),
+            queue.submit("ethereum", "hold", 50.0),
+            return_exceptions=True,
+        )
+
+    unknown, bought, bad_action = asyncio.run(scenario())
+    assert isinstance(unknown, OrderRejected) and isinstance(bad_action, OrderRejected)
+    assert bought.coin_id == "ethereum" and bought.price == 100.0
+    assert Portfolio.holdings == {"ethereum": 0.5}
+
+def test_failed_ledger_write_leaves_no_trace(fresh_books, monkeypatch):
+    """
+    When the ledger insert fails the order fails, the portfolio is unchanged and no row is written later.
+    """
+    def failing_insert(rows):
+        raise OSError("disk full")
+
+    queue = OrderQueue()
+    with monkeypatch.context() as patch:
+        patch.setattr(transactions.LedgerEntry, "insert_many", failing_insert)
+        with pytest.raises(OSError):
+            asyncio.run(queue.submit("bitcoin", "buy", 100.0))
+    TransactionHistory.flush()
+    assert TransactionHistory.count() == 0
+    assert Portfolio.engine.holdings() == {}
@@ -0,0 +1,53 @@
+import random
+from backend.models.portfolio import PortfolioEngine
+
+def test_fifo_lots_realize_oldest_cost_first():
+    """
+    Selling consumes the oldest lots first; the rest stays as cost basis.
+    """
+    engine = PortfolioEngine()
+    engine.buy("bitcoin", 1.0, 100.0)
+    engine.buy("bitcoin", 1.0, 200.0)
+    realized = engine.sell("bitcoin", 1.5, 300.0)
+
+    assert realized == 1.0 * 200 + 0.5 * 100
+    snapshot = engine.snapshot()
+    row = snapshot["portfolio"][0]
+    assert row["quantity"] == 0.5 and row["cost_basis"] == 100.0 and row["avg_cost"] == 200.0
+    assert row["unrealized_pnl"] == 50.0
+    assert snapshot["realized_pnl"] == 250.0
+
+def test_incremental_totals_match_a_full_recompute():
+    engine = PortfolioEngine()
+    rng = random.Random(4)
+    coins = [f"coin-{i}" for i in range(12)]
+    for _ in range(2000):
+        coin = rng.choice(coins)
+        price = round(rng.uniform(1, 100), 4)
+        roll = rng.random()
+        if roll < 0.4:
+            engine.buy(coin, rng.uniform(0.1, 5), price)
+        elif roll < 0.6:
+            engine.sell(coin, rng.uniform(0.1, 5), price)
+        else:
+            engine.on_prices({coin: {"usd": price}})
+
+    positions = engine.positions.values()
+    expected_value = sum(p.quantity * p.price for p in positions if p.price is not None)
+    expected_cost = sum(sum(q * c for q, c in p.lots) for p in positions)
+    snapshot = engine.snapshot()
+    assert abs(snapshot["total_value"] - expected_value) < 1e-4
+    assert abs(snapshot["total_cost_basis"] - expected_cost) < 1e-4
+    assert abs(snapshot["unrealized_pnl"] - (expected_value - expected_cost)) < 1e-4
+    assert abs(snapshot["realized_pnl"] - sum(p.realized_pnl for p in positions)) < 1e-4
+
+def test_snapshot_is_reused_until_something_changes():
+    engine = PortfolioEngine()
+    engine.buy("ethereum", 2.0, 2500.0)
+    first = engine.snapshot()
+    assert engine.snapshot() is first
+    engine.on_prices({"ethereum": {"usd": 2500.0}, "unknown": {"usd": 1.0}})
+    assert engine.snapshot() is first
+    engine.on_prices({"ethereum": {"usd": 2600.0}})
+    assert engine.snapshot() is not first
+    assert engine.snapshot()["unrealized_pnl"] == 200.0
@@ -0,0 +1,78 @@
+import time
+import numpy as np
+from backend.ai import strategy
+from backend.utils.price_store import PriceStore
+
+HOUR = 3_600_000
+
+def test_append_keeps_one_point_per_bucket(tmp_path):
+    """
+    Points in the tail bucket replace the stored tail; older points are ignored.
+    """
+    store = PriceStore(root=str(tmp_path))
+    assert store.append("bitcoin", [[0, 1.0], [HOUR, 2.0], [2 * HOUR, 3.0]]) == 3
+    assert store.append("bitcoin", [[HOUR, 9.0], [2 * HOUR + 60_000, 3.5], [3 * HOUR, 4.0]]) == 2
+
+    timestamps, prices = store.read("bitcoin")
+    assert timestamps.tolist() == [0, HOUR, 2 * HOUR + 60_000, 3 * HOUR]
+    assert prices.tolist() == [1.0, 2.0, 3.5, 4.0]
+
+    timestamps, prices = store.read("bitcoin", since_ms=2 * HOUR)
+    assert prices.tolist() == [3.5, 4.0]
+
+def test_read_ignores_torn_write(tmp_path):
+    """
+    A price column that is longer than the timestamp column is clipped on read.
+    """
+    store = PriceStore(root=str(tmp_path))
+    store.append("ethereum", [[0, 1.0], [HOUR, 2.0]])
+    with open(tmp_path / "ethereum.px.f8", "ab") as f:
+        f.write(np.float64(5.0).tobytes())
+
+    timestamps, prices = store.read("ethereum")
+    assert len(timestamps) == len(prices) == 2
+
+def test_sync_fetches_only_missing_points(tmp_path, monkeypatch):
+    """
+    The first sync backfills the window, later syncs only ask for the delta,
+    and fresh data is served without any upstream call.
+    """
+    monkeypatch.setattr(strategy.price_store, "store", PriceStore(root=str(tmp_path)))
+    now_ms = int(time.time() * 1000)
+    calls = []
+
+    def fake_fetch(coin_id, days=None, start_ms=None):
+        calls.append((days, start_ms))
+        if start_ms is None:
+            return [[now_ms - (47 - i) * HOUR - strategy.PRICE_REFRESH_MS, 100.0 + i] for i in range(48)]
+        return [[now_ms, 200.0]]
+
+    monkeypatch.setattr(strategy, "fetch_market_chart", fake_fetch)
+    # Bypass the in-memory history cache so every call reaches the store.
+    monkeypatch.setattr(strategy, "get_historical_prices", strategy._load_historical_prices)
+
+    series = strategy.get_historical_prices("bitcoin", days=2)
+    assert calls == [(2, None)]
+    assert len(series) == 48
+
+    series = strategy.get_historical_prices("bitcoin", days=2)
+    assert calls[1][0] is None and calls[1][1] is not None
+    assert series.prices[-1] == 200.0
+
+    strategy.get_historical_prices("bitcoin", days=2)
+    assert len(calls) == 2
+
+def test_loaded_history_is_not_a_view_of_the_store(tmp_path, monkeypatch):
+    """
+    A loaded history keeps its values when the store later rewrites its tail bucket in place.
+    """
+    store = PriceStore(root=str(tmp_path))
+    monkeypatch.setattr(strategy.price_store, "store", store)
+    monkeypatch.setattr(strategy, "sync_price_history", lambda coin_id, days=14: None)
+    now_ms = int(time.time() * 1000)
+    store.append("bitcoin", [[now_ms - HOUR, 1.0], [now_ms, 2.0]])
+
+    series = strategy._load_historical_prices("bitcoin", days=1)
+    store.append("bitcoin", [[now_ms + 1, 3.0]])  # same bucket: rewrites the mapped tail
+    assert series.timestamps.tolist() == [now_ms - HOUR, now_ms]
+    assert series.prices.tolist() == [1.0, 2.0]
@@ -0,0 +1,70 @@
+import socket
+import threading
+import time
+import pytest
+import requests
+import uvicorn
+from backend.utils import replay
+
+def serve(app):
+    """Run ``app`` on a free local port in a background thread; yields its /api/v3 base URL."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}/api/v3"
+
+@pytest.fixture
+def standin(request):
+    servers = []
+
+    def start(**kwargs):
+        server, thread, base = serve(replay.create_app(**kwargs))
+        servers.append((server, thread))
+        return base
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join()
+
+def test_recorded_chart_is_replayed_shifted_to_now(tmp_path, standin):
+    """
+    A recorded market_chart is served with its last point moved to the current time,
+    and range requests slice it.
+    """
+    old = int(time.time() * 1000) - 30 * 86_400_000
+    prices = [[old - (47 - i) * 3_600_000, 10.0 + i] for i in range(48)]
+    url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
+    replay.record(url, {"vs_currency": "usd", "days": 2}, {"prices": prices}, record_dir=str(tmp_path))
+    base = standin(record_dir=str(tmp_path), synthetic=False)
+
+    chart = requests.get(f"{base}/coins/bitcoin/market_chart", params={"vs_currency": "usd", "days": 2}).json()
+    assert [p[1] for p in chart["prices"]] == [10.0 + i for i in range(48)]
+    assert abs(chart["prices"][-1][0] - time.time() * 1000) < 60_000
+
+    now = int(time.time())
+    sliced = requests.get(
+        f"{base}/coins/bitcoin/market_chart/range", params={"vs_currency": "usd", "from": now - 3 * 3600 + 60, "to": now + 1}
+    ).json()
+    assert [p[1] for p in sliced["prices"]] == [55.0, 56.0, 57.0]
+
+    price = requests.get(f"{base}/simple/price", params={"ids": "bitcoin,unknown", "vs_currencies": "usd"}).json()
+    assert price == {"bitcoin": {"usd": 57.0}}
+    assert requests.get(f"{base}/coins/ethereum/market_chart", params={"days": 1}).status_code == 404
+
+def test_synthetic_data_and_fault_injection(standin):
+    base = standin(throttle_rate=0.5, error_rate=0.25, seed=1)
+    statuses = [requests.get(f"{base}/coins/markets", params={"per_page": 3}).status_code for _ in range(40)]
+    assert {200, 429, 500} == set(statuses)
+
+    base = standin()
+    markets = requests.get(f"{base}/coins/markets", params={"per_page": 3}).json()
+    assert [c["id"] for c in markets] == ["bitcoin", "ethereum", "dogecoin"]
+    first = requests.get(f"{base}/coins/litecoin/market_chart", params={"days": 1}).json()["prices"]
+    again = requests.get(f"{base}/coins/litecoin/market_chart", params={"days": 1}).json()["prices"]
+    assert len(first) in (24, 25) and first[:10] == again[:10]
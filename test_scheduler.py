@@ -0,0 +1,111 @@
+import time
+import tracemalloc
+import numpy as np
+from backend.ai import automation
+from backend.ai.scheduler import DEFAULT_STRATEGY, StrategyScheduler, parse_strategy
+from backend.utils.price_store import PriceStore
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_strategies_fire_at_their_own_cadence():
+    """
+    Each coin fires every tradeFrequency minutes; coins due together come out in one batch.
+    """
+    clock = FakeClock()
+    scheduler = StrategyScheduler(batch_window=1.0, clock=clock)
+    scheduler.register("fast", parse_strategy({"tradeFrequency": 1}))
+    scheduler.register("slow", parse_strategy({"tradeFrequency": 3}))
+
+    fired = []
+    for _ in range(7):
+        fired.append(sorted(coin for coin, _ in scheduler.pop_due()))
+        clock.now += 60
+    assert fired == [["fast", "slow"], ["fast"], ["fast"], ["fast", "slow"], ["fast"], ["fast"], ["fast", "slow"]]
+    assert scheduler.metrics()["batches"] == 7
+
+def test_late_pops_count_missed_deadlines_and_keep_cadence():
+    """
+    A pop that comes late counts the missed deadline and the next one stays on the original cadence.
+    """
+    clock = FakeClock()
+    scheduler = StrategyScheduler(batch_window=0.0, clock=clock)
+    scheduler.register("bitcoin", parse_strategy({"tradeFrequency": 1}))
+    scheduler.pop_due()
+
+    clock.now += 60 * 3 + 10  # three deadlines passed, popped 10 s late
+    assert [coin for coin, _ in scheduler.pop_due()] == ["bitcoin"]
+    metrics = scheduler.metrics()
+    assert metrics["missed_deadlines"] == 2
+    assert metrics["last_lag_seconds"] == 130.0
+    assert scheduler.next_due() == 1000.0 + 60 * 4
+
+def test_reregister_and_unregister_drop_stale_entries():
+    """
+    Re-registering or removing a coin leaves only its current entry due; stale heap entries are skipped.
+    """
+    clock = FakeClock()
+    scheduler = StrategyScheduler(clock=clock)
+    scheduler.register("bitcoin", parse_strategy({"tradeFrequency": 1}))
+    scheduler.register("bitcoin", parse_strategy({"tradeFrequency": 5}), first_due=clock.now + 300)
+    scheduler.register("ethereum", parse_strategy())
+    scheduler.unregister("ethereum")
+    assert scheduler.pop_due() == []
+    assert scheduler.next_due() == clock.now + 300
+
+def test_ten_thousand_strategies_are_cheap():
+    """
+    10,000 registrations stay small in memory, and popping a full batch is fast.
+    """
+    clock = FakeClock()
+    scheduler = StrategyScheduler(clock=clock)
+    tracemalloc.start()
+    for i in range(10_000):
+        scheduler.register(f"coin-{i}", parse_strategy({"tradeFrequency": 1 + i % 30}))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 8 * 1024 * 1024
+
+    start = time.perf_counter()
+    assert len(scheduler.pop_due()) == 10_000
+    assert time.perf_counter() - start < 0.5
+    clock.now += 60
+    assert len(scheduler.pop_due()) == 10_000 // 30 + (1 if 10_000 % 30 else 0)
+
+def test_engine_batches_custom_indicator_windows(tmp_path, monkeypatch):
+    """
+    Coins with non-default windows are decided together in one batch pass with per-coin thresholds.
+    """
+    store = PriceStore(root=str(tmp_path))
+    now_ms = int(time.time() * 1000)
+    rng = np.random.default_rng(5)
+    for coin in ("alpha", "beta"):
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 200)))
+        store.append(coin, [[now_ms - (199 - i) * 3_600_000, float(p)] for i, p in enumerate(prices)])
+    monkeypatch.setattr(automation.price_store, "store", store)
+
+    engine = automation.AutomationEngine(states={})
+    engine.apply("alpha", {"rsiWindow": 7, "bollingerWindow": 10})
+    engine.apply("beta", {"rsiWindow": 7, "bollingerWindow": 10, "adxThreshold": 40})
+    engine.apply("gamma", {"rsiWindow": 7, "bollingerWindow": 10})
+    strategies = {coin: engine.scheduler.get(coin) for coin in ("alpha", "beta", "gamma")}
+
+    decisions = engine._decide(["alpha", "beta", "gamma"], strategies)
+    assert decisions["alpha"]["decision"] in {"BUY", "SELL", "HOLD"}
+    assert decisions["beta"]["price"] > 0
+    assert decisions["gamma"] == {"error": "No price data available"}
+
+def test_engine_default_strategy_matches_scheduler_defaults():
+    """
+    A coin automated without a strategy gets DEFAULT_STRATEGY's thresholds, run at the engine's interval.
+    """
+    engine = automation.AutomationEngine(interval=120, states={})
+    engine.apply("bitcoin")
+    strategy = engine.scheduler.get("bitcoin")
+    assert strategy.profit_threshold == DEFAULT_STRATEGY["profitThreshold"]
+    assert strategy.max_loss == DEFAULT_STRATEGY["maxLoss"]
+    assert strategy.trade_frequency == 2
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.ai import strategy
+from backend.ai.series import PriceSeries
+
+def test_latest_matches_dataframe_indicators():
+    """
+    The on-demand tail indicators equal the last row of the old fully widened DataFrame.
+    """
+    prices = np.round(100 * np.exp(np.cumsum(np.random.default_rng(4).normal(0, 0.01, 336))), 6)
+    series = PriceSeries(np.arange(336) * 3_600_000, prices)
+    df = pd.DataFrame({"price": prices})
+    for calc in (lambda d: strategy.calculate_sma(d, window=5), lambda d: strategy.calculate_sma(d, window=10),
+                 strategy.calculate_rsi, strategy.calculate_macd, strategy.calculate_bollinger_bands,
+                 strategy.calculate_adx):
+        df = calc(df)
+    latest = series.latest()
+    for column, value in df.iloc[-1].items():
+        assert latest[column] == pytest.approx(value, rel=1e-9, abs=2e-6), column
+    assert strategy.decide(latest) == strategy.decide(df.iloc[-1])
+
+def test_series_is_compact_and_read_only():
+    """
+    Two typed columns (16 bytes per point), copied from the inputs, that callers sharing the series cannot modify.
+    """
+    timestamps = np.arange(1000, dtype=np.int64)
+    series = PriceSeries(timestamps, np.linspace(1, 2, 1000))
+    assert series.nbytes == 16_000 and len(series) == 1000 and not series.empty
+    with pytest.raises(ValueError):
+        series.prices[0] = 5.0
+    timestamps[0] = 7  # the caller's array stays writable and the series keeps its own copy
+    assert series.timestamps[0] == 0
+    assert len(series.tail(10)) == 10 and series.tail(10).prices[-1] == 2.0
+    assert list(series.to_frame().columns) == ["timestamp", "price"]
+    with pytest.raises(ValueError):
+        PriceSeries([1, 2], [1.0])
@@ -0,0 +1,57 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from backend.utils.cache import SWRCache
+from backend.utils.shared import SharedStore
+
+def _worker(directory, counter, results):
+    store = SharedStore(directory)
+
+    def compute():
+        with counter.get_lock():
+            counter.value += 1
+        time.sleep(0.2)
+        return {"decision": "BUY", "pid": os.getpid()}
+
+    results.put(store.get_or_compute("decision:bitcoin", compute, ttl=60))
+
+def test_one_process_computes_each_key(tmp_path):
+    """
+    Workers asking for the same key at once compute it once; the rest read the stored result.
+    """
+    ctx = multiprocessing.get_context("fork")
+    counter, results = ctx.Value("i", 0), ctx.Queue()
+    workers = [ctx.Process(target=_worker, args=(str(tmp_path), counter, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    values = [results.get(timeout=10) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+    assert counter.value == 1
+    assert len({value["pid"] for value in values}) == 1
+
+def test_swr_caches_share_one_load(tmp_path):
+    """
+    Two caches (standing in for two workers) refresh together: one loads, the other adopts its bytes and version.
+    """
+    calls = {"count": 0}
+
+    async def loader():
+        calls["count"] += 1
+        await asyncio.sleep(0.1)
+        return [{"id": f"coin-{i}", "current_price": i} for i in range(100)]
+
+    async def scenario():
+        first = SWRCache(loader, ttl=60, name="coins", key="id", shared=SharedStore(str(tmp_path)))
+        second = SWRCache(loader, ttl=60, name="coins", key="id", shared=SharedStore(str(tmp_path)))
+        await asyncio.gather(first.get(), second.get())
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert calls["count"] == 1
+    assert first.value == second.value
+    assert first.encoded.etag == second.encoded.etag and first.version == second.version == 1
+    adopter = first if isinstance(first.encoded.body, memoryview) else second
+    assert isinstance(adopter.encoded.body, memoryview)
+    assert adopter.metrics()["shared_adopted"] == 1
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from backend.ai.simulator import SIM_EPOCH, MarketSimulator
+
+def test_paths_are_seeded_and_prefix_stable():
+    """
+    The same seed gives the same market, and a longer run starts with exactly the shorter one.
+    """
+    sim = MarketSimulator(seed=7, chunk_bars=256)
+    short = sim.paths([100.0, 0.5], 300)
+    long = sim.paths([100.0, 0.5], 1000)
+    assert short.shape == (300, 2)
+    assert np.array_equal(short, long[:300])
+    assert np.array_equal(long, MarketSimulator(seed=7, chunk_bars=256).paths([100.0, 0.5], 1000))
+    assert not np.array_equal(long, sim.paths([100.0, 0.5], 1000, seed=8))
+    assert (long > 0).all()
+    assert sim.paths([1.0] * 3, 10, dtype=np.float32).dtype == np.float32
+
+def test_history_ends_at_current_bar():
+    """
+    A coin's history is fixed for the coin, hourly, and its last close is the bar at ``end``.
+    """
+    sim = MarketSimulator(seed=1)
+    end = SIM_EPOCH + 500 * 3600 + 1800
+    timestamps, prices = sim.history("bitcoin", 60_000, bars=24, end=end)
+    assert len(timestamps) == len(prices) == 24
+    assert timestamps[-1] == (SIM_EPOCH + 500 * 3600) * 1000
+    assert (np.diff(timestamps) == 3600 * 1000).all()
+    assert np.array_equal(prices, sim.coin_path("bitcoin", 60_000, 501)[-24:])
+    assert min(prices[-1], sim.coin_path("bitcoin", 60_000, 502)[-1]) <= sim.price("bitcoin", 60_000, end) \
+        <= max(prices[-1], sim.coin_path("bitcoin", 60_000, 502)[-1])
+    assert not np.array_equal(prices, sim.history("ethereum", 60_000, bars=24, end=end)[1])
+
+def test_invalid_arguments():
+    """
+    Non-positive start prices and negative lengths are rejected.
+    """
+    sim = MarketSimulator()
+    with pytest.raises(ValueError):
+        sim.paths([100.0, 0.0], 10)
+    with pytest.raises(ValueError):
+        sim.paths([100.0], -1)
@@ -0,0 +1,22 @@
+import os
+from benchmarks import startup
+
+# Budgets are what the API may add on top of a bare FastAPI app measured in the same run,
+# so they hold on slow CI machines and still catch a heavy import creeping back in (pandas alone is ~0.45 s).
+IMPORT_BUDGET = float(os.getenv("HODLBOT_IMPORT_BUDGET", "0.3"))
+HEALTH_BUDGET = float(os.getenv("HODLBOT_HEALTH_BUDGET", "0.5"))
+
+def test_heavy_libraries_stay_out_of_startup():
+    """
+    Importing the API must not import numpy, pandas, ta or requests, and its own imports must fit the budget.
+    """
+    profile = startup.import_profile()
+    assert [name for name in startup.DEFERRED if name in profile] == []
+    assert startup.own_import_seconds(profile) < IMPORT_BUDGET
+
+def test_health_answers_within_budget():
+    """
+    A freshly launched server answers /health within the budget of a bare FastAPI app doing the same.
+    """
+    floor = startup.time_to_health(app="benchmarks.startup:bare_app", factory=True)
+    assert startup.time_to_health() - floor < HEALTH_BUDGET
@@ -0,0 +1,111 @@
+import math
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+from backend.ai import streaming, strategy
+from backend.ai.series import PriceSeries
+from backend.ai.streaming import EngineRegistry, IndicatorEngine
+from backend.utils.price_store import PriceStore
+
+COLUMNS = ["SMA_5", "SMA_10", "RSI", "MACD", "MACD_Signal", "BB_High", "BB_Low", "ADX"]
+
+def random_walk(n, seed=7, start=100.0):
+    rng = np.random.default_rng(seed)
+    return np.round(start * np.exp(np.cumsum(rng.normal(0, 0.01, n))), 6)
+
+def batch_latest(prices):
+    df = pd.DataFrame({"price": prices})
+    df = strategy.calculate_sma(df, window=5)
+    df = strategy.calculate_sma(df, window=10)
+    df = strategy.calculate_rsi(df)
+    df = strategy.calculate_macd(df)
+    df = strategy.calculate_bollinger_bands(df)
+    df = strategy.calculate_adx(df)
+    return df
+
+def assert_close(expected, actual):
+    for column in COLUMNS:
+        if math.isnan(expected[column]):
+            assert math.isnan(actual[column]), column
+        else:
+            assert abs(expected[column] - actual[column]) <= 2e-6 * max(1.0, abs(expected[column])), column
+
+def test_engine_matches_batch_indicators():
+    """
+    Streaming updates reproduce the batch indicator values at every bar.
+    """
+    prices = random_walk(400)
+    df = batch_latest(prices)
+    engine = IndicatorEngine()
+    for i, price in enumerate(prices):
+        engine.update(price)
+        if i >= 30:
+            assert_close(df.iloc[i], engine.values())
+
+def test_engine_decision_matches_batch_decision():
+    """
+    The rule cascade gives the same decision on streamed and batch values.
+    """
+    for seed in range(5):
+        prices = random_walk(336, seed=seed, start=30000.0)
+        engine = IndicatorEngine()
+        for price in prices:
+            engine.update(price)
+        expected = strategy.decide(batch_latest(prices).iloc[-1])
+        assert strategy.decide(engine.values())["decision"] == expected["decision"]
+
+def test_snapshot_restore_continues_identically():
+    """
+    An engine restored from a snapshot tracks the original on later updates.
+    """
+    prices = random_walk(200, seed=3)
+    engine = IndicatorEngine()
+    for price in prices[:120]:
+        engine.update(price)
+    clone = IndicatorEngine.restore(engine.snapshot())
+    for price in prices[120:]:
+        engine.update(price)
+        clone.update(price)
+    assert_close(engine.values(), clone.values())
+
+def test_streaming_decision_reports_upstream_errors(monkeypatch):
+    """
+    An upstream failure becomes the usual error decision; anything unexpected propagates.
+    """
+    def unreachable(coin_id, days=14):
+        raise requests.exceptions.ConnectionError("upstream down")
+
+    def broken(coin_id, days=14):
+        raise KeyError("bug")
+
+    monkeypatch.setattr(strategy, "IS_SIMULATION_MODE", False)
+    monkeypatch.setattr(strategy, "sync_price_history", unreachable)
+    assert streaming.make_streaming_trade_decision("bitcoin") == {"error": "No price data available"}
+    monkeypatch.setattr(strategy, "sync_price_history", broken)
+    with pytest.raises(KeyError):
+        streaming.make_streaming_trade_decision("bitcoin")
+
+def test_registry_replaces_a_rewritten_tail(tmp_path):
+    """
+    Refreshes that overwrite the store's last hourly point replace the engine's last bar instead of adding bars.
+    """
+    store = PriceStore(str(tmp_path))
+    hour = store.resolution_ms
+    prices = random_walk(400, seed=5, start=30000.0)
+    store.append("bitcoin", [[i * hour, float(p)] for i, p in enumerate(prices[:336])])
+    registry = EngineRegistry()
+    registry.feed("bitcoin", *store.read("bitcoin"))
+
+    for refresh, price in enumerate(prices[336:347]):
+        store.append("bitcoin", [[335 * hour + (refresh + 1) * 300_000, float(price)]])
+        timestamps, stored = store.read("bitcoin")
+        engine = registry.feed("bitcoin", timestamps, stored)
+        assert engine.count == 336
+        assert_close(PriceSeries(timestamps, stored).latest(), engine.values())
+
+    store.append("bitcoin", [[336 * hour, float(prices[348])]])
+    timestamps, stored = store.read("bitcoin")
+    engine = registry.feed("bitcoin", timestamps, stored)
+    assert engine.count == 337
+    assert_close(PriceSeries(timestamps, stored).latest(), engine.values())
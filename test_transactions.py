@@ -0,0 +1,75 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from backend.models import transactions
+from backend.models.transactions import Transaction, TransactionHistory, init_ledger
+from backend.routers.transactions import export_lines, get_transactions
+
+@pytest.fixture
+def ledger(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    init_ledger(path)
+    yield path
+    TransactionHistory.flush()
+    transactions.db.close()
+
+def add_trades(count):
+    start = datetime(2025, 1, 1)
+    for i in range(count):
+        coin = ("bitcoin", "ethereum", "dogecoin")[i % 3]
+        TransactionHistory.add_transaction(
+            Transaction(coin, "buy" if i % 2 == 0 else "sell", 10.0 + i, 100.0, start + timedelta(minutes=i))
+        )
+
+def failing_insert(rows):
+    raise OSError("disk full")
+
+def test_cursor_pages_cover_every_row_once(ledger):
+    """
+    Walking next_cursor returns each matching row exactly once, newest first.
+    """
+    add_trades(250)
+    seen = []
+    cursor = None
+    while True:
+        page = get_transactions(coin="bitcoin", action=None, since=None, until=None, cursor=cursor, limit=30)
+        seen.extend(row["id"] for row in page["transactions"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 84
+    assert seen == sorted(seen, reverse=True)
+
+def test_filters_and_persistence(ledger):
+    add_trades(60)
+    since = datetime(2025, 1, 1, 0, 30)
+    page = get_transactions(coin=None, action="sell", since=since, until=None, cursor=None, limit=100)
+    assert len(page["transactions"]) == 15
+    assert all(row["action"] == "sell" and row["timestamp"] >= since.isoformat() for row in page["transactions"])
+
+    TransactionHistory.flush()
+    init_ledger(ledger)  # reopen, as after a restart
+    assert TransactionHistory.count() == 60
+    assert len(TransactionHistory.get_transactions()) == 60
+
+def test_export_streams_rows_in_order(ledger):
+    add_trades(2500)
+    lines = list(export_lines(TransactionHistory.iter_rows(chunk=1000, coin_id="ethereum")))
+    rows = [json.loads(line) for line in lines]
+    assert len(rows) == 833 and all(row["coin_id"] == "ethereum" for row in rows)
+    assert [r["id"] for r in rows] == sorted(r["id"] for r in rows)
+
+    body = "".join(export_lines(TransactionHistory.iter_rows(coin_id="dogecoin"), fmt="json"))
+    assert len(json.loads(body)) == 833
+
+def test_failed_flush_is_not_retried(ledger, monkeypatch):
+    """
+    A flush that fails raises and drops its rows; the next flush does not write them behind the caller's back.
+    """
+    add_trades(3)
+    with monkeypatch.context() as patch:
+        patch.setattr(transactions.LedgerEntry, "insert_many", failing_insert)
+        with pytest.raises(OSError):
+            TransactionHistory.flush()
+    add_trades(1)
+    assert TransactionHistory.count() == 1